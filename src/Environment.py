@@ -25,9 +25,11 @@ class Environment:
             )
 
     @staticmethod
-    def get(key):
+    def get(key, parse_json: bool = True):
         if key in os.environ:
-            return try_parse_json(os.environ[key])
+            value = os.environ[key]
+
+            return try_parse_json(value) if parse_json else value
         else:
             return None
 
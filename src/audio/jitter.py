@@ -0,0 +1,349 @@
+import time
+import asyncio
+import binascii
+from collections import deque
+from typing import Deque, Tuple
+
+from src.audio.sinks import AudioSink
+from src.helpers.logging import LoggerFactory
+
+logger = LoggerFactory.get_logger(namespace="jitter_buffer", color="blue")
+
+"""
+arrival (monotonic s), timestamp (samples since the utterance started), pcm
+"""
+_Chunk = Tuple[float, int, bytes]
+
+"""
+queued by finish(), marks the end of an utterance
+"""
+_END = object()
+
+
+class JitterBuffer:
+    """
+    playout stage between a Voicebox & an AudioSink, pass `jitter.write_base64`
+    as the voicebox's on_speech.
+
+    chunks are timestamped by sample count & handed to the sink on a playout
+    clock. playout of an utterance starts `prebuffer_ms` after its first chunk
+    arrives, where the prebuffer adapts per session:
+    - lateness: how far each chunk arrived behind real time (relative to the
+      first chunk). the worst lateness of an utterance is exactly the prebuffer
+      that would have played it without a stall. it is tracked fast-up/slow-down
+      across utterances.
+    - jitter: RFC 3550 style running estimate of inter-arrival variation
+      (one-sided, chunks arriving early never stall playout), added as headroom.
+
+    if the sink runs dry mid-utterance it's an underrun: playout rebuffers
+    (waits the current prebuffer again) before resuming. chunks that arrive
+    after their playout time are counted as late.
+
+    call finish() once the voicebox's generation is complete (so the tail isn't
+    treated as an underrun), then `await wait_played()`.
+    """
+
+    def __init__(
+        self,
+        sink: AudioSink,
+        initial_prebuffer_ms: float = 100.0,
+        min_prebuffer_ms: float = 0.0,
+        max_prebuffer_ms: float = 1000.0,
+        jitter_multiplier: float = 2.0,
+        lead_ms: float = 40.0,  # how far ahead of its playout time a chunk goes to the sink
+        decay: float = 0.8,  # per utterance, how slowly the prebuffer comes back down
+    ):
+        self.sink = sink
+        self.min_prebuffer_ms = min_prebuffer_ms
+        self.max_prebuffer_ms = max_prebuffer_ms
+        self.jitter_multiplier = jitter_multiplier
+        self.lead_ms = lead_ms
+        self.decay = decay
+
+        # internal
+        self._chunks: Deque[_Chunk] = deque()
+        self._pending_ends = 0
+        self._wakeup: asyncio.Event = None
+        self._idle: asyncio.Event = None
+        self._playout_task: asyncio.Task = None
+        self._playout_error: Exception = None  # what the last playout task died of
+
+        ## write side (current utterance)
+        self._first_arrival: float = None
+        self._last_arrival: float = None
+        self._last_timestamp = 0
+        self._samples_received = 0
+        self._max_lateness_ms = 0.0
+
+        ## playout side
+        self._anchor: float = None  # monotonic time `_anchor_samples` started playing
+        self._anchor_samples = 0
+        self._samples_handed = 0  # utterance samples given to the sink so far
+        self._run_started = False  # playout of the current utterance has begun
+        self._stalled = False  # underran, waiting on the next chunk
+
+        ## adaptation
+        self.jitter_ms = 0.0
+        self._required_ms = initial_prebuffer_ms
+
+        ## stats
+        self.chunks = 0
+        self.utterances = 0
+        self.underruns = 0
+        self.late_chunks = 0
+        self.last_start_latency_ms: float = None
+
+    """
+    api
+    """
+
+    def write_base64(self, base64_audio: str):
+        self.write(binascii.a2b_base64(base64_audio))
+
+    def write(self, pcm):
+        self._ensure_playout()
+
+        now = time.monotonic()
+        chunk = bytes(pcm)  # copy, views (e.g. from a PcmRingBuffer) may be reused
+        timestamp = self._samples_received
+
+        if self._first_arrival is None:
+            self._first_arrival = now
+        else:
+            media_gap_s = (timestamp - self._last_timestamp) / self.sink.sample_rate
+            transit_delta_ms = ((now - self._last_arrival) - media_gap_s) * 1000
+            self.jitter_ms += (max(transit_delta_ms, 0.0) - self.jitter_ms) / 16
+
+            lateness_ms = (now - self._first_arrival - self._media_s(timestamp)) * 1000
+            self._max_lateness_ms = max(self._max_lateness_ms, lateness_ms)
+
+        # (while an earlier utterance is still playing out, its clock doesn't apply)
+        if self._stalled:
+            self._stalled = False
+            self.late_chunks += 1  # the chunk the sink ran dry waiting for
+        elif self._anchor is not None and not self._pending_ends and now > self._due(timestamp):
+            self.late_chunks += 1
+
+        self._last_arrival = now
+        self._last_timestamp = timestamp
+        self._samples_received += len(chunk) // self.sink.frame_bytes
+        self.chunks += 1
+
+        self._chunks.append((now, timestamp, chunk))
+        self._idle.clear()
+        self._wakeup.set()
+
+    def finish(self):
+        """
+        the current utterance is complete, buffered audio plays out w/o stalling
+        """
+        if self._first_arrival is None:
+            return  # nothing was written
+
+        self._adapt(required_ms=self._max_lateness_ms)
+        self._reset_utterance()
+
+        self._ensure_playout()
+        self._chunks.append(_END)
+        self._pending_ends += 1
+        self._wakeup.set()
+
+    def clear(self):
+        """
+        drop buffered audio (e.g. barge-in), the prebuffer estimate is kept
+        """
+        self._chunks.clear()
+        self._pending_ends = 0
+        self._reset_utterance()
+        self._reset_playout()
+
+        clear_sink = getattr(self.sink, "clear", None)
+        if clear_sink is not None:
+            clear_sink()
+
+        if self._wakeup is not None:
+            self._wakeup.set()
+            self._idle.set()
+
+    async def wait_played(self):
+        """
+        raises what the sink raised if playout failed (again) before all
+        buffered audio was handed over
+        """
+        if self._idle is not None:
+            self._ensure_playout()  # (restarts a failed playout)
+            await self._idle.wait()
+
+            if self._playout_error is not None:
+                error, self._playout_error = self._playout_error, None
+                raise error
+
+        await self.sink.wait_played()
+
+    async def close(self):
+        if self._playout_task is not None:
+            self._playout_task.cancel()
+            await asyncio.gather(self._playout_task, return_exceptions=True)
+            self._playout_task = None
+
+    # state
+
+    def prebuffer_ms(self) -> float:
+        required_ms = max(self._required_ms, self._max_lateness_ms)  # (grows mid-utterance)
+        prebuffer_ms = required_ms + self.jitter_multiplier * self.jitter_ms
+
+        return min(max(prebuffer_ms, self.min_prebuffer_ms), self.max_prebuffer_ms)
+
+    def stats(self) -> dict:
+        return {
+            "chunks": self.chunks,
+            "utterances": self.utterances,
+            "underruns": self.underruns,
+            "late_chunks": self.late_chunks,
+            "jitter_ms": round(self.jitter_ms, 3),
+            "prebuffer_ms": round(self.prebuffer_ms(), 3),
+            "last_start_latency_ms": (
+                round(self.last_start_latency_ms, 3)
+                if self.last_start_latency_ms is not None
+                else None
+            ),
+        }
+
+    ########################
+    # playout
+    ########################
+
+    def _ensure_playout(self):
+        """
+        starts the playout task, or restarts it if it failed (w/ what's still
+        buffered, on a fresh clock)
+        """
+        task = self._playout_task
+        if task is not None and not task.done():
+            return
+
+        if task is None:
+            self._wakeup = asyncio.Event()
+            self._idle = asyncio.Event()
+            self._idle.set()
+        else:
+            self._playout_error = None  # (logged when it happened)
+            self._reset_playout()
+            if self._chunks:
+                self._idle.clear()
+
+        self._playout_task = asyncio.create_task(self._playout_routine())
+
+    async def _playout_routine(self):
+        try:
+            while True:
+                await self._wait_for_chunk()
+
+                entry = self._chunks[0]
+                if entry is _END:
+                    self._chunks.popleft()
+                    self._pending_ends -= 1
+                    self._reset_playout()
+                    self.utterances += 1
+
+                    if not self._chunks:
+                        self._idle.set()
+
+                    continue
+
+                arrival, timestamp, chunk = entry
+                if self._anchor is None:
+                    await self._wait_prebuffered(arrival)
+                    if not self._chunks or self._chunks[0] is not entry:
+                        continue  # cleared while prebuffering
+
+                    self._start_run(arrival=arrival, timestamp=timestamp)
+
+                handoff_delay_s = self._due(timestamp) - self.lead_ms / 1000 - time.monotonic()
+                if handoff_delay_s > 0:
+                    await asyncio.sleep(handoff_delay_s)
+                    if not self._chunks or self._chunks[0] is not entry:
+                        continue  # cleared while waiting
+
+                self._chunks.popleft()
+                self._samples_handed = timestamp + len(chunk) // self.sink.frame_bytes
+                self.sink.write(chunk)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"jitter buffer playout failed: {e}")
+            self._playout_error = e
+        finally:
+            self._idle.set()  # (nothing is played out until the next write restarts it)
+
+    async def _wait_for_chunk(self):
+        while not self._chunks:
+            self._wakeup.clear()
+
+            if self._anchor is None:
+                await self._wakeup.wait()
+
+                continue
+
+            # playing: the sink runs dry once everything handed over has played
+            drained_in_s = self._due(self._samples_handed) - time.monotonic()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(drained_in_s, 0))
+            except asyncio.TimeoutError:
+                if not self._chunks:
+                    self.underruns += 1
+                    self._stalled = True
+                    self._anchor = None  # rebuffer before resuming
+
+    async def _wait_prebuffered(self, arrival: float):
+        while True:
+            if self._pending_ends:
+                return  # the whole utterance is here, no reason to wait
+
+            wait_s = arrival + self.prebuffer_ms() / 1000 - time.monotonic()
+            if wait_s <= 0:
+                return
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=wait_s)
+            except asyncio.TimeoutError:
+                return
+
+    def _start_run(self, arrival: float, timestamp: int):
+        self._anchor = time.monotonic()
+        self._anchor_samples = timestamp
+
+        if not self._run_started:
+            self._run_started = True
+            self.last_start_latency_ms = (self._anchor - arrival) * 1000
+
+    def _due(self, timestamp: int) -> float:
+        return self._anchor + self._media_s(timestamp - self._anchor_samples)
+
+    ########################
+    # helpers
+    ########################
+
+    def _media_s(self, samples: int) -> float:
+        return samples / self.sink.sample_rate
+
+    def _adapt(self, required_ms: float):
+        if required_ms >= self._required_ms:
+            self._required_ms = required_ms  # fast up
+        else:
+            self._required_ms = self.decay * self._required_ms + (1 - self.decay) * required_ms
+
+    def _reset_utterance(self):
+        self._first_arrival = None
+        self._last_arrival = None
+        self._last_timestamp = 0
+        self._samples_received = 0
+        self._max_lateness_ms = 0.0
+
+    def _reset_playout(self):
+        self._anchor = None
+        self._anchor_samples = 0
+        self._samples_handed = 0
+        self._run_started = False
+        self._stalled = False
@@ -0,0 +1,146 @@
+import binascii
+from typing import Callable, List
+
+"""
+frame: exactly `frame_bytes` of audio
+timestamp: of the frame's first sample, in samples (an RTP-style clock)
+"""
+OnFrame = Callable[[memoryview, int], None]
+
+
+class FramePacketizer:
+    """
+    re-frames arbitrarily sized audio chunks into fixed-duration frames (e.g.
+    20ms for RTP/WebRTC), pass `packetizer.write_base64` as a voicebox's on_speech.
+
+    frames that lie within one chunk are memoryview slices of it (no copy).
+    a chunk's leftover tail is kept as a view too, & only a frame that spans
+    chunks is copied (once, into its own buffer). only the final frame of an
+    utterance is padded, w/ silence, by finish().
+
+    written chunks must not be mutated afterwards (bytes, e.g. decoded base64,
+    never are). timestamps keep counting across utterances, so they stay monotonic.
+    """
+
+    def __init__(
+        self,
+        on_frame: OnFrame,
+        frame_ms: int = 20,
+        sample_rate: int = 44100,
+        sample_width: int = 2,  # 1 for G.711
+        channels: int = 1,
+        silence_byte: int = 0x00,  # 0xFF for μ-law, 0xD5 for A-law
+        initial_timestamp: int = 0,
+    ):
+        frame_samples = sample_rate * frame_ms / 1000
+        if not frame_samples.is_integer():
+            raise ValueError(f"{frame_ms}ms isn't a whole number of samples at {sample_rate}Hz")
+
+        self.on_frame = on_frame
+        self.frame_samples = int(frame_samples)
+        self.frame_bytes = self.frame_samples * sample_width * channels
+        self.silence_byte = silence_byte
+
+        # internal
+        self._timestamp = initial_timestamp
+        self._pending: List[memoryview] = []  # tail pieces short of a full frame
+        self._pending_bytes = 0
+
+        ## stats
+        self.bytes_in = 0
+        self.frames_emitted = 0
+        self.bytes_copied = 0
+        self.padded_frames = 0
+
+    """
+    api
+    """
+
+    def write_base64(self, base64_audio: str):
+        self.write(binascii.a2b_base64(base64_audio))
+
+    def write(self, audio):
+        view = memoryview(audio).cast("B")
+        self.bytes_in += len(view)
+        offset = 0
+
+        # complete the frame left over from previous chunks
+        if self._pending_bytes:
+            missing = self.frame_bytes - self._pending_bytes
+            if len(view) < missing:
+                self._pending.append(view)
+                self._pending_bytes += len(view)
+
+                return
+
+            self._pending.append(view[:missing])
+            self._emit(self._stitch())
+            offset = missing
+
+        # whole frames, straight out of the chunk (hot loop, locals only)
+        frame_bytes, frame_samples, on_frame = self.frame_bytes, self.frame_samples, self.on_frame
+        end = len(view) - (len(view) - offset) % frame_bytes
+        timestamp = self._timestamp
+
+        for start in range(offset, end, frame_bytes):
+            on_frame(view[start : start + frame_bytes], timestamp)
+            timestamp += frame_samples
+
+        self.frames_emitted += (end - offset) // frame_bytes
+        self._timestamp = timestamp
+
+        if end < len(view):
+            self._pending.append(view[end:])
+            self._pending_bytes = len(view) - end
+
+    def finish(self):
+        """
+        emits the last partial frame (padded w/ silence) at the end of an utterance
+        """
+        if not self._pending_bytes:
+            return
+
+        self.padded_frames += 1
+        self._emit(self._stitch())
+
+    def clear(self):
+        """
+        drop the partial frame (e.g. barge-in)
+        """
+        self._pending = []
+        self._pending_bytes = 0
+
+    # state
+
+    def stats(self) -> dict:
+        return {
+            "bytes_in": self.bytes_in,
+            "frames_emitted": self.frames_emitted,
+            "bytes_copied": self.bytes_copied,
+            "padded_frames": self.padded_frames,
+            "pending_bytes": self._pending_bytes,
+            "timestamp": self._timestamp,
+        }
+
+    ########################
+    # helpers
+    ########################
+
+    def _stitch(self) -> memoryview:
+        frame = bytearray([self.silence_byte]) * self.frame_bytes
+
+        position = 0
+        for piece in self._pending:
+            frame[position : position + len(piece)] = piece
+            position += len(piece)
+
+        self.bytes_copied += position
+        self.clear()
+
+        return memoryview(frame)
+
+    def _emit(self, frame: memoryview):
+        self.on_frame(frame, self._timestamp)
+
+        self._timestamp += self.frame_samples
+        self.frames_emitted += 1
@@ -0,0 +1,169 @@
+import asyncio
+import binascii
+
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_REJECT = "reject"
+
+
+class PcmRingBuffer:
+    """
+    preallocated ring of decoded pcm.
+
+    writers decode base64 frames & copy them into the ring (one short-lived
+    bytes object per frame, no AudioSegment or per-chunk objects kept around),
+    readers get memoryview slices into it.
+
+    a view returned by peek()/read() points into the ring itself: process it
+    before the next write() (or, w/ the "reject" policy, before consume()).
+
+    overflow policies:
+    - "drop_oldest": unread audio is overwritten to make room (live playout)
+    - "reject": whatever doesn't fit is dropped (nothing unread is lost)
+    """
+
+    def __init__(
+        self,
+        capacity: int = 44100 * 2 * 10,  # 10s of 44.1kHz 16-bit mono
+        overflow: str = OVERFLOW_DROP_OLDEST,
+        frame_bytes: int = 2,  # sample_width * channels, frames are never split
+    ):
+        if overflow not in [OVERFLOW_DROP_OLDEST, OVERFLOW_REJECT]:
+            raise ValueError(f"unknown overflow policy: {overflow}")
+
+        self.capacity = capacity - capacity % frame_bytes
+        self.overflow = overflow
+        self.frame_bytes = frame_bytes
+
+        # internal
+        self._buffer = bytearray(self.capacity)
+        self._view = memoryview(self._buffer)
+        self._write_total = 0  # monotonic byte counters, position = total % capacity
+        self._read_total = 0
+        self._partial_frame = b""  # writes aren't guaranteed to end on a frame boundary
+        self._readable_event: asyncio.Event = None
+
+        ## stats
+        self.bytes_written = 0
+        self.bytes_read = 0
+        self.overflows = 0
+        self.overflowed_bytes = 0
+
+    """
+    api
+    """
+
+    # writing
+
+    def write_base64(self, base64_audio: str) -> int:
+        return self.write(binascii.a2b_base64(base64_audio))
+
+    def write(self, data) -> int:
+        """
+        returns the number of bytes written (a trailing partial frame is held
+        back & completed by the next write)
+        """
+        data = memoryview(data).cast("B")
+        if self._partial_frame:
+            data = memoryview(self._partial_frame + bytes(data))
+
+        size = len(data) - len(data) % self.frame_bytes
+        self._partial_frame = bytes(data[size:])
+
+        if size > self.free():
+            self.overflows += 1
+
+            if self.overflow == OVERFLOW_REJECT:
+                self.overflowed_bytes += size - self.free()
+                size = self.free()
+            else:
+                if size > self.capacity:  # only the newest `capacity` bytes survive
+                    self.overflowed_bytes += size - self.capacity
+                    data = data[size - self.capacity : size]
+                    size = self.capacity
+
+                dropped = size - self.free()
+                self.overflowed_bytes += dropped
+                self._read_total += dropped
+
+        self._copy_in(data[:size])
+        self._write_total += size
+        self.bytes_written += size
+
+        if size and self._readable_event is not None:
+            self._readable_event.set()
+
+        return size
+
+    # reading
+
+    def peek(self, max_bytes: int = None) -> memoryview:
+        """
+        contiguous view of the oldest unread audio (stops at the wrap point,
+        call again after consume() for the rest)
+        """
+        start = self._read_total % self.capacity
+        size = min(self.readable(), self.capacity - start)
+        if max_bytes is not None:
+            size = min(size, max_bytes - max_bytes % self.frame_bytes)
+
+        return self._view[start : start + size]
+
+    def consume(self, num_bytes: int):
+        """
+        (rounded down to whole frames, so reads stay frame-aligned)
+        """
+        num_bytes = min(num_bytes - num_bytes % self.frame_bytes, self.readable())
+        self._read_total += num_bytes
+        self.bytes_read += num_bytes
+
+        if self.readable() == 0 and self._readable_event is not None:
+            self._readable_event.clear()
+
+    def read(self, max_bytes: int = None) -> memoryview:
+        view = self.peek(max_bytes=max_bytes)
+        self.consume(len(view))
+
+        return view
+
+    async def wait_readable(self):
+        if self._readable_event is None:
+            self._readable_event = asyncio.Event()
+        if self.readable() > 0:
+            return
+
+        self._readable_event.clear()
+        await self._readable_event.wait()
+
+    def clear(self):
+        self._read_total = self._write_total
+        self._partial_frame = b""
+
+    # state
+
+    def readable(self) -> int:
+        return self._write_total - self._read_total
+
+    def free(self) -> int:
+        return self.capacity - self.readable()
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "readable": self.readable(),
+            "bytes_written": self.bytes_written,
+            "bytes_read": self.bytes_read,
+            "overflows": self.overflows,
+            "overflowed_bytes": self.overflowed_bytes,
+        }
+
+    ########################
+    # helpers
+    ########################
+
+    def _copy_in(self, data: memoryview):
+        start = self._write_total % self.capacity
+        first = min(len(data), self.capacity - start)
+
+        self._view[start : start + first] = data[:first]
+        if first < len(data):  # wrap around
+            self._view[: len(data) - first] = data[first:]
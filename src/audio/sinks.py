@@ -0,0 +1,291 @@
+import time
+import wave
+import queue
+import asyncio
+import binascii
+import threading
+from pathlib import Path
+from typing import Union
+from pydub import AudioSegment
+from pydub.playback import play
+
+from src.helpers.logging import LoggerFactory
+
+try:
+    import pyaudio  # optional, enables gapless device playback
+except ImportError:
+    pyaudio = None
+
+logger = LoggerFactory.get_logger(namespace="audio_sinks", color="blue")
+
+"""
+sentinel that stops a sink's output thread
+"""
+_CLOSE = object()
+
+
+class AudioSink:
+    """
+    destination for decoded pcm coming out of a Voicebox.
+
+    write()/write_base64() never block the event loop, so either can be passed
+    directly as a Voicebox's on_speech. wait_played() resolves once every
+    written sample has been output, derived from sample counts (not a guess).
+    """
+
+    def __init__(self, sample_rate: int = 44100, channels: int = 1, sample_width: int = 2):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.frame_bytes = channels * sample_width
+
+        ## sample counts
+        self.samples_written = 0
+        self.samples_played = 0
+
+        # internal
+        self._lock = threading.Lock()  # counts are updated from output threads & the loop
+        self._play_until = 0.0  # monotonic time the last output sample finishes playing
+        self._loop: asyncio.AbstractEventLoop = None
+        self._played_event: asyncio.Event = None
+
+    """
+    api
+    """
+
+    def write_base64(self, base64_audio: str):
+        self.write(binascii.a2b_base64(base64_audio))
+
+    def write(self, pcm):
+        raise NotImplementedError
+
+    async def wait_played(self):
+        if self._played_event is None:
+            self._played_event = asyncio.Event()
+            self._loop = asyncio.get_running_loop()  # set last, output threads check it
+
+        while True:
+            self._played_event.clear()
+            with self._lock:
+                if self.samples_played >= self.samples_written:
+                    play_until = self._play_until
+                    break
+
+            await self._played_event.wait()
+
+        # samples are handed to the device ahead of being heard
+        remaining_s = play_until - time.monotonic()
+        if remaining_s > 0:
+            await asyncio.sleep(remaining_s)
+
+    async def close(self):
+        pass
+
+    def duration_s(self, num_bytes: int) -> float:
+        return num_bytes / self.frame_bytes / self.sample_rate
+
+    ########################
+    # helpers
+    ########################
+
+    def _mark_written(self, num_bytes: int):
+        with self._lock:
+            self.samples_written += num_bytes // self.frame_bytes
+
+    def _mark_played(self, num_bytes: int, realtime: bool):
+        """
+        thread-safe, called from output threads & the loop (clear(), NullSink)
+        """
+        with self._lock:
+            if realtime:
+                start = max(time.monotonic(), self._play_until)
+                self._play_until = start + self.duration_s(num_bytes)
+
+            self.samples_played += num_bytes // self.frame_bytes
+
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._played_event.set)
+
+
+class NullSink(AudioSink):
+    """
+    discards audio. w/ realtime=True wait_played() still waits as long as
+    playback would have taken (useful to simulate a client headlessly).
+    """
+
+    def __init__(self, realtime: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self.realtime = realtime
+
+    def write(self, pcm):
+        num_bytes = len(memoryview(pcm).cast("B"))
+
+        self._mark_written(num_bytes)
+        self._mark_played(num_bytes, realtime=self.realtime)
+
+
+class _ThreadedSink(AudioSink):
+    """
+    writes are queued & output from a dedicated thread, in order.
+
+    chunks are counted as played here, not by _output(): as they start
+    playing for realtime outputs, once output otherwise (or once output
+    failed, so wait_played() doesn't hang on them).
+    """
+
+    realtime = False
+
+    def __init__(self, thread_name: str, **kwargs):
+        super().__init__(**kwargs)
+
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._output_routine, name=thread_name, daemon=True)
+        self._thread.start()
+
+    def write(self, pcm):
+        chunk = bytes(pcm)  # copy, views (e.g. from a PcmRingBuffer) may be reused
+
+        self._mark_written(len(chunk))
+        self._queue.put(chunk)
+
+    def clear(self):
+        """
+        drop queued (not yet output) audio, e.g. when the user barges in
+        """
+        while True:
+            try:
+                chunk = self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+            if chunk is _CLOSE:
+                self._queue.put(_CLOSE)
+
+                return
+
+            self._mark_played(len(chunk), realtime=False)
+
+    async def close(self):
+        self._queue.put(_CLOSE)
+
+        await asyncio.to_thread(self._thread.join)
+
+    # output thread
+
+    def _output_routine(self):
+        chunk = None
+
+        try:
+            self._open_output()
+
+            while True:
+                chunk = self._queue.get()
+                if chunk is _CLOSE:
+                    break
+
+                if self.realtime:
+                    self._mark_played(len(chunk), realtime=True)
+                    self._output(chunk)
+                else:
+                    self._output(chunk)
+                    self._mark_played(len(chunk), realtime=False)
+                chunk = None
+        except Exception as e:
+            logger.error(f"audio output failed: {e}")
+
+            # keep counting so wait_played() callers aren't left hanging
+            if chunk is not None and not self.realtime:
+                self._mark_played(len(chunk), realtime=False)  # the chunk that failed
+            while True:
+                chunk = self._queue.get()
+                if chunk is _CLOSE:
+                    break
+
+                self._mark_played(len(chunk), realtime=False)
+        finally:
+            self._close_output()
+
+    def _open_output(self):
+        pass
+
+    def _output(self, chunk: bytes):
+        raise NotImplementedError
+
+    def _close_output(self):
+        pass
+
+
+class PlaybackSink(_ThreadedSink):
+    """
+    continuous playback on the default output device.
+
+    uses a single pyaudio stream when pyaudio is installed (gapless),
+    otherwise falls back to pydub playback per chunk (audible gaps).
+    """
+
+    realtime = True
+
+    def __init__(self, **kwargs):
+        self._pyaudio = None
+        self._stream = None
+
+        super().__init__(thread_name="playback-sink", **kwargs)
+
+    def _open_output(self):
+        if pyaudio is None:
+            logger.warning("pyaudio not installed, falling back to per-chunk pydub playback")
+
+            return
+
+        self._pyaudio = pyaudio.PyAudio()
+        self._stream = self._pyaudio.open(
+            format=self._pyaudio.get_format_from_width(self.sample_width),
+            channels=self.channels,
+            rate=self.sample_rate,
+            output=True,
+        )
+
+    def _output(self, chunk: bytes):
+        if self._stream is not None:
+            self._stream.write(chunk)  # blocks (this thread only) until buffered
+        else:
+            play(
+                AudioSegment(
+                    data=chunk,
+                    sample_width=self.sample_width,
+                    frame_rate=self.sample_rate,
+                    channels=self.channels,
+                )
+            )
+
+    def _close_output(self):
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+        if self._pyaudio is not None:
+            self._pyaudio.terminate()
+
+
+class WavFileSink(_ThreadedSink):
+    """
+    streams audio into a .wav file (headless servers, tests)
+    """
+
+    def __init__(self, path: Union[str, Path], **kwargs):
+        self.path = Path(path)
+        self._wav_file: wave.Wave_write = None
+
+        super().__init__(thread_name="wav-file-sink", **kwargs)
+
+    def _open_output(self):
+        self._wav_file = wave.open(str(self.path), "wb")
+        self._wav_file.setnchannels(self.channels)
+        self._wav_file.setsampwidth(self.sample_width)
+        self._wav_file.setframerate(self.sample_rate)
+
+    def _output(self, chunk: bytes):
+        self._wav_file.writeframes(chunk)
+
+    def _close_output(self):
+        if self._wav_file is not None:
+            self._wav_file.close()
@@ -0,0 +1,304 @@
+import binascii
+from math import gcd
+from typing import Callable
+
+import numpy as np
+
+"""
+encoded: resampled audio, in the stage's output encoding
+"""
+OnAudio = Callable[[bytes], None]
+
+ENCODINGS = ["pcm", "ulaw", "alaw"]
+
+
+class StreamingResampler:
+    """
+    rational (L/M) polyphase FIR resampler for 16-bit mono pcm, fed chunk by
+    chunk. the last few input samples & the output phase are carried across
+    chunks, so the output is identical to resampling the whole stream at once
+    (no clicks at chunk boundaries).
+
+    each output sample is one row of the filter bank dotted w/ the matching
+    window of input, computed for the whole chunk in a single vectorized step.
+    """
+
+    def __init__(
+        self,
+        input_rate: int = 44100,
+        output_rate: int = 8000,
+        zero_crossings: int = 16,  # sinc half-width, in periods of the lower rate
+        cutoff: float = 0.9,  # fraction of the lower nyquist frequency
+        kaiser_beta: float = 8.0,
+    ):
+        self.input_rate = input_rate
+        self.output_rate = output_rate
+
+        divisor = gcd(input_rate, output_rate)
+        self.up = output_rate // divisor  # L
+        self.down = input_rate // divisor  # M
+
+        # the filter spans the same time at any ratio, e.g. 177 taps for 44.1kHz → 8kHz
+        taps_per_phase = -(-2 * zero_crossings * max(self.up, self.down) // self.up)
+        self.taps_per_phase = taps_per_phase
+
+        # internal
+        self._bank = _polyphase_bank(
+            up=self.up,
+            down=self.down,
+            taps_per_phase=taps_per_phase,
+            cutoff=cutoff,
+            kaiser_beta=kaiser_beta,
+        )
+        self._taps = np.arange(taps_per_phase)
+        self._history = np.zeros(taps_per_phase - 1, dtype=np.float32)
+        self._next_output = 0  # index of the next output sample
+        self._inputs_seen = 0
+
+    """
+    api
+    """
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """
+        float32 samples in, float32 samples out (as many as the input allows)
+        """
+        buffer = np.concatenate((self._history, samples.astype(np.float32, copy=False)))
+        buffer_start = self._inputs_seen - (self.taps_per_phase - 1)  # input index of buffer[0]
+        self._inputs_seen += len(samples)
+
+        # every output whose newest input sample has arrived
+        end_output = (self._inputs_seen * self.up - 1) // self.down + 1
+        outputs = np.arange(self._next_output, end_output, dtype=np.int64)
+
+        positions = outputs * self.down
+        newest_inputs = positions // self.up - buffer_start
+        phases = positions % self.up
+
+        windows = buffer[newest_inputs[:, None] - self._taps[None, :]]
+        resampled = np.einsum("kt,kt->k", self._bank[phases], windows)
+
+        self._next_output = end_output
+        self._history = buffer[len(buffer) - (self.taps_per_phase - 1) :]
+        self._rebase()
+
+        return resampled
+
+    def process_pcm16(self, pcm) -> np.ndarray:
+        """
+        16-bit little-endian pcm bytes in, int16 samples out
+        """
+        samples = np.frombuffer(pcm, dtype="<i2").astype(np.float32)
+
+        return _to_int16(self.process(samples))
+
+    def flush(self) -> np.ndarray:
+        """
+        pushes the filter's tail out (call once the stream has ended)
+        """
+        tail = self.process(np.zeros(self.taps_per_phase // 2, dtype=np.float32))
+        self.reset()
+
+        return tail
+
+    def reset(self):
+        self._history = np.zeros(self.taps_per_phase - 1, dtype=np.float32)
+        self._next_output = 0
+        self._inputs_seen = 0
+
+    # helpers
+
+    def _rebase(self):
+        # keep the counters small, every L outputs consume exactly M inputs
+        periods = self._next_output // self.up
+        self._next_output -= periods * self.up
+        self._inputs_seen -= periods * self.down
+
+
+class TelephonyOutput:
+    """
+    output stage for telephony: pass `telephony.write_base64` as a voicebox's
+    on_speech & `on_audio` receives 8kHz (by default) G.711 μ-law/A-law bytes.
+    """
+
+    def __init__(
+        self,
+        on_audio: OnAudio,
+        input_rate: int = 44100,
+        output_rate: int = 8000,
+        encoding: str = "ulaw",
+        **resampler_kwargs,
+    ):
+        if encoding not in ENCODINGS:
+            raise ValueError(f"unknown encoding: {encoding} (expected one of {ENCODINGS})")
+
+        self.on_audio = on_audio
+        self.encoding = encoding
+        self.resampler = (
+            StreamingResampler(input_rate=input_rate, output_rate=output_rate, **resampler_kwargs)
+            if input_rate != output_rate
+            else None
+        )
+
+        # internal
+        self._odd_byte = b""  # chunks aren't guaranteed to end on a sample boundary
+
+    """
+    api
+    """
+
+    def write_base64(self, base64_audio: str):
+        self.write(binascii.a2b_base64(base64_audio))
+
+    def write(self, pcm):
+        pcm = self._odd_byte + bytes(pcm) if self._odd_byte else pcm
+
+        usable_bytes = len(pcm) - len(pcm) % 2
+        self._odd_byte = bytes(pcm[usable_bytes:])
+
+        if usable_bytes:
+            self._emit(np.frombuffer(pcm, dtype="<i2", count=usable_bytes // 2))
+
+    def flush(self):
+        self._odd_byte = b""
+
+        if self.resampler is not None:
+            self._emit_resampled(self.resampler.flush())
+
+    # helpers
+
+    def _emit(self, samples: np.ndarray):
+        if self.resampler is None:
+            self._emit_resampled(samples)
+        else:
+            self._emit_resampled(self.resampler.process(samples.astype(np.float32)))
+
+    def _emit_resampled(self, samples: np.ndarray):
+        if len(samples) == 0:
+            return
+
+        pcm16 = _to_int16(samples)
+        if self.encoding == "ulaw":
+            encoded = ulaw_encode(pcm16)
+        elif self.encoding == "alaw":
+            encoded = alaw_encode(pcm16)
+        else:
+            encoded = pcm16.astype("<i2").tobytes()
+
+        self.on_audio(encoded)
+
+
+########################
+# G.711
+########################
+
+
+def ulaw_encode(pcm16: np.ndarray) -> bytes:
+    return _ULAW_ENCODE_TABLE[pcm16.astype(np.int16, copy=False).view(np.uint16)].tobytes()
+
+
+def alaw_encode(pcm16: np.ndarray) -> bytes:
+    return _ALAW_ENCODE_TABLE[pcm16.astype(np.int16, copy=False).view(np.uint16)].tobytes()
+
+
+def ulaw_decode(encoded: bytes) -> np.ndarray:
+    return _ULAW_DECODE_TABLE[np.frombuffer(encoded, dtype=np.uint8)]
+
+
+def alaw_decode(encoded: bytes) -> np.ndarray:
+    return _ALAW_DECODE_TABLE[np.frombuffer(encoded, dtype=np.uint8)]
+
+
+def _build_ulaw_encode_table() -> np.ndarray:
+    # every int16 (indexed by its uint16 bit pattern) → μ-law byte, as in the reference g711.c
+    samples = np.arange(65536, dtype=np.uint16).view(np.int16).astype(np.int32)
+
+    magnitude = samples >> 2  # 14-bit
+    mask = np.where(magnitude < 0, 0x7F, 0xFF)
+    magnitude = np.minimum(np.abs(magnitude), 8159) + 33
+
+    segment_ends = np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF])
+    segment = np.searchsorted(segment_ends, magnitude)
+
+    segment_bits = np.minimum(segment, 7)
+    encoded = (segment_bits << 4) | ((magnitude >> (segment_bits + 1)) & 0xF)
+    encoded = np.where(segment >= 8, 0x7F, encoded)
+
+    return (encoded ^ mask).astype(np.uint8)
+
+
+def _build_alaw_encode_table() -> np.ndarray:
+    samples = np.arange(65536, dtype=np.uint16).view(np.int16).astype(np.int32)
+
+    magnitude = samples >> 3  # 13-bit
+    mask = np.where(magnitude >= 0, 0xD5, 0x55)
+    magnitude = np.where(magnitude >= 0, magnitude, -magnitude - 1)
+
+    segment_ends = np.array([0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF])
+    segment = np.searchsorted(segment_ends, magnitude)
+
+    shift = np.where(segment < 2, 1, np.minimum(segment, 7))
+    encoded = (np.minimum(segment, 7) << 4) | ((magnitude >> shift) & 0xF)
+    encoded = np.where(segment >= 8, 0x7F, encoded)
+
+    return (encoded ^ mask).astype(np.uint8)
+
+
+def _build_ulaw_decode_table() -> np.ndarray:
+    encoded = ~np.arange(256, dtype=np.int32) & 0xFF
+
+    magnitude = (((encoded & 0x0F) << 3) + 0x84) << ((encoded & 0x70) >> 4)
+    decoded = np.where(encoded & 0x80, 0x84 - magnitude, magnitude - 0x84)
+
+    return decoded.astype(np.int16)
+
+
+def _build_alaw_decode_table() -> np.ndarray:
+    encoded = np.arange(256, dtype=np.int32) ^ 0x55
+
+    segment = (encoded & 0x70) >> 4
+    magnitude = (encoded & 0x0F) << 4
+    magnitude = np.where(
+        segment == 0,
+        magnitude + 8,
+        (magnitude + 0x108) << np.maximum(segment - 1, 0),
+    )
+    decoded = np.where(encoded & 0x80, magnitude, -magnitude)
+
+    return decoded.astype(np.int16)
+
+
+_ULAW_ENCODE_TABLE = _build_ulaw_encode_table()
+_ALAW_ENCODE_TABLE = _build_alaw_encode_table()
+_ULAW_DECODE_TABLE = _build_ulaw_decode_table()
+_ALAW_DECODE_TABLE = _build_alaw_decode_table()
+
+
+########################
+# helpers
+########################
+
+
+def _polyphase_bank(
+    up: int, down: int, taps_per_phase: int, cutoff: float, kaiser_beta: float
+) -> np.ndarray:
+    """
+    windowed-sinc lowpass at the upsampled rate, split into `up` phases
+    (bank[phase, tap] = h[phase + tap * up])
+    """
+    num_taps = up * taps_per_phase
+    cutoff_cycles = cutoff * 0.5 / max(up, down)  # per upsampled sample
+
+    n = np.arange(num_taps) - (num_taps - 1) / 2
+    prototype = 2 * cutoff_cycles * np.sinc(2 * cutoff_cycles * n)
+    prototype *= np.kaiser(num_taps, kaiser_beta)
+    prototype *= up  # zero-stuffing divides the gain by `up`
+
+    return prototype.reshape(taps_per_phase, up).T.astype(np.float32).copy()
+
+
+def _to_int16(samples: np.ndarray) -> np.ndarray:
+    if samples.dtype == np.int16:
+        return samples
+
+    return np.clip(np.rint(samples), -32768, 32767).astype(np.int16)
@@ -27,6 +27,15 @@ class InterruptibleAsyncTask:
         # schedule task on the event loop
         self.task = asyncio.create_task(target_coroutine(*self.args, **self.kwargs))
 
+    def cancel(self) -> asyncio.Task:
+        """
+        request cancellation w/o waiting for the task to wind down
+        """
+        if self.task and not self.task.done():
+            self.task.cancel()
+
+        return self.task
+
     async def interrupt(self):
         if self.task and not self.task.done():
             # cancel the task
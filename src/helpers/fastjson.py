@@ -0,0 +1,99 @@
+import json
+from json.encoder import encode_basestring_ascii
+from typing import Any, Optional, Tuple
+
+try:
+    import orjson  # optional, faster (de)serialization
+except ImportError:
+    orjson = None
+
+
+def dumps(obj: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def loads(s):
+    if orjson is not None:
+        return orjson.loads(s)
+
+    return json.loads(s)
+
+
+def dumps_str(s: str) -> str:
+    """
+    json string literal (quoted & escaped), via the stdlib's C encoder
+    """
+    return encode_basestring_ascii(s)
+
+
+"""
+audio frames
+"""
+
+_AUDIO_KEY = '"audio":'
+_IS_FINAL_KEY = '"isFinal":'
+
+
+def parse_audio_message(
+    message: str, with_metadata: bool = False
+) -> Tuple[Optional[str], bool, Optional[dict]]:
+    """
+    pulls `audio` & `isFinal` out of an ElevenLabs message w/o parsing the rest.
+
+    ElevenLabs (& the stand-in server) put `audio` first, base64 never needs
+    escaping, so the value can be sliced straight out of the message. anything
+    else falls back to a full parse.
+
+    returns (base64_audio, is_final, data) where data is the fully parsed
+    message on the fallback path (None on the fast path). w/ `with_metadata`,
+    the fast path parses everything after the audio value (e.g. `alignment`)
+    into data too, still skipping the (large) audio string.
+    """
+    if isinstance(message, str) and message.startswith("{" + _AUDIO_KEY):
+        start = len(_AUDIO_KEY) + 1
+        while message.startswith(" ", start):
+            start += 1
+
+        if message.startswith('"', start):
+            end = message.find('"', start + 1)
+
+            if end != -1:
+                audio = message[start + 1 : end]
+                if "\\" not in audio:
+                    if with_metadata:
+                        return audio, _parse_is_final(message, end), _parse_rest(message, end)
+
+                    return audio, _parse_is_final(message, end), None
+        elif message.startswith("null", start):
+            if with_metadata:
+                return None, _parse_is_final(message, start), _parse_rest(message, start)
+
+            return None, _parse_is_final(message, start), None
+
+    data = loads(message)
+
+    return data.get("audio", None), bool(data.get("isFinal", False)), data
+
+
+def _parse_rest(message: str, audio_end: int) -> dict:
+    # `{"audio":"...",<rest>}` → `{<rest>}`
+    rest_start = message.find(",", audio_end)
+    if rest_start == -1:
+        return {}
+
+    return loads("{" + message[rest_start + 1 :])
+
+
+def _parse_is_final(message: str, start: int) -> bool:
+    index = message.find(_IS_FINAL_KEY, start)
+    if index == -1:
+        return False
+
+    index += len(_IS_FINAL_KEY)
+    while message.startswith(" ", index):
+        index += 1
+
+    return message.startswith("true", index)
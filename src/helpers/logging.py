@@ -1,4 +1,6 @@
+import os
 import sys
+from functools import lru_cache
 from loguru import logger
 from typing import List, Tuple
 
@@ -34,23 +36,12 @@ class LoggerFactory:
                 time = LoggerFactory._color_log(message=time_str, color="green")
 
                 # log level
-                log_level_str = record["level"].name.lower()
-                log_level_color = LoggerFactory._get_log_level_color(
-                    log_level=log_level_str
-                )
-
-                log_level = LoggerFactory._color_log(
-                    message=log_level_str, color=log_level_color
-                )
+                log_level = LoggerFactory._format_log_level(record["level"].name)
 
                 # namespace
-                namespace_str = record["extra"].get("namespace", "")
-                namespace_str = to_pascal_case(s=namespace_str)
-
-                namespace_color_str = record["extra"].get("color", "")
-
-                namespace = LoggerFactory._color_log(
-                    message=namespace_str, color=namespace_color_str
+                namespace = LoggerFactory._format_namespace(
+                    namespace=record["extra"].get("namespace", ""),
+                    color=record["extra"].get("color", ""),
                 )
 
                 # message
@@ -60,7 +51,17 @@ class LoggerFactory:
 
                 return f"[{time}][{log_level}][{namespace}] {message}\n"
 
-            logger.add(sys.stderr, format=custom_log_formatter)
+            """
+            records below LOG_LEVEL are dropped before any formatting happens.
+            enqueue: stderr writes happen on loguru's background thread, not
+            on the event loop.
+            """
+            logger.add(
+                sys.stderr,
+                level=os.environ.get("LOG_LEVEL", "DEBUG").upper(),
+                format=custom_log_formatter,
+                enqueue=True,
+            )
             LoggerFactory._configured = True
 
     ########################
@@ -86,6 +87,21 @@ class LoggerFactory:
 
         return message
 
+    # memoized, the set of levels & namespaces is small & fixed
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _format_log_level(level_name: str) -> str:
+        log_level_str = level_name.lower()
+        log_level_color = LoggerFactory._get_log_level_color(log_level=log_level_str)
+
+        return LoggerFactory._color_log(message=log_level_str, color=log_level_color)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _format_namespace(namespace: str, color: str) -> str:
+        return LoggerFactory._color_log(message=to_pascal_case(s=namespace), color=color)
+
     @staticmethod
     def _get_log_level_color(log_level: str = "info"):
         if log_level == "debug":
@@ -126,6 +142,9 @@ class LoggerFactory:
         base_time_ms: float = None,
         interval_coloring: List[Tuple[Tuple[int, int], str]] = white_latency_coloring,
     ) -> str:
+        """
+        eager, prefer passing lazy_latency_log(...) as an arg to a logger.opt(lazy=True) call
+        """
         if base_time_s is None and base_time_ms is None:
             raise ("must provide either base_time_s or base_time_ms")
 
@@ -154,6 +173,25 @@ class LoggerFactory:
 
         return f"{open_bracket}{prefix_log}{time_log_ms}{ms_log}{close_bracket}"
 
+    @staticmethod
+    def lazy_latency_log(
+        *,
+        prefix: str = None,
+        base_time_s: float = None,
+        base_time_ms: float = None,
+        interval_coloring: List[Tuple[Tuple[int, int], str]] = white_latency_coloring,
+    ):
+        """
+        for logger.opt(lazy=True): only built if the record's level is enabled,
+        & then synchronously inside the log call (so the latency is still accurate)
+        """
+        return lambda: LoggerFactory.get_latency_log(
+            prefix=prefix,
+            base_time_s=base_time_s,
+            base_time_ms=base_time_ms,
+            interval_coloring=interval_coloring,
+        )
+
     # helpers
 
     # [
@@ -0,0 +1,175 @@
+import math
+import json
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+
+def exponential_buckets(start: float, factor: float, count: int) -> List[float]:
+    return [start * factor**i for i in range(count)]
+
+
+"""
+~10% wide buckets from 0.1ms to ~2.5min, quantiles land within a bucket of the truth
+"""
+DEFAULT_LATENCY_BUCKETS_MS = exponential_buckets(start=0.1, factor=1.1, count=150)
+
+"""
+labels, as a sorted tuple of (name, value) pairs
+"""
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """
+    fixed-bucket histogram, observe() is a bisect + two adds
+    """
+
+    def __init__(self, buckets: List[float] = DEFAULT_LATENCY_BUCKETS_MS):
+        self.buckets = buckets  # upper bounds, the last (implicit) bucket is +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """
+        q in [0, 1], linearly interpolated within the bucket it falls in
+        """
+        if self.count == 0:
+            return math.nan
+
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else self.min
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                lower, upper = max(lower, self.min), min(upper, self.max)
+
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+
+            seen += bucket_count
+
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "p50": self.quantile(0.5) if self.count else None,
+            "p90": self.quantile(0.9) if self.count else None,
+            "p99": self.quantile(0.99) if self.count else None,
+        }
+
+
+class MetricsRegistry:
+    """
+    named histograms w/ labels (e.g. per voice), exportable as a json
+    snapshot or in the prometheus text exposition format
+    """
+
+    def __init__(self):
+        self._histograms: Dict[str, Dict[LabelSet, Histogram]] = {}
+        self._descriptions: Dict[str, Tuple[str, List[float]]] = {}
+
+    """
+    api
+    """
+
+    def describe(
+        self, name: str, help: str, buckets: List[float] = DEFAULT_LATENCY_BUCKETS_MS
+    ):
+        self._descriptions[name] = (help, buckets)
+
+    def observe(self, name: str, value: float, **labels: str):
+        self.histogram(name, **labels).observe(value)
+
+    def histogram(self, name: str, **labels: str) -> Histogram:
+        series = self._histograms.get(name)
+        if series is None:
+            series = self._histograms[name] = {}
+
+        label_set = tuple(sorted(labels.items()))
+        histogram = series.get(label_set)
+        if histogram is None:
+            _, buckets = self._descriptions.get(name, (None, DEFAULT_LATENCY_BUCKETS_MS))
+            histogram = series[label_set] = Histogram(buckets=buckets)
+
+        return histogram
+
+    def reset(self):
+        self._histograms = {}
+
+    # export
+
+    def snapshot(self) -> dict:
+        return {
+            name: [
+                {"labels": dict(label_set), **histogram.summary()}
+                for label_set, histogram in series.items()
+            ]
+            for name, series in self._histograms.items()
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot())
+
+    def to_prometheus(self) -> str:
+        lines = []
+
+        for name, series in self._histograms.items():
+            help, _ = self._descriptions.get(name, (None, None))
+            if help is not None:
+                lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} histogram")
+
+            for label_set, histogram in series.items():
+                cumulative = 0
+                for upper, bucket_count in zip(histogram.buckets, histogram.counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(label_set + (("le", f"{upper:g}"),))
+                    lines.append(f"{name}_bucket{labels} {cumulative}")
+
+                labels = _format_labels(label_set + (("le", "+Inf"),))
+                lines.append(f"{name}_bucket{labels} {histogram.count}")
+                lines.append(f"{name}_sum{_format_labels(label_set)} {histogram.sum}")
+                lines.append(f"{name}_count{_format_labels(label_set)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+########################
+# helpers
+########################
+
+
+def _format_labels(label_set: LabelSet) -> str:
+    if not label_set:
+        return ""
+
+    pairs = ",".join(f'{key}="{_escape_label_value(value)}"' for key, value in label_set)
+
+    return "{" + pairs + "}"
+
+
+def _escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+"""
+process-wide default registry
+"""
+metrics = MetricsRegistry()
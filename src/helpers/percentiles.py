@@ -0,0 +1,32 @@
+import math
+from typing import Dict, Iterable, List, Sequence
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """
+    q-th percentile (0-100) w/ linear interpolation between closest ranks
+    """
+    if not values:
+        return math.nan
+
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def summarize(
+    values: Iterable[float], quantiles: List[float] = [50, 90, 99]
+) -> Dict[str, float]:
+    values = list(values)
+    if not values:
+        return {"count": 0}
+
+    summary = {"count": len(values), "min": min(values)}
+    for q in quantiles:
+        summary[f"p{q:g}"] = percentile(values, q)
+    summary["max"] = max(values)
+
+    return summary
@@ -0,0 +1,140 @@
+from pathlib import Path
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+
+def add_modules_to_path():
+    # add root directory to sys.path to use modules in src
+    root_dir = Path(__file__).resolve().parents[3]
+
+    if str(root_dir) not in sys.path:
+        sys.path.insert(0, str(root_dir))
+
+
+add_modules_to_path()
+
+# per-event debug logs would drown the report
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from src.Environment import Environment
+
+os.environ.setdefault("ELEVENLABS_API_KEY", "stand-in")  # no real key needed offline
+Environment.load()
+
+from src.voicebox.Voicebox import Voicebox
+from src.voicebox.autotune import ChunkScheduleTuner
+from src.testing.standin.StandInServer import StandInServer
+from src.helpers.percentiles import summarize
+
+
+response_text = (
+    "Sure. Let me check that for you. Your order shipped yesterday from our warehouse "
+    "and should arrive by Thursday afternoon. Anything else? I can also set up a "
+    "delivery notification, so you get a text message as soon as it is out for delivery."
+)
+
+#######   ——————————————————————   #######
+
+"""
+chunk_length_schedule autotuning against a stand-in server w/ a synthetic
+latency model (a fixed time to first audio per generation + time per char).
+text is fed word by word at `--text-chars-per-s`, like an llm streaming tokens.
+
+"fixed": the untuned [50] schedule, no flushes
+"tuned": a ChunkScheduleTuner, learning across turns (reported over the last half)
+
+the tuner starts out at [50] & can't go below it (the api minimum), so it only
+wins where text comes in faster than audio plays out: there, flushing short
+sentences (& longer steady chunks) gets first audio out sooner w/o stalls. at
+an llm rate of ~20 chars/s or below, a 50 char first chunk is already the
+fastest that doesn't stall & the tuned run can only match the fixed one (w/ a
+worse max, its probes are what it learns from).
+"""
+
+
+async def feed_text(voicebox: Voicebox, text_chars_per_s: float):
+    for word in response_text.split():
+        await voicebox.feed_speech(word)
+        await asyncio.sleep((len(word) + 1) / text_chars_per_s)
+
+    await voicebox.feeding_finished()
+
+
+async def run_scenario(server: StandInServer, args, tuner: ChunkScheduleTuner) -> dict:
+    voicebox = Voicebox(
+        voice_id="21m00Tcm4TlvDq8ikWAM", base_url=server.url, tuner=tuner, delivery=None
+    )
+    samples = {"fgl_ms": [], "stall_ms": []}
+
+    for turn in range(args.turns):
+        voicebox.prepare(speech_generation_start_time=time.time())
+        await voicebox.wait_ready()
+        await feed_text(voicebox, text_chars_per_s=args.text_chars_per_s)
+        await voicebox.wait_complete()
+
+        timings = voicebox.timings()
+        if turn >= args.turns // 2:
+            for metric in samples:
+                samples[metric].append(timings[metric])
+
+        await voicebox.reset()
+
+    report = {metric: summarize(values) for metric, values in samples.items()}
+    if tuner is not None:
+        report["tuned"] = tuner.stats()[voicebox.voice_id]
+
+    return report
+
+
+async def main(args):
+    server = StandInServer(
+        first_audio_delay_s=args.first_audio_delay_ms / 1000,
+        generation_ms_per_char=args.generation_ms_per_char,
+        audio_ms_per_char=args.audio_ms_per_char,
+    )
+
+    async with server:
+        reports = {
+            "fixed": await run_scenario(server, args, tuner=None),
+            "tuned": await run_scenario(server, args, tuner=ChunkScheduleTuner(path=args.path)),
+        }
+
+    if args.json:
+        print(json.dumps({"config": vars(args), "reports": reports}, indent=2))
+
+        return
+
+    for name, report in reports.items():
+        print(f"\n{name}")
+        for metric in ["fgl_ms", "stall_ms"]:
+            summary = report[metric]
+            print(
+                f"{metric:<10}"
+                + "".join(
+                    f"{column} {summary[column]:>8.1f}  " for column in ["min", "p50", "max"]
+                )
+            )
+        if "tuned" in report:
+            tuned = report["tuned"]
+            print(
+                f"schedule {tuned['chunk_length_schedule']}, "
+                f"flush ≥ {round(tuned['flush_min_chars'])} chars, "
+                f"{tuned['stalled_generations']}/{tuned['generations']} generations stalled"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="chunk_length_schedule autotuning benchmark")
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--text-chars-per-s", type=float, default=60.0, help="llm output rate")
+    parser.add_argument("--first-audio-delay-ms", type=float, default=250.0)
+    parser.add_argument("--generation-ms-per-char", type=float, default=2.0)
+    parser.add_argument("--audio-ms-per-char", type=float, default=60.0)
+    parser.add_argument("--path", default=None, help="persist tuned settings to this json file")
+    parser.add_argument("--json", action="store_true", help="print results as json")
+
+    asyncio.run(main(parser.parse_args()))
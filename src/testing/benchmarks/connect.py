@@ -0,0 +1,125 @@
+from pathlib import Path
+import os
+import sys
+import ssl
+import json
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+
+def add_modules_to_path():
+    # add root directory to sys.path to use modules in src
+    root_dir = Path(__file__).resolve().parents[3]
+
+    if str(root_dir) not in sys.path:
+        sys.path.insert(0, str(root_dir))
+
+
+add_modules_to_path()
+
+from src.Environment import Environment
+
+os.environ.setdefault("ELEVENLABS_API_KEY", "stand-in")  # no real key needed offline
+Environment.load()
+
+from src.voicebox.connector import CONNECT_PHASES, WebsocketConnector, resuming_ssl_context
+from src.testing.standin.StandInServer import StandInServer
+from src.helpers.percentiles import summarize
+
+
+#######   ——————————————————————   #######
+
+"""
+connect time breakdown (dns / tcp / tls / upgrade) against a local wss://
+stand-in server w/ a throwaway self-signed cert (needs the `openssl` cli).
+
+"full": a plain SSLContext, every connect does a full tls handshake
+"resumed": the connector's resuming SSLContext, every connect after the first resumes
+"""
+
+
+def make_certificate(directory: str):
+    cert_path, key_path = f"{directory}/cert.pem", f"{directory}/key.pem"
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "ec", "-pkeyopt", "ec_paramgen_curve:prime256v1",
+            "-nodes", "-days", "1", "-subj", "/CN=localhost",
+            "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1",
+            "-keyout", key_path, "-out", cert_path,
+        ],
+        check=True,
+        capture_output=True,
+    )
+
+    return cert_path, key_path
+
+
+async def run_scenario(url: str, connector: WebsocketConnector, connects: int) -> dict:
+    samples = {phase: [] for phase in CONNECT_PHASES + ["total_ms"]}
+
+    for _ in range(connects):
+        websocket = await connector.connect(url)
+        await websocket.close()
+
+        for phase, ms in websocket.connect_timings.items():
+            samples[phase].append(ms)
+        samples["total_ms"].append(sum(websocket.connect_timings.values()))
+
+    report = {phase: summarize(values) for phase, values in samples.items()}
+    report["stats"] = connector.stats()
+
+    return report
+
+
+def print_report(name: str, report: dict):
+    print(f"\n{name}  {report['stats']}")
+    print(f"{'phase':<12}{'min':>10}{'p50':>10}{'p90':>10}{'max':>10}")
+    for phase in CONNECT_PHASES + ["total_ms"]:
+        summary = report[phase]
+        print(
+            f"{phase:<12}"
+            + "".join(f"{summary[column]:>10.2f}" for column in ["min", "p50", "p90", "max"])
+        )
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as directory:
+        cert_path, key_path = make_certificate(directory)
+
+        server_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        server_context.load_cert_chain(cert_path, key_path)
+        if args.tls12:
+            server_context.maximum_version = ssl.TLSVersion.TLSv1_2
+
+        full_context = ssl.create_default_context(cafile=cert_path)
+
+        async with StandInServer(host="localhost", ssl_context=server_context) as server:
+            url = f"{server.url}/v1/text-to-speech/voice/stream-input"
+
+            reports = {
+                "full": await run_scenario(
+                    url, WebsocketConnector(ssl_context=full_context), args.connects
+                ),
+                "resumed": await run_scenario(
+                    url,
+                    WebsocketConnector(ssl_context=resuming_ssl_context(cafile=cert_path)),
+                    args.connects,
+                ),
+            }
+
+    if args.json:
+        print(json.dumps({"config": vars(args), "reports": reports}, indent=2))
+    else:
+        for name, report in reports.items():
+            print_report(name, report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="websocket connect breakdown over local tls")
+    parser.add_argument("--connects", type=int, default=50)
+    parser.add_argument("--tls12", action="store_true", help="cap the server at tls 1.2")
+    parser.add_argument("--json", action="store_true", help="print results as json")
+
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,168 @@
+from pathlib import Path
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+
+def add_modules_to_path():
+    # add root directory to sys.path to use modules in src
+    root_dir = Path(__file__).resolve().parents[3]
+
+    if str(root_dir) not in sys.path:
+        sys.path.insert(0, str(root_dir))
+
+
+add_modules_to_path()
+
+from src.Environment import Environment
+
+os.environ.setdefault("ELEVENLABS_API_KEY", "stand-in")  # no real key needed offline
+Environment.load()
+
+from src.voicebox.Voicebox import Voicebox
+from src.voicebox.VoiceboxPool import VoiceboxPool
+from src.voicebox.hedging import HedgedConnector
+from src.testing.standin.StandInServer import StandInServer
+from src.helpers.logging import LoggerFactory
+from src.helpers.percentiles import summarize
+
+
+logger = LoggerFactory.get_logger(namespace="latency_benchmark", color="white")
+
+speech_chunks = [
+    "hello",
+    ",",
+    "welcome",
+    "to",
+    "the",
+    "demo",
+    ".",
+    "my",
+    "name",
+    "is",
+    "ben!",
+    "I",
+    "'",
+    "m",
+    "glad",
+    "you",
+    "are",
+    "visiting",
+    ".",
+]
+metrics = ["connect_ms", "fgl_ms", "totelap_ms", "reset_ms"]
+
+
+#######   ——————————————————————   #######
+
+
+async def run_turn(voicebox: Voicebox) -> dict:
+    voicebox.prepare(speech_generation_start_time=time.time())
+
+    await voicebox.wait_ready()
+
+    for speech_chunk in speech_chunks:
+        await voicebox.feed_speech(speech_chunk)
+    await voicebox.feeding_finished()
+
+    await voicebox.wait_complete()
+
+    await voicebox.reset()
+
+    return voicebox.timings()
+
+
+async def run_scenario(
+    server: StandInServer, turns: int, pooled: bool, hedging: HedgedConnector = None
+) -> dict:
+    pool = VoiceboxPool(size=2) if pooled else None
+    voicebox = Voicebox(
+        voice_id="21m00Tcm4TlvDq8ikWAM", base_url=server.url, pool=pool, hedging=hedging
+    )
+
+    if pool is not None:
+        await pool.warm(voicebox)
+
+    samples = {metric: [] for metric in metrics}
+    for _ in range(turns):
+        timings = await run_turn(voicebox)
+
+        for metric in metrics:
+            if metric in timings:
+                samples[metric].append(timings[metric])
+
+        if pool is not None:
+            await asyncio.sleep(0.05)  # let the pool replace the handed-out socket
+
+    if pool is not None:
+        await pool.close()
+
+    if hedging is not None:
+        logger.info(f"hedging: {hedging.stats()}")
+
+    return {metric: summarize(values) for metric, values in samples.items()}
+
+
+def print_report(name: str, report: dict):
+    print(f"\n{name}")
+    print(f"{'metric':<12}{'count':>7}{'min':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}")
+    for metric, summary in report.items():
+        if summary["count"] == 0:
+            continue
+
+        print(
+            f"{metric:<12}{summary['count']:>7}"
+            + "".join(
+                f"{summary[column]:>10.2f}" for column in ["min", "p50", "p90", "p99", "max"]
+            )
+        )
+
+
+async def main(args):
+    server = StandInServer(
+        connect_delay_s=args.connect_delay_ms / 1000,
+        slow_connect_every=args.slow_connect_every,
+        slow_connect_delay_s=args.slow_connect_delay_ms / 1000,
+        first_audio_delay_s=args.first_audio_delay_ms / 1000,
+        chunk_interval_s=args.chunk_interval_ms / 1000,
+    )
+
+    async with server:
+        reports = {"cold": await run_scenario(server, turns=args.turns, pooled=False)}
+        if args.pooled:
+            reports["pooled"] = await run_scenario(server, turns=args.turns, pooled=True)
+        if args.hedged:
+            hedging = HedgedConnector(min_samples=5)
+            reports["hedged"] = await run_scenario(
+                server, turns=args.turns, pooled=False, hedging=hedging
+            )
+
+    if args.json:
+        print(json.dumps({"config": vars(args), "reports": reports}, indent=2))
+    else:
+        for name, report in reports.items():
+            print_report(name, report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Voicebox latency benchmark against a local stand-in server"
+    )
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--connect-delay-ms", type=float, default=150.0)
+    parser.add_argument(
+        "--slow-connect-every", type=int, default=None, help="slow down every n-th handshake"
+    )
+    parser.add_argument("--slow-connect-delay-ms", type=float, default=1000.0)
+    parser.add_argument("--first-audio-delay-ms", type=float, default=100.0)
+    parser.add_argument("--chunk-interval-ms", type=float, default=20.0)
+    parser.add_argument("--pooled", action="store_true", help="also run w/ a VoiceboxPool")
+    parser.add_argument(
+        "--hedged", action="store_true", help="also run w/ a HedgedConnector (no pool)"
+    )
+    parser.add_argument("--json", action="store_true", help="print results as json")
+
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,350 @@
+from pathlib import Path
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import resource
+import subprocess
+
+
+def add_modules_to_path():
+    # add root directory to sys.path to use modules in src
+    root_dir = Path(__file__).resolve().parents[3]
+
+    if str(root_dir) not in sys.path:
+        sys.path.insert(0, str(root_dir))
+
+
+add_modules_to_path()
+
+# per-event debug logs would dominate the cpu being measured
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from src.Environment import Environment
+
+os.environ.setdefault("ELEVENLABS_API_KEY", "stand-in")  # no real key needed offline
+Environment.load()
+
+from src.voicebox.Voicebox import Voicebox, _bytes_per_second_for_output_format
+from src.helpers.metrics import MetricsRegistry
+from src.helpers.percentiles import summarize
+
+
+response_text = (
+    "Sure. Let me check that for you. Your order shipped yesterday from our warehouse "
+    "and should arrive by Thursday afternoon. Anything else?"
+)
+metrics = ["connect_ms", "fgl_ms", "totelap_ms"]
+
+#######   ——————————————————————   #######
+
+"""
+load generation: N concurrent simulated conversations (turns of llm-paced
+text → audio, w/ think time in between) through Voicebox, stepping N up
+through `--sessions` to find where one process saturates.
+
+the stand-in server runs in a subprocess of its own (or pass `--base-url` for
+one already running), so cpu & memory below are the voiceboxes' alone:
+
+- audio_s_per_wall_s: seconds of audio received per second of wall time
+- loop_cpu_pct: event-loop thread cpu / wall time (saturated near 100%)
+- loop_cpu_pct_per_session: the same, per concurrent session
+- loop_lag_ms: how late a 10ms timer fires (queueing on a busy loop)
+- rss_mb_per_session: peak rss above the idle process, per session
+- server_cpu_pct: the stand-in server's cpu (linux, own server only), it's
+  python too, so make sure it isn't the bottleneck
+"""
+
+
+class ResourceMonitor:
+    """
+    samples event-loop lag & rss while a level runs
+    """
+
+    def __init__(self, interval_s: float = 0.01):
+        self.interval_s = interval_s
+
+        self.lags_ms = []
+        self.peak_rss = current_rss_bytes()
+
+        self._task: asyncio.Task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._monitor_routine())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def _monitor_routine(self):
+        samples = 0
+        while True:
+            expected_time = time.monotonic() + self.interval_s
+            await asyncio.sleep(self.interval_s)
+            self.lags_ms.append(max(0.0, (time.monotonic() - expected_time) * 1000))
+
+            samples += 1
+            if samples % 10 == 0:
+                self.peak_rss = max(self.peak_rss, current_rss_bytes())
+
+
+def current_rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        # (no procfs, e.g. macos: peak rss, in bytes there)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def process_cpu_s(pid: int) -> float:
+    """
+    user + system cpu of another process (None w/o procfs)
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            fields = stat.read().rsplit(")", 1)[1].split()  # (after the command name)
+    except OSError:
+        return None
+
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def run_session(session: int, args, level: dict):
+    audio_bytes = 0
+
+    def on_speech(base64_audio: str):
+        nonlocal audio_bytes
+        audio_bytes += len(base64_audio) * 3 // 4 - base64_audio[-2:].count("=")
+
+    voicebox = Voicebox(
+        voice_id="21m00Tcm4TlvDq8ikWAM",
+        on_speech=on_speech,
+        base_url=args.base_url,
+        output_format=args.output_format,
+        metrics=level["metrics"],
+    )
+    words = response_text.split()
+
+    # spread session starts over one think time, not all at once
+    await asyncio.sleep(args.think_ms / 1000 * session / level["sessions"])
+
+    for _ in range(args.turns):
+        try:
+            voicebox.prepare(speech_generation_start_time=time.time())
+            await voicebox.wait_ready(timeout=args.turn_timeout_s)
+
+            for word in words:
+                await voicebox.feed_speech(word)
+                if args.text_chars_per_s > 0:
+                    await asyncio.sleep((len(word) + 1) / args.text_chars_per_s)
+            await voicebox.feeding_finished()
+
+            await voicebox.wait_complete(timeout=args.turn_timeout_s)
+
+            timings = voicebox.timings()
+            for metric in metrics:
+                level["samples"][metric].append(timings[metric])
+            level["turns"] += 1
+        except Exception as e:
+            level["failed_turns"] += 1
+            level["errors"].add(f"{type(e).__name__}: {e}")
+            voicebox.interrupt()
+        else:
+            await voicebox.reset()
+
+        await asyncio.sleep(args.think_ms / 1000)
+
+    level["audio_bytes"] += audio_bytes
+
+
+async def run_level(sessions: int, args, idle_rss: int, server_pid: int = None) -> dict:
+    level = {
+        "sessions": sessions,
+        "metrics": MetricsRegistry(),  # (a fresh one per level, the global one only grows)
+        "samples": {metric: [] for metric in metrics},
+        "turns": 0,
+        "failed_turns": 0,
+        "errors": set(),
+        "audio_bytes": 0,
+    }
+
+    monitor = ResourceMonitor()
+    monitor.start()
+    start_time = time.monotonic()
+    loop_cpu_start_s = time.thread_time()  # (this thread runs the event loop)
+    process_cpu_start_s = time.process_time()
+    server_cpu_start_s = process_cpu_s(server_pid) if server_pid is not None else None
+
+    await asyncio.gather(*(run_session(session, args, level) for session in range(sessions)))
+
+    wall_s = time.monotonic() - start_time
+    loop_cpu_s = time.thread_time() - loop_cpu_start_s
+    own_cpu_s = time.process_time() - process_cpu_start_s
+    server_cpu_s = (
+        process_cpu_s(server_pid) - server_cpu_start_s if server_cpu_start_s is not None else None
+    )
+    await monitor.stop()
+
+    bytes_per_second = _bytes_per_second_for_output_format(args.output_format)
+    audio_s = level["audio_bytes"] / bytes_per_second if bytes_per_second else None
+
+    return {
+        "sessions": sessions,
+        "turns": level["turns"],
+        "failed_turns": level["failed_turns"],
+        "errors": sorted(level["errors"])[:5],
+        "wall_s": wall_s,
+        **{metric: summarize(values) for metric, values in level["samples"].items()},
+        "audio_s_per_wall_s": audio_s / wall_s if audio_s is not None else None,
+        "loop_cpu_pct": 100 * loop_cpu_s / wall_s,
+        "loop_cpu_pct_per_session": 100 * loop_cpu_s / wall_s / sessions,
+        "process_cpu_pct": 100 * own_cpu_s / wall_s,
+        "server_cpu_pct": 100 * server_cpu_s / wall_s if server_cpu_s is not None else None,
+        "loop_lag_ms": summarize(monitor.lags_ms),
+        "rss_mb": monitor.peak_rss / 2**20,
+        "rss_mb_per_session": max(0, monitor.peak_rss - idle_rss) / 2**20 / sessions,
+    }
+
+
+########################
+# stand-in server
+########################
+
+
+def start_stand_in_server(args) -> subprocess.Popen:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "src.testing.standin.StandInServer",
+            "--port",
+            str(port),
+            "--first-audio-delay-ms",
+            str(args.first_audio_delay_ms),
+            "--generation-ms-per-char",
+            str(args.generation_ms_per_char),
+            "--chunk-interval-ms",
+            str(args.chunk_interval_ms),
+        ],
+        cwd=Path(__file__).resolve().parents[3],
+    )
+    args.base_url = f"ws://127.0.0.1:{port}"
+
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+
+            return process
+        except OSError:
+            time.sleep(0.05)
+
+    process.terminate()
+    raise RuntimeError("stand-in server didn't start")
+
+
+def print_report(report: dict):
+    columns = [
+        ("sessions", "{:>8}"),
+        ("turns", "{:>7}"),
+        ("failed", "{:>7}"),
+        ("connect p50/p99", "{:>16}"),
+        ("fgl p50/p99", "{:>14}"),
+        ("totelap p50/p99", "{:>16}"),
+        ("audio s/s", "{:>10}"),
+        ("loop cpu%", "{:>10}"),
+        ("cpu%/sess", "{:>10}"),
+        ("lag p99", "{:>8}"),
+        ("rss MB", "{:>8}"),
+        ("MB/sess", "{:>8}"),
+        ("server cpu%", "{:>12}"),
+    ]
+    print("".join(template.format(name) for name, template in columns))
+
+    def _pair(summary: dict) -> str:
+        if not summary.get("count"):
+            return "-"
+
+        return f"{summary['p50']:.0f}/{summary['p99']:.0f}"
+
+    for level in report["levels"]:
+        values = [
+            level["sessions"],
+            level["turns"],
+            level["failed_turns"],
+            _pair(level["connect_ms"]),
+            _pair(level["fgl_ms"]),
+            _pair(level["totelap_ms"]),
+            f"{level['audio_s_per_wall_s']:.1f}" if level["audio_s_per_wall_s"] else "-",
+            f"{level['loop_cpu_pct']:.1f}",
+            f"{level['loop_cpu_pct_per_session']:.2f}",
+            f"{level['loop_lag_ms'].get('p99', 0):.1f}",
+            f"{level['rss_mb']:.1f}",
+            f"{level['rss_mb_per_session']:.2f}",
+            f"{level['server_cpu_pct']:.1f}" if level["server_cpu_pct"] is not None else "-",
+        ]
+        print("".join(template.format(value) for (_, template), value in zip(columns, values)))
+
+        for error in level["errors"]:
+            print(f"    {error}")
+
+
+async def main(args):
+    server_process = start_stand_in_server(args) if args.base_url is None else None
+
+    try:
+        idle_rss = current_rss_bytes()
+        levels = []
+        for sessions in args.sessions:
+            levels.append(
+                await run_level(
+                    sessions,
+                    args,
+                    idle_rss=idle_rss,
+                    server_pid=server_process.pid if server_process is not None else None,
+                )
+            )
+    finally:
+        if server_process is not None:
+            server_process.terminate()
+            server_process.wait()
+
+    report = {"idle_rss_mb": idle_rss / 2**20, "levels": levels}
+
+    if args.json:
+        print(json.dumps({"config": vars(args), "report": report}, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="concurrent voicebox load generation")
+    parser.add_argument(
+        "--sessions",
+        type=lambda value: [int(n) for n in value.split(",")],
+        default=[1, 10, 25, 50, 100],
+        help="concurrent sessions per step, e.g. 1,10,50",
+    )
+    parser.add_argument("--turns", type=int, default=5, help="turns per session per step")
+    parser.add_argument("--think-ms", type=float, default=500.0, help="pause between turns")
+    parser.add_argument("--text-chars-per-s", type=float, default=200.0, help="0 = all at once")
+    parser.add_argument("--output-format", default="pcm_16000")
+    parser.add_argument("--turn-timeout-s", type=float, default=30.0)
+    parser.add_argument("--base-url", default=None, help="a running stand-in server")
+    parser.add_argument("--first-audio-delay-ms", type=float, default=150.0, help="(own server)")
+    parser.add_argument("--generation-ms-per-char", type=float, default=0.0, help="(own server)")
+    parser.add_argument("--chunk-interval-ms", type=float, default=20.0, help="(own server)")
+    parser.add_argument("--json", action="store_true", help="print results as json")
+
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,110 @@
+from pathlib import Path
+import os
+import sys
+import json
+import base64
+import timeit
+import argparse
+
+
+def add_modules_to_path():
+    # add root directory to sys.path to use modules in src
+    root_dir = Path(__file__).resolve().parents[3]
+
+    if str(root_dir) not in sys.path:
+        sys.path.insert(0, str(root_dir))
+
+
+add_modules_to_path()
+
+from src.Environment import Environment
+
+os.environ.setdefault("ELEVENLABS_API_KEY", "stand-in")  # no real key needed offline
+Environment.load()
+
+from src.voicebox import Voicebox as voicebox_module
+from src.voicebox.Voicebox import Voicebox
+from src.helpers import fastjson
+
+
+#######   ——————————————————————   #######
+
+"""
+per-frame send & receive cost, before (dict + stdlib json) vs after
+(precompiled payload templates + audio fast path)
+"""
+
+
+def legacy_speech_chunk_payload(text: str) -> str:
+    # what _ws_payload used to do for every chunk
+    fields = {"text": text + " ", "try_trigger_generation": True}
+
+    return json.dumps(
+        {
+            **fields,
+            "xi_api_key": voicebox_module.elevenlabs_api_key,
+        }
+    )
+
+
+def legacy_parse_audio_message(message: str):
+    data = json.loads(message)
+
+    return data.get("audio", None), data.get("isFinal", False)
+
+
+def time_per_call_ns(fn, number: int) -> float:
+    best_s = min(timeit.repeat(fn, number=number, repeat=5))
+
+    return best_s / number * 1e9
+
+
+def main(args):
+    voicebox = Voicebox(voice_id="21m00Tcm4TlvDq8ikWAM")
+
+    # ~100ms of 44.1kHz pcm per frame, w/ an alignment block like ElevenLabs sends
+    audio = base64.b64encode(bytes(args.audio_bytes)).decode()
+    message = json.dumps(
+        {
+            "audio": audio,
+            "isFinal": None,
+            "normalizedAlignment": {
+                "chars": list("hello welcome to the demo "),
+                "charStartTimesMs": list(range(0, 26 * 60, 60)),
+                "charDurationsMs": [60] * 26,
+            },
+        }
+    )
+
+    results = {
+        "send (legacy dict + json.dumps)": time_per_call_ns(
+            lambda: legacy_speech_chunk_payload("welcome"), number=args.number
+        ),
+        "send (payload template)": time_per_call_ns(
+            lambda: voicebox._speech_chunk_payload("welcome"), number=args.number
+        ),
+        "receive (legacy json.loads)": time_per_call_ns(
+            lambda: legacy_parse_audio_message(message), number=args.number
+        ),
+        "receive (audio fast path)": time_per_call_ns(
+            lambda: fastjson.parse_audio_message(message), number=args.number
+        ),
+    }
+
+    backend = "orjson" if fastjson.orjson is not None else "stdlib json"
+    print(f"json backend: {backend}, audio message: {len(message)} chars\n")
+    for name, ns in results.items():
+        print(f"{name:<36}{ns:>10.0f} ns/frame")
+
+    # same payload on the wire, just cheaper to produce
+    assert json.loads(voicebox._speech_chunk_payload("welcome")) == json.loads(
+        legacy_speech_chunk_payload("welcome")
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="per-frame payload encode/parse cost")
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--audio-bytes", type=int, default=8820)
+
+    main(parser.parse_args())
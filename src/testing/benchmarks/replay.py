@@ -0,0 +1,196 @@
+from pathlib import Path
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from typing import List
+
+
+def add_modules_to_path():
+    # add root directory to sys.path to use modules in src
+    root_dir = Path(__file__).resolve().parents[3]
+
+    if str(root_dir) not in sys.path:
+        sys.path.insert(0, str(root_dir))
+
+
+add_modules_to_path()
+
+from src.Environment import Environment
+
+os.environ.setdefault("ELEVENLABS_API_KEY", "stand-in")  # no real key needed offline
+Environment.load()
+
+from src.helpers import fastjson
+from src.voicebox.Voicebox import Voicebox
+from src.voicebox.trace import (
+    TRACE_RECV,
+    TRACE_SEND,
+    SessionTraceRecorder,
+    TraceEvent,
+    read_trace,
+    trace_connections,
+)
+from src.testing.standin.StandInServer import StandInServer
+from src.testing.standin.TraceReplayServer import TraceReplayServer
+from src.helpers.percentiles import summarize
+
+
+response_text = (
+    "Sure. Let me check that for you. Your order shipped yesterday from our warehouse "
+    "and should arrive by Thursday afternoon. Anything else?"
+)
+metrics = ["connect_ms", "fgl_ms", "totelap_ms"]
+
+#######   ——————————————————————   #######
+
+"""
+session trace replay, for comparing a change against recorded traffic:
+
+--record PATH: runs turns against a stand-in server (text fed word by word at
+  `--text-chars-per-s`) w/ a SessionTraceRecorder, as a sample trace
+--trace PATH: replays a trace w/ a TraceReplayServer at `--speed`, feeding each
+  connection's text at its recorded pace, & compares fgl against the recording
+"""
+
+
+def recorded_feed(connection: List[TraceEvent]) -> list:
+    """
+    [(seconds after BOS, text or None for EOS)] the client sent on a connection
+    """
+    sends = [event for event in connection if event.kind == TRACE_SEND]
+    if not sends:
+        return []
+
+    bos_time_s, feed = sends[0].time_s, []
+    for event in sends[1:]:
+        text = fastjson.loads(event.payload).get("text")
+        if text == "":
+            feed.append((event.time_s - bos_time_s, None))
+        elif text:
+            feed.append((event.time_s - bos_time_s, text[:-1] if text.endswith(" ") else text))
+
+    return feed
+
+
+def recorded_fgl_ms(connection: List[TraceEvent]) -> float:
+    """
+    first text sent → first audio received, as recorded
+    """
+    sends = [event for event in connection if event.kind == TRACE_SEND]
+    first_audio = next(
+        (
+            event
+            for event in connection
+            if event.kind == TRACE_RECV and fastjson.parse_audio_message(event.payload)[0]
+        ),
+        None,
+    )
+    if len(sends) < 2 or first_audio is None:
+        return None
+
+    return (first_audio.time_s - sends[1].time_s) * 1000
+
+
+async def run_turn(voicebox: Voicebox, feed: list, speed: float) -> dict:
+    voicebox.prepare(speech_generation_start_time=time.time())
+    await voicebox.wait_ready()
+    ready_time = time.monotonic()
+
+    for offset_s, text in feed:
+        delay_s = ready_time + offset_s / speed - time.monotonic()
+        if delay_s > 0:
+            await asyncio.sleep(delay_s)
+
+        if text is None:
+            break
+
+        await voicebox.feed_speech(text)
+    await voicebox.feeding_finished()
+
+    await voicebox.wait_complete()
+    await voicebox.reset()
+
+    return voicebox.timings()
+
+
+async def record(args):
+    server = StandInServer(
+        first_audio_delay_s=args.first_audio_delay_ms / 1000,
+        generation_ms_per_char=args.generation_ms_per_char,
+    )
+    words = response_text.split()
+    feed = [
+        (sum(len(word) + 1 for word in words[: i + 1]) / args.text_chars_per_s, word)
+        for i, word in enumerate(words)
+    ]
+
+    with SessionTraceRecorder(args.record) as recorder:
+        async with server:
+            voicebox = Voicebox(
+                voice_id="21m00Tcm4TlvDq8ikWAM", base_url=server.url, recorder=recorder
+            )
+            for _ in range(args.turns):
+                await run_turn(voicebox, feed=feed, speed=1.0)
+
+        stats = recorder.stats()
+
+    print(f"recorded {stats['connections']} connections, {stats['events']} events")
+    print(f"{stats['payload_bytes']} payload bytes → {os.path.getsize(args.record)} bytes on disk")
+
+
+async def replay(args):
+    events = read_trace(args.trace)
+    connections = [connection for connection in trace_connections(events) if connection]
+    recorded = [recorded_fgl_ms(connection) for connection in connections]
+    samples = {metric: [] for metric in metrics}
+
+    async with TraceReplayServer(events, speed=args.speed) as server:
+        # recorded sends were coalesced already, coalescing them again would only add delay
+        voicebox = Voicebox(
+            voice_id="21m00Tcm4TlvDq8ikWAM", base_url=server.url, text_coalescing=None
+        )
+        for connection in connections:
+            timings = await run_turn(voicebox, feed=recorded_feed(connection), speed=args.speed)
+            for metric in metrics:
+                samples[metric].append(timings[metric])
+
+        server_stats = server.stats()
+
+    report = {
+        "recorded": {"fgl_ms": summarize([ms / args.speed for ms in recorded if ms is not None])},
+        "replayed": {metric: summarize(values) for metric, values in samples.items()},
+        "server": server_stats,
+    }
+
+    if args.json:
+        print(json.dumps({"config": vars(args), "report": report}, indent=2))
+
+        return
+
+    print(f"{len(connections)} connections replayed at x{args.speed}  {server_stats}")
+    print(f"{'':<22}{'min':>10}{'p50':>10}{'p90':>10}{'max':>10}")
+    for name, summaries in [("recorded", report["recorded"]), ("replayed", report["replayed"])]:
+        for metric, summary in summaries.items():
+            print(
+                f"{name + ' ' + metric:<22}"
+                + "".join(f"{summary[column]:>10.1f}" for column in ["min", "p50", "p90", "max"])
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="session trace record & replay benchmark")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--record", help="record a sample trace against a stand-in server")
+    mode.add_argument("--trace", help="replay this trace")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed (2.0 = 2x)")
+    parser.add_argument("--turns", type=int, default=10, help="(--record)")
+    parser.add_argument("--text-chars-per-s", type=float, default=60.0, help="(--record)")
+    parser.add_argument("--first-audio-delay-ms", type=float, default=250.0, help="(--record)")
+    parser.add_argument("--generation-ms-per-char", type=float, default=2.0, help="(--record)")
+    parser.add_argument("--json", action="store_true", help="print results as json")
+
+    args = parser.parse_args()
+    asyncio.run(record(args) if args.record else replay(args))
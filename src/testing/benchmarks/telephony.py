@@ -0,0 +1,98 @@
+from pathlib import Path
+import sys
+import timeit
+import argparse
+import warnings
+
+
+def add_modules_to_path():
+    # add root directory to sys.path to use modules in src
+    root_dir = Path(__file__).resolve().parents[3]
+
+    if str(root_dir) not in sys.path:
+        sys.path.insert(0, str(root_dir))
+
+
+add_modules_to_path()
+
+import numpy as np
+
+from src.audio.telephony import StreamingResampler, TelephonyOutput, alaw_encode, ulaw_encode
+
+try:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        import audioop  # stdlib until 3.13, used as a baseline when present
+except ImportError:
+    audioop = None
+
+
+#######   ——————————————————————   #######
+
+"""
+throughput of the telephony output stage, in input samples per second
+(& as a multiple of real time, i.e. how many live streams one core keeps up with)
+"""
+
+
+def samples_per_second(fn, num_samples: int, number: int) -> float:
+    best_s = min(timeit.repeat(fn, number=number, repeat=5))
+
+    return num_samples * number / best_s
+
+
+def main(args):
+    rng = np.random.default_rng(0)
+    chunk_samples = args.input_rate * args.chunk_ms // 1000
+    pcm16 = (rng.standard_normal(chunk_samples) * 3000).astype("<i2")
+    pcm = pcm16.tobytes()
+
+    resampler = StreamingResampler(input_rate=args.input_rate, output_rate=args.output_rate)
+    ulaw_output = TelephonyOutput(
+        on_audio=lambda encoded: None,
+        input_rate=args.input_rate,
+        output_rate=args.output_rate,
+        encoding="ulaw",
+    )
+
+    results = {
+        f"resample {args.input_rate} → {args.output_rate}": samples_per_second(
+            lambda: resampler.process_pcm16(pcm), chunk_samples, args.number
+        ),
+        "μ-law encode": samples_per_second(lambda: ulaw_encode(pcm16), chunk_samples, args.number),
+        "A-law encode": samples_per_second(lambda: alaw_encode(pcm16), chunk_samples, args.number),
+        "full stage (resample + μ-law)": samples_per_second(
+            lambda: ulaw_output.write(pcm), chunk_samples, args.number
+        ),
+    }
+
+    if audioop is not None:
+        state = [None]
+
+        def audioop_baseline():
+            converted, state[0] = audioop.ratecv(
+                pcm, 2, 1, args.input_rate, args.output_rate, state[0]
+            )
+            audioop.lin2ulaw(converted, 2)
+
+        results["baseline: audioop ratecv + lin2ulaw (no filter)"] = samples_per_second(
+            audioop_baseline, chunk_samples, args.number
+        )
+
+    print(
+        f"{args.chunk_ms}ms chunks ({chunk_samples} samples), "
+        f"{resampler.taps_per_phase} taps per output sample\n"
+    )
+    for name, rate in results.items():
+        realtime = rate / args.input_rate
+        print(f"{name:<50}{rate / 1e6:>8.2f} M samples/s{realtime:>10.0f}x real time")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="telephony output stage throughput")
+    parser.add_argument("--input-rate", type=int, default=44100)
+    parser.add_argument("--output-rate", type=int, default=8000)
+    parser.add_argument("--chunk-ms", type=int, default=100)
+    parser.add_argument("--number", type=int, default=200)
+
+    main(parser.parse_args())
@@ -0,0 +1,498 @@
+import ssl
+import json
+import math
+import base64
+import asyncio
+import argparse
+import websockets
+import numpy as np
+from array import array
+from typing import Dict
+from urllib.parse import urlparse, parse_qs
+
+from src.helpers.logging import LoggerFactory
+from src.audio.telephony import ulaw_encode
+
+logger = LoggerFactory.get_logger(namespace="stand_in_server", color="yellow")
+
+DEFAULT_CHUNK_LENGTH_SCHEDULE = [120, 160, 250, 290]  # ElevenLabs' default
+
+"""
+sentinel queued to a session's generation queue once EOS is received
+"""
+_EOS = object()
+
+
+class StandInServer:
+    """
+    a local stand-in for ElevenLabs' `stream-input` websocket endpoint.
+
+    speaks the same protocol Voicebox produces (BOS, text chunks w/
+    try_trigger_generation, flush, EOS) & answers w/ base64 `audio` frames
+    followed by `isFinal`. `multi-stream-input` paths get the multi-context
+    protocol instead (messages keyed by `context_id`, `close_context`,
+    `close_socket`), where frames carry a `contextId`. audio is a deterministic sine tone whose length
+    is proportional to the generated text, so runs are reproducible: 16-bit
+    pcm, or 8-bit μ-law for `ulaw_*` output formats. each
+    audio frame carries an `alignment` block w/ the characters it voices, if
+    the url asks for it (`sync_alignment=true`).
+
+    latency injection:
+    - connect_delay_s: delay before the websocket handshake is accepted
+    - slow_connect_every / slow_connect_delay_s: every n-th handshake is
+      delayed by slow_connect_delay_s instead (a deterministic slow tail)
+    - first_audio_delay_s: delay between a generation being triggered & its
+      first audio frame
+    - generation_ms_per_char: added to that delay per character of the
+      generation (a synthetic latency model: longer chunks take longer)
+    - chunk_interval_s: cadence between consecutive audio frames
+    - disconnect_after_frames: abort the connection (no close frame) after
+      this many audio frames have been sent
+    - max_disconnects: stop injecting disconnects after this many (server-wide)
+
+    pass an `ssl_context` (server side, w/ a cert loaded) to serve wss://.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        *,
+        connect_delay_s: float = 0.0,
+        slow_connect_every: int = None,
+        slow_connect_delay_s: float = 0.0,
+        first_audio_delay_s: float = 0.0,
+        generation_ms_per_char: float = 0.0,
+        chunk_interval_s: float = 0.0,
+        disconnect_after_frames: int = None,
+        max_disconnects: int = None,
+        audio_ms_per_char: float = 60.0,
+        frame_ms: float = 100.0,
+        ssl_context: ssl.SSLContext = None,
+    ):
+        self.host = host
+        self.port = port
+        self.ssl_context = ssl_context
+        self.connect_delay_s = connect_delay_s
+        self.slow_connect_every = slow_connect_every
+        self.slow_connect_delay_s = slow_connect_delay_s
+        self.first_audio_delay_s = first_audio_delay_s
+        self.generation_ms_per_char = generation_ms_per_char
+        self.chunk_interval_s = chunk_interval_s
+        self.disconnect_after_frames = disconnect_after_frames
+        self.max_disconnects = max_disconnects
+        self.audio_ms_per_char = audio_ms_per_char
+        self.frame_ms = frame_ms
+
+        # internal
+        self._server = None
+        self._tones = {}  # (sample_rate, encoding) → 1s of audio
+
+        ## stats
+        self.handshakes = 0
+        self.connections = 0
+        self.messages_received = 0
+        self.frames_sent = 0
+        self.disconnects_injected = 0
+
+    """
+    api
+    """
+
+    async def start(self):
+        self._server = await websockets.serve(
+            self._handle_connection,
+            self.host,
+            self.port,
+            process_request=self._process_request,
+            ssl=self.ssl_context,
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+        logger.debug(f"● stand-in server listening on {self.url}")
+
+        return self
+
+    async def stop(self):
+        if self._server is None:
+            return
+
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        """
+        base url to hand to Voicebox(base_url=...)
+        """
+        scheme = "wss" if self.ssl_context is not None else "ws"
+
+        return f"{scheme}://{self.host}:{self.port}"
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    ########################
+    # connection handling
+    ########################
+
+    async def _process_request(self, path, request_headers):
+        self.handshakes += 1
+
+        connect_delay_s = self.connect_delay_s
+        if self.slow_connect_every and self.handshakes % self.slow_connect_every == 0:
+            connect_delay_s = self.slow_connect_delay_s
+
+        if connect_delay_s > 0:
+            await asyncio.sleep(connect_delay_s)
+
+        return None  # continue w/ the websocket handshake
+
+    async def _handle_connection(self, websocket):
+        self.connections += 1
+
+        query = parse_qs(urlparse(websocket.path).query)
+        output_format = query.get("output_format", ["pcm_44100"])[0]
+        sample_rate = _sample_rate_for_output_format(output_format)
+        encoding = _encoding_for_output_format(output_format)
+        sync_alignment = query.get("sync_alignment", ["false"])[0] == "true"
+
+        if "/multi-stream-input" in websocket.path:
+            await self._handle_multi_context_connection(
+                websocket,
+                sample_rate=sample_rate,
+                encoding=encoding,
+                sync_alignment=sync_alignment,
+            )
+
+            return
+
+        session = _Session(
+            server=self,
+            websocket=websocket,
+            sample_rate=sample_rate,
+            encoding=encoding,
+            sync_alignment=sync_alignment,
+        )
+        generation_task = asyncio.create_task(session.generation_routine())
+
+        try:
+            async for message in websocket:
+                self.messages_received += 1
+
+                if session.receive(json.loads(message)):
+                    break  # EOS received
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            if not session.eos_received:
+                generation_task.cancel()
+
+        try:
+            await generation_task
+        except (asyncio.CancelledError, websockets.exceptions.ConnectionClosed):
+            pass
+
+    async def _handle_multi_context_connection(
+        self,
+        websocket,
+        sample_rate: int,
+        encoding: str = "pcm",
+        sync_alignment: bool = False,
+    ):
+        contexts: Dict[str, _Session] = {}
+        generation_tasks: Dict[str, asyncio.Task] = {}
+
+        try:
+            async for message in websocket:
+                self.messages_received += 1
+                data = json.loads(message)
+
+                if data.get("close_socket"):
+                    break
+
+                context_id = data.get("context_id", "")
+                session = contexts.get(context_id)
+                if session is None:  # the first message initializes the context
+                    session = _Session(
+                        server=self,
+                        websocket=websocket,
+                        sample_rate=sample_rate,
+                        encoding=encoding,
+                        context_id=context_id,
+                        sync_alignment=sync_alignment,
+                    )
+                    contexts[context_id] = session
+                    generation_tasks[context_id] = asyncio.create_task(
+                        session.generation_routine()
+                    )
+
+                if data.get("close_context"):
+                    session.receive(data)  # (may carry text or flush)
+                    session.close_context()
+                    del contexts[context_id]
+                else:
+                    session.receive(data)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            for session in contexts.values():  # never closed, nothing to finish
+                generation_tasks[session.context_id].cancel()
+
+        await asyncio.gather(*generation_tasks.values(), return_exceptions=True)
+        await websocket.close()
+
+    ########################
+    # audio
+    ########################
+
+    def _synthesize(self, text: str, sample_rate: int, encoding: str = "pcm") -> bytes:
+        """
+        mono 16-bit pcm (or 8-bit μ-law), `audio_ms_per_char` of tone per character
+        """
+        if (sample_rate, encoding) not in self._tones:
+            tone = array(
+                "h",
+                (
+                    int(8000 * math.sin(2 * math.pi * 220 * i / sample_rate))
+                    for i in range(sample_rate)
+                ),
+            )
+            if encoding == "ulaw":
+                self._tones[(sample_rate, encoding)] = ulaw_encode(np.frombuffer(tone, np.int16))
+            else:
+                self._tones[(sample_rate, encoding)] = tone.tobytes()
+
+        tone = self._tones[(sample_rate, encoding)]
+        num_bytes = _sample_width(encoding) * round(
+            len(text) * self.audio_ms_per_char * sample_rate / 1000
+        )
+
+        repeats = num_bytes // len(tone) + 1
+        return (tone * repeats)[:num_bytes]
+
+
+class _Session:
+    """
+    one generation stream: a whole connection, or one context of a multi-context one
+    """
+
+    def __init__(
+        self,
+        server: StandInServer,
+        websocket,
+        sample_rate: int,
+        encoding: str = "pcm",
+        context_id: str = None,
+        sync_alignment: bool = False,
+    ):
+        self.server = server
+        self.websocket = websocket
+        self.sample_rate = sample_rate
+        self.encoding = encoding
+        self.context_id = context_id
+        self.sync_alignment = sync_alignment
+
+        self.chunk_length_schedule = DEFAULT_CHUNK_LENGTH_SCHEDULE
+        self.bos_received = False
+        self.eos_received = False
+
+        self._text_buffer = ""
+        self._generations_triggered = 0
+        self._generation_queue = asyncio.Queue()
+
+    # receiving
+
+    def receive(self, data: dict) -> bool:
+        """
+        returns True once EOS has been received
+        """
+        text = data.get("text", "")
+
+        if not self.bos_received:
+            generation_config = data.get("generation_config") or {}
+            self.chunk_length_schedule = generation_config.get(
+                "chunk_length_schedule", DEFAULT_CHUNK_LENGTH_SCHEDULE
+            )
+            self.bos_received = True
+
+            return False
+
+        if text == "" and self.context_id is None:  # EOS
+            self.close_context()
+
+            return True
+
+        self._text_buffer += text
+
+        # (contexts always generate on schedule, there's no try_trigger_generation)
+        if data.get("flush"):
+            self._trigger_generation()
+        elif data.get("try_trigger_generation") or self.context_id is not None:
+            if len(self._text_buffer) >= self._current_chunk_length():
+                self._trigger_generation()
+
+        return False
+
+    def close_context(self):
+        """
+        EOS, or close_context: generate what's buffered, then isFinal
+        """
+        self._trigger_generation()
+        self._generation_queue.put_nowait(_EOS)
+        self.eos_received = True
+
+    def _current_chunk_length(self) -> int:
+        index = min(self._generations_triggered, len(self.chunk_length_schedule) - 1)
+
+        return self.chunk_length_schedule[index]
+
+    def _trigger_generation(self):
+        if not self._text_buffer.strip():
+            return
+
+        self._generation_queue.put_nowait(self._text_buffer)
+        self._text_buffer = ""
+        self._generations_triggered += 1
+
+    # generating
+
+    async def generation_routine(self):
+        server = self.server
+        sample_width = _sample_width(self.encoding)
+        bytes_per_ms = sample_width * self.sample_rate / 1000
+        frame_bytes = sample_width * round(self.sample_rate * server.frame_ms / 1000)
+        frames_sent = 0
+
+        while True:
+            text = await self._generation_queue.get()
+            if text is _EOS:
+                await self.websocket.send(self._message({"audio": None, "isFinal": True}))
+                if self.context_id is None:
+                    await self.websocket.close()  # (closing a context keeps the socket open)
+
+                return
+
+            generation_delay_s = (
+                server.first_audio_delay_s + len(text) * server.generation_ms_per_char / 1000
+            )
+            if generation_delay_s > 0:
+                await asyncio.sleep(generation_delay_s)
+
+            audio = server._synthesize(
+                text=text, sample_rate=self.sample_rate, encoding=self.encoding
+            )
+            for offset in range(0, len(audio), frame_bytes):
+                if frames_sent > 0 and server.chunk_interval_s > 0:
+                    await asyncio.sleep(server.chunk_interval_s)
+
+                frame = base64.b64encode(audio[offset : offset + frame_bytes]).decode()
+                fields = {"audio": frame, "isFinal": False}
+                if self.sync_alignment:
+                    fields["alignment"] = self._alignment(
+                        text=text,
+                        start_ms=offset / bytes_per_ms,
+                        end_ms=(offset + frame_bytes) / bytes_per_ms,
+                    )
+                await self.websocket.send(self._message(fields))
+                frames_sent += 1
+                server.frames_sent += 1
+
+                if (
+                    server.disconnect_after_frames is not None
+                    and frames_sent >= server.disconnect_after_frames
+                    and (
+                        server.max_disconnects is None
+                        or server.disconnects_injected < server.max_disconnects
+                    )
+                ):
+                    server.disconnects_injected += 1
+                    self.websocket.transport.abort()  # drop w/o a close frame
+
+                    return
+
+
+    def _message(self, fields: dict) -> str:
+        if self.context_id is not None:
+            fields["contextId"] = self.context_id
+
+        return json.dumps(fields)
+
+    def _alignment(self, text: str, start_ms: float, end_ms: float) -> dict:
+        """
+        the characters whose audio starts within [start_ms, end_ms)
+        """
+        ms_per_char = self.server.audio_ms_per_char
+        first = min(len(text), math.ceil(start_ms / ms_per_char))
+        last = min(len(text), math.ceil(end_ms / ms_per_char))
+
+        return {
+            "chars": list(text[first:last]),
+            "charStartTimesMs": [round(i * ms_per_char) for i in range(first, last)],
+            "charDurationsMs": [round(ms_per_char)] * (last - first),
+        }
+
+
+########################
+# helpers
+########################
+
+
+def _sample_rate_for_output_format(output_format: str) -> int:
+    # e.g. pcm_44100, mp3_44100_128, ulaw_8000
+    try:
+        return int(output_format.split("_")[1])
+    except (IndexError, ValueError):
+        return 44100
+
+
+def _encoding_for_output_format(output_format: str) -> str:
+    # only μ-law is encoded, everything else (incl. mp3) is served as pcm
+    return "ulaw" if output_format.startswith("ulaw") else "pcm"
+
+
+def _sample_width(encoding: str) -> int:
+    return 1 if encoding == "ulaw" else 2
+
+
+########################
+# cli
+########################
+
+
+async def _serve_forever(args):
+    server = StandInServer(
+        host=args.host,
+        port=args.port,
+        connect_delay_s=args.connect_delay_ms / 1000,
+        slow_connect_every=args.slow_connect_every,
+        slow_connect_delay_s=args.slow_connect_delay_ms / 1000,
+        first_audio_delay_s=args.first_audio_delay_ms / 1000,
+        generation_ms_per_char=args.generation_ms_per_char,
+        chunk_interval_s=args.chunk_interval_ms / 1000,
+        disconnect_after_frames=args.disconnect_after_frames,
+        max_disconnects=args.max_disconnects,
+    )
+
+    async with server:
+        await asyncio.Future()  # run until interrupted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="local ElevenLabs stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--connect-delay-ms", type=float, default=0.0)
+    parser.add_argument("--slow-connect-every", type=int, default=None)
+    parser.add_argument("--slow-connect-delay-ms", type=float, default=0.0)
+    parser.add_argument("--first-audio-delay-ms", type=float, default=0.0)
+    parser.add_argument("--generation-ms-per-char", type=float, default=0.0)
+    parser.add_argument("--chunk-interval-ms", type=float, default=0.0)
+    parser.add_argument("--disconnect-after-frames", type=int, default=None)
+    parser.add_argument("--max-disconnects", type=int, default=None)
+
+    asyncio.run(_serve_forever(parser.parse_args()))
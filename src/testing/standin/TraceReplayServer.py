@@ -0,0 +1,295 @@
+import time
+import asyncio
+import argparse
+import websockets
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+from src.helpers import fastjson
+from src.helpers.logging import LoggerFactory
+from src.voicebox.trace import (
+    TRACE_CLOSE,
+    TRACE_OPEN,
+    TRACE_RECV,
+    TRACE_SEND,
+    TraceEvent,
+    read_trace,
+    trace_connections,
+)
+
+logger = LoggerFactory.get_logger(namespace="trace_replay_server", color="yellow")
+
+
+class TraceReplayServer:
+    """
+    serves a recorded session trace (SessionTraceRecorder) back to a client,
+    so a slow production turn can be reproduced & changes benchmarked against
+    real traffic shapes.
+
+    the n-th connection accepted replays the trace's n-th connection (cycling
+    through them). every received frame is sent back timed off the client
+    message it followed in the trace: once the client has sent as much text
+    as had been sent by then (chars, so text coalesced into fewer or more
+    messages still lines up), after the recorded gap (/ `speed`), & never
+    closer to the previous frame than recorded. so server-side latency is
+    replayed as it was, while anything the client does faster (or slower)
+    shows up as such. EOS (or a close) from the client counts for all the
+    text it would still have sent.
+
+    - speed: 1.0 replays in real time, 2.0 twice as fast, ...
+    - replay_connect: also delay each handshake by the recorded connect time
+    """
+
+    def __init__(
+        self,
+        trace: Union[str, Path, List[TraceEvent]],  # a trace file, or its events
+        host: str = "127.0.0.1",
+        port: int = 0,
+        *,
+        speed: float = 1.0,
+        replay_connect: bool = False,
+    ):
+        if speed <= 0:
+            raise ValueError(f"speed must be positive: {speed}")
+
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self.replay_connect = replay_connect
+
+        events = read_trace(trace) if isinstance(trace, (str, Path)) else trace
+        self.connections = [events for events in trace_connections(events) if events]
+        if not self.connections:
+            raise ValueError("trace has no connections to replay")
+
+        # internal
+        self._server = None
+        self._handshakes = 0
+
+        ## stats
+        self.connections_served = 0
+        self.messages_received = 0
+        self.frames_sent = 0
+        self.late_ms_max = 0.0  # furthest a frame went out behind schedule (replay overhead)
+
+    """
+    api
+    """
+
+    async def start(self):
+        self._server = await websockets.serve(
+            self._handle_connection,
+            self.host,
+            self.port,
+            process_request=self._process_request,
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+        logger.debug(
+            f"● replaying {len(self.connections)} connections on {self.url} (x{self.speed})"
+        )
+
+        return self
+
+    async def stop(self):
+        if self._server is None:
+            return
+
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        """
+        base url to hand to Voicebox(base_url=...)
+        """
+        return f"ws://{self.host}:{self.port}"
+
+    def stats(self) -> dict:
+        return {
+            "connections_in_trace": len(self.connections),
+            "connections_served": self.connections_served,
+            "messages_received": self.messages_received,
+            "frames_sent": self.frames_sent,
+            "late_ms_max": round(self.late_ms_max, 3),
+        }
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    ########################
+    # connection handling
+    ########################
+
+    async def _process_request(self, path, request_headers):
+        events = self.connections[self._handshakes % len(self.connections)]
+        self._handshakes += 1
+
+        connect_ms = events[0].json().get("connect_ms") if events[0].kind == TRACE_OPEN else None
+        if self.replay_connect and connect_ms:
+            await asyncio.sleep(connect_ms / 1000 / self.speed)
+
+        return None  # continue w/ the websocket handshake
+
+    async def _handle_connection(self, websocket):
+        events = self.connections[self.connections_served % len(self.connections)]
+        self.connections_served += 1
+
+        session = _ReplaySession(server=self, websocket=websocket)
+        reader_task = asyncio.create_task(session.read_routine())
+
+        try:
+            await session.replay(events)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            reader_task.cancel()
+
+
+class _ReplaySession:
+    """
+    one replayed connection
+    """
+
+    def __init__(self, server: TraceReplayServer, websocket):
+        self.server = server
+        self.websocket = websocket
+
+        self.open_time = time.monotonic()
+        self.arrivals: List[Tuple[int, float]] = []  # per client message: (chars so far, time)
+        self.client_finished = False  # EOS sent or socket closed, no more messages coming
+
+        self._progress = asyncio.Event()
+
+    async def read_routine(self):
+        try:
+            chars = 0
+            async for message in self.websocket:
+                self.server.messages_received += 1
+                text = _text(message)
+                chars += len(text or "")
+                self.arrivals.append((chars, time.monotonic()))
+                self.client_finished = self.client_finished or text == ""  # EOS
+                self._progress.set()
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            self.client_finished = True
+            self._progress.set()
+
+    async def replay(self, events: List[TraceEvent]):
+        speed = self.server.speed
+        sends_seen, chars_seen = 0, 0
+        anchor_trace_s = events[0].time_s  # the trace's last client message (or the open)
+        previous_trace_s, previous_time = None, None
+
+        for event in events:
+            if event.kind == TRACE_SEND:
+                sends_seen += 1
+                chars_seen += len(_text(event.payload) or "")
+                anchor_trace_s = event.time_s
+
+                continue
+
+            if event.kind == TRACE_CLOSE:
+                close = event.json()
+                if close["by"] == "server":
+                    await self.websocket.close(code=close["code"] or 1000)
+
+                break
+
+            if event.kind != TRACE_RECV:
+                continue
+
+            anchor_time = await self._wait_for_client(
+                messages=min(sends_seen, 1), chars=chars_seen
+            )
+            due_time = anchor_time + (event.time_s - anchor_trace_s) / speed
+            if previous_time is not None:
+                due_time = max(due_time, previous_time + (event.time_s - previous_trace_s) / speed)
+
+            delay_s = due_time - time.monotonic()
+            if delay_s > 0:
+                await asyncio.sleep(delay_s)
+            else:
+                self.server.late_ms_max = max(self.server.late_ms_max, -delay_s * 1000)
+
+            await self.websocket.send(event.payload)
+            self.server.frames_sent += 1
+            previous_trace_s, previous_time = event.time_s, due_time
+
+        await self.websocket.wait_closed()
+
+    async def _wait_for_client(self, messages: int, chars: int) -> float:
+        """
+        when the client had sent `messages` messages & `chars` chars of text
+        (the open for none), or its last message if it finished short
+        """
+        while not self._client_sent(messages, chars) and not self.client_finished:
+            self._progress.clear()
+            await self._progress.wait()
+
+        if messages == 0 or not self.arrivals:
+            return self.open_time
+
+        for index, (chars_sent, arrival_time) in enumerate(self.arrivals):
+            if index + 1 >= messages and chars_sent >= chars:
+                return arrival_time
+
+        return self.arrivals[-1][1]
+
+    def _client_sent(self, messages: int, chars: int) -> bool:
+        return len(self.arrivals) >= messages and (
+            messages == 0 or self.arrivals[-1][0] >= chars
+        )
+
+
+########################
+# helpers
+########################
+
+
+def _text(message) -> Optional[str]:
+    """
+    a client message's `text` (None if it has none)
+    """
+    if not isinstance(message, str) or '"text"' not in message:
+        return None
+
+    try:
+        return fastjson.loads(message).get("text")
+    except ValueError:
+        return None
+
+
+########################
+# cli
+########################
+
+
+async def _serve_forever(args):
+    server = TraceReplayServer(
+        trace=args.trace,
+        host=args.host,
+        port=args.port,
+        speed=args.speed,
+        replay_connect=args.replay_connect,
+    )
+
+    async with server:
+        await asyncio.Future()  # run until interrupted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="replay a recorded voicebox session trace")
+    parser.add_argument("trace", help="trace file written by SessionTraceRecorder")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--speed", type=float, default=1.0, help="2.0 replays twice as fast")
+    parser.add_argument("--replay-connect", action="store_true", help="replay connect times")
+
+    asyncio.run(_serve_forever(parser.parse_args()))
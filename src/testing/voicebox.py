@@ -18,6 +18,8 @@ from src.Environment import Environment
 Environment.load()  # Load .env file data
 
 from src.voicebox.Voicebox import Voicebox
+from src.audio.sinks import PlaybackSink
+from src.audio.jitter import JitterBuffer
 from src.helpers.logging import LoggerFactory
 from src.helpers.time import now_epoch_ms
 
@@ -30,28 +32,15 @@ logger = LoggerFactory.get_logger(namespace="tester", color="white")
 
 async def main():
     """
-    setup audio queue
+    setup audio output (plays on its own thread, never blocks the event loop)
     """
-    audio_queue = asyncio.Queue()
-
-    async def on_speech(base64_audio):
-        await audio_queue.put(base64_audio)
-
-    async def process_audio_queue():
-        while True:
-            # collect & play
-            base64_audio = await audio_queue.get()
-            Voicebox._play_base64_audio(base64_audio)
-
-            # signal done
-            audio_queue.task_done()
-
-            await asyncio.sleep(0.010)  # 10ms
+    sink = PlaybackSink(sample_rate=44100)
+    jitter = JitterBuffer(sink=sink)  # smooths out uneven chunk arrival
 
     # init
     voicebox = Voicebox(
         voice_id="21m00Tcm4TlvDq8ikWAM",  # Rachel
-        on_speech=on_speech,
+        on_speech=jitter.write_base64,
     )
 
     # prepare (inits voicebox async)
@@ -60,13 +49,7 @@ async def main():
     """
     wait for voicebox to become ready
     """
-    while not voicebox.is_ready():
-        await asyncio.sleep(0.010)  # 10ms
-
-    """
-    begin processing audio queue in background
-    """
-    asyncio.create_task(process_audio_queue())
+    await voicebox.wait_ready()
 
     """
     feed speech chunked to voicebox
@@ -98,17 +81,20 @@ async def main():
     logger.debug("all chunks fed")
 
     # wait for generation to complete
-    while not voicebox.generation_complete():
-        await asyncio.sleep(0.010)  # 10ms
+    await voicebox.wait_complete()
+    jitter.finish()
 
     # reset
     await voicebox.reset()
 
     """
-    even if generation is complete, allow the speech to finish playing.
-    we do an arbitrary wait here. (may still clip)
+    even if generation is complete, allow the speech to finish playing
     """
-    await asyncio.sleep(3)
+    await jitter.wait_played()
+    logger.debug(f"playout: {jitter.stats()}")
+
+    await jitter.close()
+    await sink.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,461 @@
+import time
+import asyncio
+import inspect
+import itertools
+import websockets
+from typing import Dict
+
+from src.helpers import fastjson
+from src.helpers.logging import LoggerFactory
+from src.helpers.metrics import MetricsRegistry, metrics
+from src.voicebox.autotune import ChunkScheduleTuner
+from src.voicebox.connector import WebsocketConnector, websocket_connector
+from src.voicebox.delivery import DeliveryQueue
+from src.voicebox.errors import VoiceboxConnectionError, VoiceboxError, VoiceboxInterruptedError
+from src.voicebox.Voicebox import (
+    OnSpeech,
+    delivery_options,
+    elevenlabs_api_key,
+    elevenlabs_base_url,
+    tts_model_id,
+    tts_options,
+    voice_settings,
+    _bytes_per_second_for_output_format,
+    _new_future,
+    _resolve_future,
+    _settle_future,
+)
+
+logger = LoggerFactory.get_logger(namespace="multi_context_voicebox", color="green")
+
+
+class VoiceboxContext:
+    """
+    one generation on a MultiContextVoicebox's shared socket. mirrors the
+    Voicebox speech api: feed_speech(), feeding_finished(), wait_complete().
+    """
+
+    def __init__(
+        self,
+        connection: "MultiContextVoicebox",
+        context_id: str,
+        on_speech: OnSpeech,
+        speech_generation_start_time: float,
+        delivery: dict = delivery_options,
+    ):
+        self.connection = connection
+        self.context_id = context_id
+        self.on_speech = on_speech
+        self.delivery_queue = (
+            DeliveryQueue(
+                deliver=self._deliver_speech,
+                metrics=connection.metrics,
+                voice_id=connection.voice_id,
+                **delivery,
+            )
+            if delivery is not None
+            else None
+        )
+
+        # internal
+        self._complete_future = _new_future()
+        self._closed = False  # close_context sent, nothing more may be fed
+        self._finish_task: asyncio.Task = None
+
+        ## timing
+        self._speech_generation_start_time = speech_generation_start_time
+        self._first_speech_packet_sent_time: float = None
+        self._last_speech_packet_sent_time: float = None
+        self._first_speech_received = False
+        self._playout_end_time: float = None
+        self._stall_ms = 0.0
+        self._timings = {}
+
+        ## tuning
+        self._text_chars_fed = 0
+        self._chars_since_flush = 0
+
+    """
+    api
+    """
+
+    async def feed_speech(self, text: str):
+        if self._closed:
+            logger.error(f"context {self.context_id} already closed")
+
+            return
+
+        fields = {"text": text + " ", "context_id": self.context_id}
+
+        tuner = self.connection.tuner
+        self._text_chars_fed += len(text) + 1
+        self._chars_since_flush += len(text) + 1
+        if tuner is not None and tuner.should_flush(
+            self.connection.voice_id, text, chars_since_flush=self._chars_since_flush
+        ):
+            fields["flush"] = True
+            self._chars_since_flush = 0
+
+        await self.connection._send(fields)
+
+        self._last_speech_packet_sent_time = time.time()
+        if self._first_speech_packet_sent_time is None:
+            self._first_speech_packet_sent_time = self._last_speech_packet_sent_time
+
+    async def feeding_finished(self):
+        """
+        flushes & closes the context, the connection stays open for the next one
+        """
+        if self._closed:
+            return
+
+        self._closed = True
+        await self.connection._send({"context_id": self.context_id, "flush": True})
+        await self.connection._send({"context_id": self.context_id, "close_context": True})
+
+    async def interrupt(self):
+        """
+        barge-in: stops delivering this context's audio & closes it on the server
+        """
+        self.connection._contexts.pop(self.context_id, None)
+        self._fail(VoiceboxInterruptedError("context was interrupted"))
+
+        if not self._closed:
+            self._closed = True
+            await self.connection._send({"context_id": self.context_id, "close_context": True})
+
+    async def wait_complete(self, timeout: float = None):
+        await asyncio.wait_for(asyncio.shield(self._complete_future), timeout=timeout)
+
+    # state
+
+    def generation_complete(self) -> bool:
+        return self._complete_future.done() and self._complete_future.exception() is None
+
+    def timings(self) -> dict:
+        """
+        latencies (ms): fgl_ms & totelap_ms (from open_context()), stall_ms
+        """
+        return dict(self._timings)
+
+    ########################
+    # receiving (called by the connection's reader)
+    ########################
+
+    async def _receive_speech(self, base64_audio: str):
+        # (timed as received, like Voicebox, not as delivered)
+        if not self._first_speech_received:
+            self._first_speech_received = True
+            self._record_timing("totelap_ms", base_time_s=self._speech_generation_start_time)
+            self._record_timing("fgl_ms", base_time_s=self._first_speech_packet_sent_time)
+        self._record_audio_received(base64_audio)
+
+        if self.delivery_queue is not None:
+            await self.delivery_queue.put(base64_audio)
+        else:
+            await self._deliver_speech(base64_audio)
+
+    def _finish(self):
+        """
+        complete once everything received has been delivered (w/o holding up the reader)
+        """
+        self._record_playback_stall()
+
+        if self.delivery_queue is None:
+            _resolve_future(self._complete_future)
+
+            return
+
+        async def _finish_routine():
+            try:
+                await self.delivery_queue.drain()
+            finally:
+                self.delivery_queue.close()  # (stops its consumer task)
+            _resolve_future(self._complete_future)
+
+        self._finish_task = asyncio.create_task(_finish_routine())
+
+    def _fail(self, error: VoiceboxError):
+        """
+        drops whatever wasn't delivered yet
+        """
+        if self._finish_task is not None:
+            self._finish_task.cancel()
+        if self.delivery_queue is not None:
+            self.delivery_queue.close()
+
+        _settle_future(self._complete_future, error=error)
+
+    async def _deliver_speech(self, base64_audio: str):
+        if self.on_speech is not None:
+            if self.delivery_queue is not None:
+                await self.delivery_queue.invoke(self.on_speech, base64_audio)
+            elif inspect.iscoroutinefunction(self.on_speech):
+                await self.on_speech(base64_audio)
+            else:
+                self.on_speech(base64_audio)
+
+    def _record_timing(self, name: str, base_time_s: float):
+        if base_time_s is None:
+            return
+
+        self._timings[name] = (time.time() - base_time_s) * 1000
+        self.connection.metrics.observe(
+            f"voicebox_{name}", self._timings[name], voice_id=self.connection.voice_id
+        )
+
+    def _record_audio_received(self, base64_audio: str):
+        """
+        playback stalls, as if audio were played out as it arrives (see Voicebox)
+        """
+        bytes_per_second = self.connection._bytes_per_second
+        if bytes_per_second is None:
+            return
+
+        now = time.time()
+        padding = len(base64_audio) - len(base64_audio.rstrip("="))
+        audio_bytes = len(base64_audio) * 3 // 4 - padding
+
+        if self._playout_end_time is None or now > self._playout_end_time:
+            if self._playout_end_time is not None:
+                self._stall_ms += (now - self._playout_end_time) * 1000
+            self._playout_end_time = now
+
+        self._playout_end_time += audio_bytes / bytes_per_second
+
+    def _record_playback_stall(self):
+        connection = self.connection
+        if connection._bytes_per_second is None or not self._first_speech_received:
+            return
+
+        self._timings["stall_ms"] = self._stall_ms
+        connection.metrics.observe(
+            "voicebox_stall_ms", self._stall_ms, voice_id=connection.voice_id
+        )
+
+        if connection.tuner is not None and "fgl_ms" in self._timings:
+            feeding_s = self._last_speech_packet_sent_time - self._first_speech_packet_sent_time
+            connection.tuner.observe(
+                connection.voice_id,
+                fgl_ms=self._timings["fgl_ms"],
+                stall_ms=self._stall_ms,
+                text_chars_per_s=self._text_chars_fed / feeding_s if feeding_s > 0.05 else None,
+            )
+
+
+class MultiContextVoicebox:
+    """
+    one persistent `multi-stream-input` socket carrying many generations
+    ("contexts"), concurrently or back to back. only the first context pays
+    for the connection handshake, closing a context leaves the socket open.
+
+    incoming frames are routed to each context's own on_speech by `contextId`.
+    if the socket drops, in-flight contexts fail (VoiceboxConnectionError) &
+    the next open_context() reconnects. so does a frame that can't be handled
+    (e.g. on_speech raising w/ delivery=None): the socket is closed & every
+    in-flight context fails w/ VoiceboxError.
+
+    w/ a `tuner`, each context's chunk schedule & sentence flushes come from
+    it & every completed context is observed, as for a Voicebox.
+    """
+
+    def __init__(
+        self,
+        voice_id: str,
+        base_url: str = elevenlabs_base_url,
+        output_format: str = tts_options["output_format"],
+        inactivity_timeout_s: int = 60,  # idle time before ElevenLabs closes the socket
+        metrics: MetricsRegistry = metrics,
+        connector: WebsocketConnector = websocket_connector,  # None → plain websockets.connect
+        delivery: dict = delivery_options,  # per context, None calls on_speech from the reader
+        tuner: ChunkScheduleTuner = None,  # optional, learns chunk_length_schedule & flushes
+    ):
+        self.voice_id = voice_id
+        self.base_url = base_url
+        self.output_format = output_format
+        self.inactivity_timeout_s = inactivity_timeout_s
+        self.metrics = metrics
+        self.connector = connector
+        self.delivery = delivery
+        self.tuner = tuner
+
+        # internal
+        self._bytes_per_second = _bytes_per_second_for_output_format(output_format)
+        self._websocket = None
+        self._connect_lock = asyncio.Lock()
+        self._reader_task: asyncio.Task = None
+        self._contexts: Dict[str, VoiceboxContext] = {}
+        self._context_ids = itertools.count()
+
+        ## stats
+        self._connects = 0
+        self._contexts_opened = 0
+
+    """
+    api
+    """
+
+    async def connect(self):
+        async with self._connect_lock:
+            if self._connected():
+                return
+
+            logger.debug("◐ connecting to ElevenLabs (multi-context)")
+            connection_start_time = time.time()
+
+            connect = self.connector.connect if self.connector is not None else websockets.connect
+            self._websocket = await connect(
+                self._get_websocket_url(), extra_headers={"xi-api-key": elevenlabs_api_key}
+            )
+            self._connects += 1
+            self.metrics.observe(
+                "voicebox_connect_ms",
+                (time.time() - connection_start_time) * 1000,
+                voice_id=self.voice_id,
+            )
+
+            self._reader_task = asyncio.create_task(self._reader_routine(self._websocket))
+
+    async def open_context(
+        self,
+        on_speech: OnSpeech = None,
+        context_id: str = None,
+        speech_generation_start_time: float = None,
+    ) -> VoiceboxContext:
+        """
+        starts a new generation on the shared socket (connecting first if needed)
+        """
+        speech_generation_start_time = speech_generation_start_time or time.time()
+        await self.connect()
+
+        context_id = context_id or f"context-{next(self._context_ids)}"
+        if context_id in self._contexts:
+            raise ValueError(f"context already open: {context_id}")
+
+        context = VoiceboxContext(
+            connection=self,
+            context_id=context_id,
+            on_speech=on_speech,
+            speech_generation_start_time=speech_generation_start_time,
+            delivery=self.delivery,
+        )
+        self._contexts[context_id] = context
+        self._contexts_opened += 1
+
+        await self._send(
+            {
+                "text": " ",
+                "voice_settings": voice_settings,
+                "generation_config": {
+                    "chunk_length_schedule": (
+                        self.tuner.chunk_length_schedule(self.voice_id)
+                        if self.tuner is not None
+                        else [50]
+                    )
+                },
+                "context_id": context_id,
+            }
+        )
+
+        return context
+
+    async def close(self):
+        if self._connected():
+            try:
+                await self._websocket.send(fastjson.dumps({"close_socket": True}))
+                await self._websocket.close()
+            except websockets.exceptions.ConnectionClosed:
+                pass
+
+        if self._reader_task is not None:
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+            self._reader_task = None
+
+        self._fail_contexts(VoiceboxError("connection was closed"))
+        self._websocket = None
+
+    async def __aenter__(self):
+        await self.connect()
+
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    # state
+
+    def stats(self) -> dict:
+        return {
+            "connected": self._connected(),
+            "connects": self._connects,
+            "contexts_opened": self._contexts_opened,
+            "contexts_active": len(self._contexts),
+        }
+
+    ########################
+    # socket
+    ########################
+
+    async def _send(self, fields: dict):
+        if not self._connected():
+            raise VoiceboxConnectionError("multi-context socket not connected")
+
+        await self._websocket.send(fastjson.dumps(fields))
+
+    async def _reader_routine(self, websocket):
+        """
+        demultiplexes frames to their contexts by `contextId`
+        """
+        error = VoiceboxConnectionError("connection closed before the context completed")
+
+        try:
+            async for message in websocket:
+                base64_audio, is_final, data = fastjson.parse_audio_message(
+                    message, with_metadata=True
+                )
+
+                context = self._contexts.get((data or {}).get("contextId"))
+                if context is None:
+                    continue  # interrupted (or unknown) context, drop its frames
+
+                if base64_audio is not None:
+                    await context._receive_speech(base64_audio)
+
+                if is_final:
+                    del self._contexts[context.context_id]
+                    context._finish()
+        except websockets.exceptions.ConnectionClosed as e:
+            logger.error(f"multi-context connection closed: {e}")
+        except Exception as e:
+            # (e.g. an unparseable frame, or on_speech raising w/ delivery=None)
+            logger.error(f"multi-context reader failed: {e}")
+            error = VoiceboxError(f"multi-context reader failed: {e}")
+
+            await websocket.close()  # so the next open_context() reconnects
+        finally:
+            if websocket is self._websocket:
+                self._fail_contexts(error)
+
+    def _connected(self) -> bool:
+        return self._websocket is not None and self._websocket.open
+
+    def _fail_contexts(self, error: VoiceboxError):
+        contexts, self._contexts = self._contexts, {}
+
+        for context in contexts.values():
+            context._fail(error)
+
+    # url
+
+    def _get_websocket_url(self):
+        eleven_labs_websocket_url = "{base_url}/v1/text-to-speech/{voice_id}/multi-stream-input?model_id={model_id}&optimize_streaming_latency={optimize_streaming_latency}&output_format={output_format}&inactivity_timeout={inactivity_timeout}"
+
+        return eleven_labs_websocket_url.format(
+            base_url=self.base_url,
+            model_id=tts_model_id,
+            voice_id=self.voice_id,
+            optimize_streaming_latency=tts_options["optimize_streaming_latency"],
+            output_format=self.output_format,
+            inactivity_timeout=self.inactivity_timeout_s,
+        )
+
@@ -0,0 +1,497 @@
+import os
+import time
+import zlib
+import queue
+import struct
+import asyncio
+import resource
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+from typing import AsyncIterable, AsyncIterator, Dict, List
+
+from src.helpers.logging import LoggerFactory
+from src.voicebox.Voicebox import elevenlabs_base_url
+from src.voicebox.VoiceboxManager import VoiceboxManager
+from src.voicebox.errors import VoiceboxError
+
+logger = LoggerFactory.get_logger(namespace="sharded_runtime", color="purple")
+
+"""
+shared memory ring layout: [write_total: u64][read_total: u64][pcm ...]
+
+the worker is the only writer of write_total & the parent the only writer of
+read_total, both are monotonic byte counters (position = total % capacity)
+"""
+_RING_HEADER = struct.Struct("<QQ")
+
+"""
+sentinels
+"""
+_TEXT_END = None
+_SESSION_END = object()
+_FEED_FAILED = object()
+
+_LIVENESS_CHECK_S = 0.5  # how often an idle reader thread checks its worker is still alive
+
+
+class _SharedPcmRing:
+    def __init__(self, shm: shared_memory.SharedMemory, capacity: int):
+        self.shm = shm
+        self.capacity = capacity
+        self._pcm = shm.buf[_RING_HEADER.size : _RING_HEADER.size + capacity]
+
+    @classmethod
+    def create(cls, capacity: int) -> "_SharedPcmRing":
+        shm = shared_memory.SharedMemory(create=True, size=_RING_HEADER.size + capacity)
+        _RING_HEADER.pack_into(shm.buf, 0, 0, 0)
+
+        return cls(shm=shm, capacity=capacity)
+
+    @classmethod
+    def attach(cls, name: str, capacity: int) -> "_SharedPcmRing":
+        return cls(shm=shared_memory.SharedMemory(name=name), capacity=capacity)
+
+    # worker side
+
+    async def write(self, pcm: bytes) -> int:
+        """
+        returns the stream offset the pcm was written at, waits for the parent
+        to release space when the ring is full
+        """
+        if len(pcm) > self.capacity:
+            raise ValueError(f"pcm chunk larger than the shared ring ({len(pcm)} bytes)")
+
+        while True:
+            # re-read after every wait, other sessions on this worker write too
+            write_total, read_total = _RING_HEADER.unpack_from(self.shm.buf, 0)
+            if self.capacity - (write_total - read_total) >= len(pcm):
+                break
+
+            await asyncio.sleep(0.001)
+
+        start = write_total % self.capacity
+        first = min(len(pcm), self.capacity - start)
+        self._pcm[start : start + first] = pcm[:first]
+        if first < len(pcm):
+            self._pcm[: len(pcm) - first] = pcm[first:]
+
+        struct.pack_into("<Q", self.shm.buf, 0, write_total + len(pcm))
+
+        return write_total
+
+    # parent side
+
+    def read(self, offset: int, length: int) -> bytes:
+        """
+        copies the pcm out & releases its space back to the worker
+        """
+        start = offset % self.capacity
+        first = min(length, self.capacity - start)
+
+        pcm = bytes(self._pcm[start : start + first])
+        if first < length:
+            pcm += bytes(self._pcm[: length - first])
+
+        struct.pack_into("<Q", self.shm.buf, 8, offset + length)
+
+        return pcm
+
+    def close(self, unlink: bool = False):
+        self._pcm.release()
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+class _Worker:
+    def __init__(self, worker_id: int, process, command_queue, result_queue, ring):
+        self.worker_id = worker_id
+        self.process = process
+        self.command_queue = command_queue
+        self.result_queue = result_queue
+        self.ring: _SharedPcmRing = ring
+        self.reader_thread: threading.Thread = None
+
+        self.sessions_routed = 0
+        self.load: dict = {}  # latest stats reported by the worker process
+        self.error: str = None  # set once the worker process died
+
+
+class ShardedVoiceboxRuntime:
+    """
+    spreads Voicebox sessions over `num_workers` processes, each running its
+    own event loop & VoiceboxManager, so decoding/parsing/logging scale past
+    one core.
+
+    sessions are routed to a worker by a stable hash of their id. text goes to
+    the worker over a command queue, pcm comes back through a per-worker shared
+    memory ring (only offsets cross the result queue, never pickled audio).
+
+    each session has at most `max_queued_chunks` chunks handed to the parent
+    & not yet taken by its consumer: the worker waits for the consumer to
+    take one (acked over the command queue) before writing the next, so a
+    slow consumer slows its own session down instead of piling up pcm.
+
+    a text source that raises cancels its session & the error is raised from
+    stream(). if a worker process dies, its open sessions (& any routed to it
+    later) fail w/ VoiceboxError.
+    """
+
+    def __init__(
+        self,
+        num_workers: int = None,
+        ring_bytes: int = 8 * 1024 * 1024,
+        max_concurrent_per_worker: int = 64,
+        max_queued_chunks: int = 64,
+        base_url: str = elevenlabs_base_url,
+        stats_interval_s: float = 1.0,
+    ):
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.ring_bytes = ring_bytes
+        self.max_concurrent_per_worker = max_concurrent_per_worker
+        self.max_queued_chunks = max_queued_chunks
+        self.base_url = base_url
+        self.stats_interval_s = stats_interval_s
+
+        # internal
+        self._workers: List[_Worker] = []
+        self._sessions: Dict[str, asyncio.Queue] = {}
+        self._loop: asyncio.AbstractEventLoop = None
+
+    """
+    api
+    """
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        context = multiprocessing.get_context("spawn")
+
+        for worker_id in range(self.num_workers):
+            ring = _SharedPcmRing.create(capacity=self.ring_bytes)
+            command_queue = context.Queue()
+            result_queue = context.Queue()
+
+            process = context.Process(
+                target=_worker_main,
+                name=f"voicebox-worker-{worker_id}",
+                kwargs={
+                    "worker_id": worker_id,
+                    "command_queue": command_queue,
+                    "result_queue": result_queue,
+                    "ring_name": ring.shm.name,
+                    "ring_bytes": self.ring_bytes,
+                    "max_concurrent": self.max_concurrent_per_worker,
+                    "max_queued_chunks": self.max_queued_chunks,
+                    "base_url": self.base_url,
+                    "stats_interval_s": self.stats_interval_s,
+                },
+                daemon=True,
+            )
+            process.start()
+
+            worker = _Worker(
+                worker_id=worker_id,
+                process=process,
+                command_queue=command_queue,
+                result_queue=result_queue,
+                ring=ring,
+            )
+            worker.reader_thread = threading.Thread(
+                target=self._reader_routine, args=(worker,), daemon=True
+            )
+            worker.reader_thread.start()
+            self._workers.append(worker)
+
+        logger.debug(f"● started {self.num_workers} voicebox workers")
+
+        return self
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.command_queue.put(("stop",))
+
+        for worker in self._workers:
+            await asyncio.to_thread(worker.process.join)
+            await asyncio.to_thread(worker.reader_thread.join)
+            worker.ring.close(unlink=True)
+
+        self._workers = []
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    async def stream(
+        self,
+        session_id: str,
+        voice_id: str,
+        text_source: AsyncIterable[str],
+        **voicebox_kwargs,
+    ) -> AsyncIterator[bytes]:
+        """
+        like Voicebox.stream(), but the session runs on the worker its id routes to
+        """
+        if session_id in self._sessions:
+            raise ValueError(f"session already exists: {session_id}")
+
+        worker = self._route(session_id)
+        if worker.error is not None:
+            raise VoiceboxError(f"session {session_id} failed: {worker.error}")
+        worker.sessions_routed += 1
+
+        pcm_queue = asyncio.Queue()  # (bounded by the worker, see "ack")
+        self._sessions[session_id] = pcm_queue
+        worker.command_queue.put(("open", session_id, voice_id, voicebox_kwargs))
+
+        async def _feed_routine():
+            async for text in text_source:
+                worker.command_queue.put(("feed", session_id, text))
+            worker.command_queue.put(("finish", session_id))
+
+        def _on_feed_done(task: asyncio.Task):
+            # (a text source that raised would otherwise leave the session waiting on text)
+            if not task.cancelled() and task.exception() is not None:
+                pcm_queue.put_nowait((_FEED_FAILED, task.exception()))
+
+        feed_task = asyncio.create_task(_feed_routine())
+        feed_task.add_done_callback(_on_feed_done)
+        finished = False
+
+        try:
+            while True:
+                item = await pcm_queue.get()
+                if isinstance(item, tuple):  # (_SESSION_END, error) or (_FEED_FAILED, exception)
+                    if item[0] is _FEED_FAILED:
+                        raise item[1]  # (cancelled on the worker below)
+
+                    finished = True
+                    if item[1] is not None:
+                        raise VoiceboxError(f"session {session_id} failed: {item[1]}")
+
+                    return
+
+                worker.command_queue.put(("ack", session_id))  # the worker may send another
+                yield item
+        finally:
+            feed_task.cancel()
+            if not finished:
+                worker.command_queue.put(("cancel", session_id))
+            self._sessions.pop(session_id, None)
+
+    # state
+
+    def stats(self) -> dict:
+        return {
+            "workers": [
+                {
+                    "worker_id": worker.worker_id,
+                    "alive": worker.process.is_alive(),
+                    "sessions_routed": worker.sessions_routed,
+                    **worker.load,
+                }
+                for worker in self._workers
+            ]
+        }
+
+    ########################
+    # routing & delivery
+    ########################
+
+    def _route(self, session_id: str) -> _Worker:
+        # stable across processes & runs (unlike hash())
+        return self._workers[zlib.crc32(session_id.encode()) % len(self._workers)]
+
+    def _reader_routine(self, worker: _Worker):
+        """
+        runs on a thread per worker, pcm is copied out of shared memory here
+        so the event loop only hands over finished bytes
+        """
+        while True:
+            try:
+                message = worker.result_queue.get(timeout=_LIVENESS_CHECK_S)
+            except queue.Empty:
+                if worker.process.is_alive():
+                    continue
+
+                error = f"worker {worker.worker_id} exited (code {worker.process.exitcode})"
+                logger.error(error)
+                self._loop.call_soon_threadsafe(self._fail_worker, worker, error)
+
+                return
+
+            kind = message[0]
+
+            if kind == "pcm":
+                _, session_id, offset, length = message
+                pcm = worker.ring.read(offset=offset, length=length)
+                self._loop.call_soon_threadsafe(self._deliver, session_id, pcm)
+            elif kind == "end":
+                _, session_id, error = message
+                self._loop.call_soon_threadsafe(
+                    self._deliver, session_id, (_SESSION_END, error)
+                )
+            elif kind == "stats":
+                worker.load = message[1]
+            elif kind == "stopped":
+                return
+
+    def _deliver(self, session_id: str, item):
+        pcm_queue = self._sessions.get(session_id)
+        if pcm_queue is not None:  # consumer may have gone away
+            pcm_queue.put_nowait(item)
+
+    def _fail_worker(self, worker: _Worker, error: str):
+        """
+        the worker process died, its open sessions will never hear back from it
+        """
+        worker.error = error
+
+        for session_id in list(self._sessions):
+            if self._route(session_id) is worker:
+                self._deliver(session_id, (_SESSION_END, error))
+
+
+########################
+# worker process
+########################
+
+
+def _worker_main(**kwargs):
+    asyncio.run(_WorkerRuntime(**kwargs).run())
+
+
+class _WorkerRuntime:
+    def __init__(
+        self,
+        worker_id: int,
+        command_queue,
+        result_queue,
+        ring_name: str,
+        ring_bytes: int,
+        max_concurrent: int,
+        max_queued_chunks: int,
+        base_url: str,
+        stats_interval_s: float,
+    ):
+        self.worker_id = worker_id
+        self.command_queue = command_queue
+        self.result_queue = result_queue
+        self.ring = _SharedPcmRing.attach(name=ring_name, capacity=ring_bytes)
+        self.manager = VoiceboxManager(max_concurrent=max_concurrent, base_url=base_url)
+        self.max_queued_chunks = max_queued_chunks
+        self.stats_interval_s = stats_interval_s
+
+        self._text_queues: Dict[str, asyncio.Queue] = {}
+        self._queued_chunks: Dict[str, asyncio.Semaphore] = {}  # chunks the parent may still take
+        self._session_tasks: Dict[str, asyncio.Task] = {}
+
+        ## stats
+        self._sessions_completed = 0
+        self._sessions_failed = 0
+        self._pcm_bytes = 0
+
+    async def run(self):
+        stats_task = asyncio.create_task(self._stats_routine())
+
+        while True:
+            command = await asyncio.to_thread(self.command_queue.get)
+            kind = command[0]
+
+            if kind == "open":
+                _, session_id, voice_id, voicebox_kwargs = command
+                self._open_session(session_id, voice_id, voicebox_kwargs)
+            elif kind == "feed":
+                _, session_id, text = command
+                if session_id in self._text_queues:
+                    self._text_queues[session_id].put_nowait(text)
+            elif kind == "finish":
+                _, session_id = command
+                if session_id in self._text_queues:
+                    self._text_queues[session_id].put_nowait(_TEXT_END)
+            elif kind == "ack":
+                _, session_id = command
+                if session_id in self._queued_chunks:
+                    self._queued_chunks[session_id].release()
+            elif kind == "cancel":
+                _, session_id = command
+                if session_id in self._session_tasks:
+                    self._session_tasks[session_id].cancel()
+            elif kind == "stop":
+                break
+
+        stats_task.cancel()
+        for task in list(self._session_tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._session_tasks.values(), return_exceptions=True)
+
+        self.ring.close()
+        self.result_queue.put(("stopped",))
+
+    def _open_session(self, session_id: str, voice_id: str, voicebox_kwargs: dict):
+        text_queue = asyncio.Queue()
+        self._text_queues[session_id] = text_queue
+        queued_chunks = asyncio.Semaphore(self.max_queued_chunks)
+        self._queued_chunks[session_id] = queued_chunks
+
+        async def _text_source():
+            while True:
+                text = await text_queue.get()
+                if text is _TEXT_END:
+                    return
+
+                yield text
+
+        async def _session_routine():
+            error = None
+
+            try:
+                async for pcm in self.manager.stream(
+                    voice_id, _text_source(), session_id=session_id, **voicebox_kwargs
+                ):
+                    await queued_chunks.acquire()  # released once the consumer takes one
+                    offset = await self.ring.write(pcm)
+                    self._pcm_bytes += len(pcm)
+                    self.result_queue.put(("pcm", session_id, offset, len(pcm)))
+
+                self._sessions_completed += 1
+            except asyncio.CancelledError:
+                error = "cancelled"
+
+                raise
+            except Exception as e:
+                self._sessions_failed += 1
+                error = str(e)
+            finally:
+                self._text_queues.pop(session_id, None)
+                self._queued_chunks.pop(session_id, None)
+                self._session_tasks.pop(session_id, None)
+
+                self.result_queue.put(("end", session_id, error))
+
+        self._session_tasks[session_id] = asyncio.create_task(_session_routine())
+
+    async def _stats_routine(self):
+        while True:
+            snapshot = self.manager.snapshot()
+
+            self.result_queue.put(
+                (
+                    "stats",
+                    {
+                        "pid": os.getpid(),
+                        "active": snapshot["active"],
+                        "connecting": snapshot["connecting"],
+                        "queued": snapshot["queued"],
+                        "sessions_completed": self._sessions_completed,
+                        "sessions_failed": self._sessions_failed,
+                        "pcm_bytes": self._pcm_bytes,
+                        "cpu_s": time.process_time(),
+                        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                    },
+                )
+            )
+
+            await asyncio.sleep(self.stats_interval_s)
@@ -0,0 +1,254 @@
+import os
+import mmap
+import json
+import time
+import base64
+import hashlib
+import unicodedata
+from pathlib import Path
+from collections import OrderedDict
+from typing import Dict, Union
+
+from src.helpers.logging import LoggerFactory
+from src.voicebox.Voicebox import Voicebox
+
+logger = LoggerFactory.get_logger(namespace="utterance_cache", color="purple")
+
+
+class UtteranceCache:
+    """
+    caches generated audio for repeated phrases ("one moment please", greetings).
+
+    keyed by the voicebox's generation settings (voice, model, voice settings,
+    output format) + normalized text. two tiers:
+    - memory: LRU w/ a byte budget
+    - disk (optional): one raw pcm file per utterance, read back via mmap,
+      survives restarts. evicted oldest-first past its byte budget.
+
+    hits are replayed through the voicebox's normal on_speech path (base64
+    chunks), so consumers can't tell a hit from a live generation.
+    """
+
+    def __init__(
+        self,
+        memory_max_bytes: int = 64 * 1024 * 1024,
+        disk_path: Union[str, Path] = None,
+        disk_max_bytes: int = 1024 * 1024 * 1024,
+        chunk_bytes: int = 8820,  # 100ms of 44.1kHz 16-bit mono per on_speech call
+    ):
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_path = Path(disk_path) if disk_path is not None else None
+        self.disk_max_bytes = disk_max_bytes
+        self.chunk_bytes = chunk_bytes
+
+        # internal
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_index: "OrderedDict[str, int]" = OrderedDict()  # key → size, oldest first
+        self._disk_bytes = 0
+
+        ## stats
+        self._hits_memory = 0
+        self._hits_disk = 0
+        self._misses = 0
+        self._bytes_saved = 0
+
+        if self.disk_path is not None:
+            self.disk_path.mkdir(parents=True, exist_ok=True)
+            self._load_disk_index()
+
+    """
+    api
+    """
+
+    async def speak(
+        self, voicebox: Voicebox, text: str, speech_generation_start_time: float = None
+    ) -> bool:
+        """
+        speaks `text` through the voicebox, from cache when possible.
+        returns True on a cache hit.
+        """
+        key = self.key(voicebox=voicebox, text=text)
+
+        if await self._replay(voicebox=voicebox, key=key):
+            return True
+
+        self._misses += 1
+        pcm = await self._generate(
+            voicebox=voicebox,
+            text=text,
+            speech_generation_start_time=speech_generation_start_time or time.time(),
+        )
+        if pcm:
+            self.put(key=key, pcm=pcm)
+
+        return False
+
+    def key(self, voicebox: Voicebox, text: str) -> str:
+        identity = json.dumps(
+            {**voicebox.generation_settings(), "text": normalize_text(text)},
+            sort_keys=True,
+        )
+
+        return hashlib.sha256(identity.encode()).hexdigest()
+
+    def put(self, key: str, pcm: bytes):
+        self._put_memory(key=key, pcm=pcm)
+
+        if self.disk_path is not None and key not in self._disk_index:
+            self._put_disk(key=key, pcm=pcm)
+
+    # state
+
+    def stats(self) -> dict:
+        hits = self._hits_memory + self._hits_disk
+        lookups = hits + self._misses
+
+        return {
+            "hits_memory": self._hits_memory,
+            "hits_disk": self._hits_disk,
+            "misses": self._misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "bytes_saved": self._bytes_saved,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_entries": len(self._disk_index),
+            "disk_bytes": self._disk_bytes,
+        }
+
+    ########################
+    # hits & misses
+    ########################
+
+    async def _replay(self, voicebox: Voicebox, key: str) -> bool:
+        pcm = self._memory.get(key)
+        if pcm is not None:
+            self._memory.move_to_end(key)
+            self._hits_memory += 1
+            await self._emit(voicebox=voicebox, pcm=memoryview(pcm))
+
+            return True
+
+        if key not in self._disk_index:
+            return False
+
+        path = self._disk_file(key)
+        try:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                self._hits_disk += 1
+
+                with memoryview(m) as view:
+                    await self._emit(voicebox=voicebox, pcm=view)
+                    self._put_memory(key=key, pcm=bytes(view))  # promote
+        except (OSError, ValueError) as e:
+            logger.error(f"failed to read cached utterance, dropping it: {e}")
+            self._drop_disk(key)
+
+            return False
+
+        self._disk_index.move_to_end(key)
+        os.utime(path)  # keep recency across restarts
+
+        return True
+
+    async def _emit(self, voicebox: Voicebox, pcm: memoryview):
+        for offset in range(0, len(pcm), self.chunk_bytes):
+            chunk = pcm[offset : offset + self.chunk_bytes]
+
+            await voicebox._deliver_speech(base64.b64encode(chunk).decode())
+
+        self._bytes_saved += len(pcm)
+
+    async def _generate(
+        self, voicebox: Voicebox, text: str, speech_generation_start_time: float
+    ) -> bytes:
+        voicebox._speech_capture = []
+
+        try:
+            voicebox.prepare(speech_generation_start_time=speech_generation_start_time)
+            await voicebox.wait_ready()
+
+            await voicebox.feed_speech(text)
+            await voicebox.feeding_finished()
+            await voicebox.wait_complete()
+
+            return b"".join(base64.b64decode(chunk) for chunk in voicebox._speech_capture)
+        finally:
+            voicebox._speech_capture = None
+            await voicebox.reset()
+
+    ########################
+    # memory tier
+    ########################
+
+    def _put_memory(self, key: str, pcm: bytes):
+        if len(pcm) > self.memory_max_bytes:
+            return
+
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key))
+
+        self._memory[key] = pcm
+        self._memory_bytes += len(pcm)
+
+        while self._memory_bytes > self.memory_max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    ########################
+    # disk tier
+    ########################
+
+    def _disk_file(self, key: str) -> Path:
+        return self.disk_path / f"{key}.pcm"
+
+    def _load_disk_index(self):
+        files = sorted(self.disk_path.glob("*.pcm"), key=lambda path: path.stat().st_mtime)
+
+        for path in files:
+            size = path.stat().st_size
+            self._disk_index[path.stem] = size
+            self._disk_bytes += size
+
+    def _put_disk(self, key: str, pcm: bytes):
+        if len(pcm) > self.disk_max_bytes:
+            return
+
+        path = self._disk_file(key)
+        temp_path = path.with_suffix(".tmp")
+
+        try:
+            temp_path.write_bytes(pcm)
+            os.replace(temp_path, path)  # atomic, readers never see partial files
+        except OSError as e:
+            logger.error(f"failed to write cached utterance: {e}")
+
+            return
+
+        self._disk_index[key] = len(pcm)
+        self._disk_bytes += len(pcm)
+
+        while self._disk_bytes > self.disk_max_bytes:
+            oldest_key = next(iter(self._disk_index))
+            self._drop_disk(oldest_key)
+
+    def _drop_disk(self, key: str):
+        size = self._disk_index.pop(key, None)
+        if size is None:
+            return
+
+        self._disk_bytes -= size
+        try:
+            self._disk_file(key).unlink()
+        except FileNotFoundError:
+            pass
+
+
+########################
+# helpers
+########################
+
+
+def normalize_text(text: str) -> str:
+    # unicode NFC + collapsed whitespace, case is kept (it can change prosody)
+    return " ".join(unicodedata.normalize("NFC", text).split())
@@ -1,22 +1,39 @@
 import websockets
-import json
 import base64
 import time
 import asyncio
 import inspect
 from pydub import AudioSegment
 from pydub.playback import play
-from typing import Callable, Any
+from typing import TYPE_CHECKING, AsyncIterable, AsyncIterator, Callable, Any, List
 
 from src.Environment import Environment
+from src.helpers import fastjson
+from src.audio.ring import PcmRingBuffer
 from src.helpers.logging import LoggerFactory
+from src.helpers.metrics import MetricsRegistry, exponential_buckets, metrics
 from src.helpers.concurrency.tasks import InterruptibleAsyncTask
+from src.voicebox.autotune import ChunkScheduleTuner
+from src.voicebox.coalescing import TextCoalescer
+from src.voicebox.delivery import DeliveryQueue
+from src.voicebox.trace import SessionTraceRecorder
+from src.voicebox.connector import CONNECT_PHASES, WebsocketConnector, websocket_connector
+from src.voicebox.errors import (
+    VoiceboxError,
+    VoiceboxConnectionError,
+    VoiceboxInterruptedError,
+)
+
+if TYPE_CHECKING:
+    from src.voicebox.VoiceboxPool import VoiceboxPool
+    from src.voicebox.hedging import HedgedConnector
 
 # import logging
 # logging.basicConfig(level=logging.DEBUG) # uncomment to log socket activity
 logger = LoggerFactory.get_logger(namespace="voicebox", color="green")
 
-elevenlabs_api_key = Environment.get("ELEVENLABS_API_KEY")
+elevenlabs_api_key = Environment.get("ELEVENLABS_API_KEY", parse_json=False)
+elevenlabs_base_url = "wss://api.elevenlabs.io"
 tts_model_id = "eleven_turbo_v2"
 tts_options = {
     "optimize_streaming_latency": 4,  # 0-4, 4 is max latency optimizations
@@ -28,6 +45,20 @@ voice_settings = {
     "style": 0,
     "use_speaker_boost": False,
 }
+reconnect_options = {
+    "max_attempts": 3,  # reconnects per generation before it fails
+    "backoff_s": 0.05,  # wait before a retry, doubles after each failed attempt
+}
+delivery_options = {
+    "max_chunks": 64,  # chunks waiting in memory for on_speech
+    "overflow": "block",  # then: "block" (the reader waits), "drop_oldest" or "spill" (to disk)
+    "threaded_callbacks": False,  # True runs a sync on_speech on a worker thread (if it blocks)
+}
+text_coalescing_options = {
+    "min_chars": 24,  # send once this many chars are buffered
+    "max_delay_ms": 40,  # ...or once the oldest buffered chunk has waited this long
+    "boundary_chars": ".,!?;:\n",  # ...or right away when a chunk ends in one of these
+}
 
 """
 speech_base64: base64 string of audio
@@ -36,9 +67,48 @@ OnSpeech = Callable[[str], Any]
 
 
 class Voicebox:
-    def __init__(self, voice_id: str, on_speech: OnSpeech = None):
+    def __init__(
+        self,
+        voice_id: str,
+        on_speech: OnSpeech = None,
+        pool: "VoiceboxPool" = None,
+        base_url: str = elevenlabs_base_url,
+        pcm_buffer: PcmRingBuffer = None,
+        text_coalescing: dict = text_coalescing_options,  # None sends every chunk as-is
+        metrics: MetricsRegistry = metrics,
+        output_format: str = tts_options["output_format"],  # e.g. pcm_16000, ulaw_8000
+        reconnect: dict = reconnect_options,  # None fails the generation when the socket drops
+        hedging: "HedgedConnector" = None,  # optional, races a 2nd connect against slow handshakes
+        connector: WebsocketConnector = websocket_connector,  # None → plain websockets.connect
+        delivery: dict = delivery_options,  # None calls on_speech inline from the socket reader
+        tuner: ChunkScheduleTuner = None,  # optional, learns chunk_length_schedule & flushes
+        recorder: SessionTraceRecorder = None,  # optional, traces every frame sent & received
+    ):
         self.voice_id = voice_id
+        self.output_format = output_format
         self.on_speech = on_speech
+        self.pool = pool  # optional, serves pre-warmed sockets (BOS already sent)
+        self.base_url = base_url  # e.g. a local stand-in server for benchmarking
+        self.pcm_buffer = pcm_buffer  # optional, receives decoded pcm (no per-chunk objects)
+        self.text_coalescer = (
+            TextCoalescer(send_text=self._send_speech_text, **text_coalescing)
+            if text_coalescing is not None
+            else None
+        )
+        self.metrics = metrics
+        _describe_metrics(metrics)
+        self.reconnect = reconnect
+        self.hedging = hedging
+        self.connector = connector
+        self.tuner = tuner
+        self.recorder = recorder
+        self.delivery_queue = (
+            DeliveryQueue(
+                deliver=self._deliver_speech, metrics=metrics, voice_id=voice_id, **delivery
+            )
+            if delivery is not None
+            else None
+        )
 
         # internal
         ## websocket
@@ -53,9 +123,52 @@ class Voicebox:
         self._prepare_task: InterruptibleAsyncTask = None
         self._websocket_listen_task: InterruptibleAsyncTask = None
 
+        ## readiness & completion (resolved by the prepare & listen routines)
+        self._ready_future: asyncio.Future = None
+        self._complete_future: asyncio.Future = None
+
+        ## precompiled payloads (per chunk, only the text gets encoded)
+        (
+            self._speech_chunk_payload_prefix,
+            self._speech_chunk_payload_suffix,
+        ) = self._speech_chunk_payload_template()
+        (
+            self._speech_flush_payload_prefix,
+            self._speech_flush_payload_suffix,
+        ) = self._speech_chunk_payload_template(flush=True)
+        self._eos_payload_str = self._ws_payload(text="")
+
+        ## replay (text sent vs text answered w/ audio, per `alignment`)
+        self._sent_chunks: List[str] = []
+        self._sent_chars = 0
+        self._acknowledged_chars = 0
+        self._eos_requested = False
+        self._reconnecting = False  # text is only recorded (& replayed) meanwhile
+        self._reconnect_attempts = 0
+
+        ## stream() output (decoded pcm), only set while a stream is running
+        self._stream_queue: asyncio.Queue = None
+
+        ## copies of received audio (e.g. for the utterance cache), only set while capturing
+        self._speech_capture: list = None
+
         ## timing
         self._speech_generation_start_time = None
         self._first_speech_packet_sent_time = None
+        self._bos_sent_time = None
+        self._last_audio_received_time = None
+        self._audio_bytes_received = 0
+        self._bytes_per_second = _bytes_per_second_for_output_format(output_format)
+        self._playout_end_time = None  # when the audio received so far would finish playing
+        self._stall_ms = 0.0
+        self._text_chars_fed = 0
+        self._chars_since_flush = 0
+        self._last_speech_packet_sent_time = None
+        self._timings = {}  # latest generation's latencies (ms)
+        self.last_interrupt_to_silence_ms: float = None
+
+        ## sockets & tasks being torn down after interrupt()
+        self._teardown_tasks = set()
 
     """
     api
@@ -74,13 +187,29 @@ class Voicebox:
         # reset connection vars
         self._reset_connection_state_vars()
         self._speech_generation_start_time = speech_generation_start_time
+        self._timings = {}
+        self._ready_future = _new_future()
+        self._complete_future = _new_future()
 
         async def _prepare_routine():
-            await self._connect_to_websocket()  # connect to websocket
+            try:
+                if self.pool is not None:
+                    # warm sockets are already connected w/ BOS sent
+                    await self._acquire_pooled_websocket()
+                else:
+                    await self._connect_to_websocket()  # connect to websocket
+
+                    # send beginning of sequence message
+                    logger.debug("initializing stream")
+                    await self._send_bos_payload()
+                self._bos_sent_time = time.time()  # (for pooled sockets, when acquired)
+            except Exception as e:
+                logger.error(f"failed to prepare voicebox: {e}")
+                self._fail_pending_futures(
+                    VoiceboxConnectionError(f"failed to prepare voicebox: {e}")
+                )
 
-            # send beginning of sequence message
-            logger.debug("initializing stream")
-            await self._send_bos_payload()
+                return
             self._sequence_start_sent = True
 
             # start listening on socket (in background)
@@ -106,30 +235,89 @@ class Voicebox:
 
             return
 
-        await self._send_speech_chunk_payload(text=text)
-
-        """
-        clock first speech sent time
-        """
-        if not self._first_speech_sent:
-            self._first_speech_sent = True
-            self._first_speech_packet_sent_time = time.time()
+        if self.text_coalescer is not None:
+            await self.text_coalescer.push(text)  # sent in batches
+        else:
+            await self._send_speech_text(text)
 
     async def feeding_finished(self):
         if not self.is_ready():
             return
 
+        if self.text_coalescer is not None:
+            await self.text_coalescer.flush()  # send whatever is still buffered
+
+        self._eos_requested = True
+        if self._reconnecting:
+            return  # sent after the replay
+
         await self._send_eos_payload()
 
+    def interrupt(self):
+        """
+        barge-in: stops delivering audio to on_speech right away & leaves the
+        voicebox ready for a new prepare(). the old socket is torn down in the
+        background instead of on the next turn's critical path.
+        """
+        logger.debug("◐ interrupting voicebox")
+        interrupt_start_time = time.time()
+
+        # stop delivery first, cancellation lands at the listener's next await
+        listen_task = self._websocket_listen_task and self._websocket_listen_task.cancel()
+        prepare_task = self._prepare_task and self._prepare_task.cancel()
+        consumer_task = (  # audio already received but not yet delivered (& any spill file)
+            self.delivery_queue.close() if self.delivery_queue is not None else None
+        )
+
+        def _on_silent(_=None):
+            self.last_interrupt_to_silence_ms = (time.time() - interrupt_start_time) * 1000
+            self.metrics.observe(
+                "voicebox_interrupt_to_silence_ms",
+                self.last_interrupt_to_silence_ms,
+                voice_id=self.voice_id,
+            )
+            logger.debug(
+                f"● voicebox interrupted (silent in {self.last_interrupt_to_silence_ms:.1f}ms)"
+            )
+
+        # silent once neither the listener nor the delivery consumer can call on_speech
+        delivering_tasks = [
+            task for task in (listen_task, consumer_task) if task is not None and not task.done()
+        ]
+        if delivering_tasks:
+            asyncio.gather(*delivering_tasks, return_exceptions=True).add_done_callback(
+                _on_silent
+            )
+        else:
+            _on_silent()
+
+        self._fail_pending_futures(VoiceboxInterruptedError("generation was interrupted"))
+
+        # hand the old connection off & reset right away
+        websocket = self._websocket
+        self._reset_connection_state_vars()
+
+        teardown_task = asyncio.create_task(
+            self._teardown_routine(
+                websocket=websocket, tasks=[prepare_task, listen_task, consumer_task]
+            )
+        )
+        self._teardown_tasks.add(teardown_task)
+        teardown_task.add_done_callback(self._teardown_tasks.discard)
+
     async def reset(self):
         logger.debug("◐ resetting voicebox")
         reset_start_time = time.time()
 
+        self._fail_pending_futures(VoiceboxError("voicebox was reset"))
+
         if self._websocket_connected():
             await self._send_eos_payload()  # send closing packet
 
         if self._is_listening():
             await self._stop_listening_on_socket()  # stop listening
+        if self.delivery_queue is not None:
+            self.delivery_queue.close()  # (already drained unless the generation was cut short)
         if self._prepare_task:
             await self._prepare_task.interrupt()
             self._prepare_task = None
@@ -140,17 +328,104 @@ class Voicebox:
         # reset connection vars
         self._reset_connection_state_vars()
 
-        reset_time_ms = round((time.time() - reset_start_time) * 1000)
-        logger.debug(f"● voicebox reset (total {reset_time_ms}ms)")
+        self._record_timing("reset_ms", base_time_s=reset_start_time)
+        logger.debug("● voicebox reset (total {:.0f}ms)", self._timings["reset_ms"])
+
+    async def wait_ready(self, timeout: float = None):
+        """
+        resolves once the voicebox is ready for speech ingestion.
+        raises VoiceboxConnectionError if the connection fails.
+        """
+        await self._wait_for(self._ready_future, timeout=timeout)
+
+    async def wait_complete(self, timeout: float = None):
+        """
+        resolves once all speech has been received back from ElevenLabs.
+        raises VoiceboxConnectionError if the socket closes before that.
+        """
+        await self._wait_for(self._complete_future, timeout=timeout)
+
+    async def stream(
+        self,
+        text_source: AsyncIterable[str],
+        speech_generation_start_time: float = None,
+        max_buffered_chunks: int = 32,
+    ) -> AsyncIterator[bytes]:
+        """
+        text in (e.g. llm tokens), decoded pcm out.
+
+        drives prepare() (unless already called), feed_speech(), feeding_finished()
+        & reset() internally. at most `max_buffered_chunks` decoded chunks are
+        buffered, after that the socket listener waits on the consumer.
+
+        wrap in contextlib.aclosing() if you may stop iterating early, so the
+        voicebox is reset right away instead of when the generator is collected.
+        """
+        if self._prepare_task is None:
+            self.prepare(speech_generation_start_time=speech_generation_start_time or time.time())
+
+        stream_queue = asyncio.Queue(maxsize=max_buffered_chunks)
+        stream_end = _new_future()
+        self._stream_queue = stream_queue
+
+        async def _feed_routine():
+            await self.wait_ready()
+
+            async for text in text_source:
+                await self.feed_speech(text)
+            await self.feeding_finished()
+
+        def _on_feed_done(task: asyncio.Task):
+            if not task.cancelled() and task.exception() is not None:
+                _settle_future(stream_end, error=task.exception())
+
+        self._complete_future.add_done_callback(
+            lambda f: _settle_future(stream_end, error=None if f.cancelled() else f.exception())
+        )
+        feed_task = InterruptibleAsyncTask(target_fn=_feed_routine)
+        feed_task.schedule()
+        feed_task.task.add_done_callback(_on_feed_done)
+
+        try:
+            while True:
+                # drain w/o waiting while audio is buffered
+                if not stream_queue.empty():
+                    yield stream_queue.get_nowait()
+
+                    continue
+
+                if stream_end.done():
+                    stream_end.result()  # raises if the generation failed
+
+                    return
+
+                next_chunk = asyncio.ensure_future(stream_queue.get())
+                await asyncio.wait([next_chunk, stream_end], return_when=asyncio.FIRST_COMPLETED)
+
+                if next_chunk.done():
+                    yield next_chunk.result()
+                else:
+                    next_chunk.cancel()
+        finally:
+            await feed_task.interrupt()
+            self._stream_queue = None
+
+            await self.reset()
 
     # state
 
     """
-    since prepare() is non-blocking, clients will have to repeatedly
-    check is_ready() to see if the voicebox is ready for speech ingestion
+    since prepare() is non-blocking, clients either await wait_ready() or
+    repeatedly check is_ready() to see if the voicebox is ready for speech ingestion
     """
 
     def is_ready(self):
+        if self._reconnecting:
+            return True  # speech is held for the new socket
+
+        if self.reconnect is not None and self._listener_running():
+            return True  # (a drop the listener hasn't noticed yet is recovered too)
+
         return (
             self._websocket_connected()
             and self._sequence_start_sent
@@ -160,6 +435,38 @@ class Voicebox:
     def generation_complete(self):
         return self._generation_complete
 
+    def timings(self) -> dict:
+        """
+        latencies (ms) clocked during the latest generation:
+        connect_ms, fgl_ms, totelap_ms, reconnect_ms (if the socket dropped)
+        & reset_ms (once reset)
+        """
+        return dict(self._timings)
+
+    def generation_settings(self) -> dict:
+        """
+        everything (besides the text) that determines the generated audio
+        """
+        return {
+            "voice_id": self.voice_id,
+            "model_id": tts_model_id,
+            "voice_settings": voice_settings,
+            "output_format": self.output_format,
+        }
+
+    def connection_key(self):
+        """
+        sockets are interchangeable between voiceboxes w/ the same key, i.e. the
+        same url & the same BOS (which carries the chunk schedule)
+        """
+        return (
+            self.base_url,
+            self.voice_id,
+            tts_model_id,
+            self.output_format,
+            tuple(self._chunk_length_schedule()),
+        )
+
     ########################
     # websocket
     ########################
@@ -180,18 +487,59 @@ class Voicebox:
         connection_start_time = time.time()
 
         self.url = self._get_websocket_url()
-        self._websocket = await websockets.connect(self.url)
-
-        connection_time_ms_log = LoggerFactory.get_latency_log(
-            prefix="in",
-            base_time_s=connection_start_time,
-            interval_coloring=[
-                ((0, 300), "green"),
-                ((300, 500), "yellow"),
-                ((500, 1000), "red"),
-            ],
+        if self.hedging is not None:
+            self._websocket = await self.hedging.connect(self.url)
+        elif self.connector is not None:
+            self._websocket = await self.connector.connect(self.url)
+        else:
+            self._websocket = await websockets.connect(self.url)
+        self._record_timing("connect_ms", base_time_s=connection_start_time)
+        self._record_connect_breakdown()
+
+        if self.recorder is not None:
+            self._websocket = self.recorder.wrap(self._websocket, url=self.url)
+
+        logger.opt(lazy=True).debug(
+            "● connected {}",
+            LoggerFactory.lazy_latency_log(
+                prefix="in",
+                base_time_s=connection_start_time,
+                interval_coloring=[
+                    ((0, 300), "green"),
+                    ((300, 500), "yellow"),
+                    ((500, 1000), "red"),
+                ],
+            ),
+        )
+
+    async def _acquire_pooled_websocket(self):
+        if self._websocket_connected():
+            logger.error("socket already connected")
+
+            return
+
+        logger.debug("◐ acquiring socket from pool")
+        acquire_start_time = time.time()
+
+        self._websocket = await self.pool.acquire(voicebox=self)
+        self._record_timing("connect_ms", base_time_s=acquire_start_time)
+
+        if self.recorder is not None:
+            self._websocket = self.recorder.wrap(self._websocket, url=self._get_websocket_url())
+            self._websocket.record_sent(self._bos_payload())  # (sent by the pool, when warmed)
+
+        logger.opt(lazy=True).debug(
+            "● acquired {}",
+            LoggerFactory.lazy_latency_log(
+                prefix="in",
+                base_time_s=acquire_start_time,
+                interval_coloring=[
+                    ((0, 50), "green"),
+                    ((50, 300), "yellow"),
+                    ((300, 1000), "red"),
+                ],
+            ),
         )
-        logger.debug(f"● connected {connection_time_ms_log}")
 
     async def _disconnect_from_websocket(self):
         if not self._websocket_connected():
@@ -205,22 +553,27 @@ class Voicebox:
         await self._websocket.close()
         self._websocket = None
 
-        disconnect_time_log = LoggerFactory.get_latency_log(
-            prefix="in",
-            base_time_s=disconnect_start_time,
-            interval_coloring=[
-                ((0, 100), "green"),
-                ((100, 200), "yellow"),
-                ((200, 1000), "red"),
-            ],
+        logger.opt(lazy=True).debug(
+            "● disconnected {}",
+            LoggerFactory.lazy_latency_log(
+                prefix="in",
+                base_time_s=disconnect_start_time,
+                interval_coloring=[
+                    ((0, 100), "green"),
+                    ((100, 200), "yellow"),
+                    ((200, 1000), "red"),
+                ],
+            ),
         )
-        logger.debug(f"● disconnected {disconnect_time_log}")
 
     ### listening
 
     def _listen_on_socket(self):
         if not self._websocket_connected():
             logger.error("socket not connected")
+            self._fail_pending_futures(
+                VoiceboxConnectionError("socket closed before listening started")
+            )
 
             return
 
@@ -237,15 +590,17 @@ class Voicebox:
     async def _listen_on_socket_routine(self):
         logger.debug("((•)) listening for speech")
         self._listening = True
+        self._record_timing("bos_to_ready_ms", base_time_s=self._bos_sent_time)
+        _resolve_future(self._ready_future)
 
         while True:
             try:
                 message = await self._websocket.recv()
 
-                # parse payload
-                data = json.loads(message)
-                base64_audio = data.get("audio", None)
-                is_final = data.get("is_final", False)
+                # parse payload (`audio` & `isFinal`, + `alignment` when replay is on)
+                base64_audio, is_final, data = fastjson.parse_audio_message(
+                    message, with_metadata=self.reconnect is not None
+                )
 
                 """
                 process audio
@@ -255,48 +610,204 @@ class Voicebox:
                     clock first speech received time
                     """
                     if not self._first_speech_received:
-                        totelap_log = LoggerFactory.get_latency_log(
-                            prefix="totelap",
-                            base_time_s=self._speech_generation_start_time,
-                            interval_coloring=LoggerFactory.ttfs_latency_coloring,
+                        self._record_timing(
+                            "totelap_ms", base_time_s=self._speech_generation_start_time
                         )
-                        first_generation_latency_log = LoggerFactory.get_latency_log(
-                            prefix="fgl",
-                            base_time_s=self._first_speech_packet_sent_time,
-                            interval_coloring=[
-                                ((0, 500), "green"),
-                                ((500, 750), "yellow"),
-                                ((750, 30000), "red"),
-                            ],
+                        self._record_timing(
+                            "fgl_ms", base_time_s=self._first_speech_packet_sent_time
                         )
 
-                        logger.debug(
-                            f"first speech received {totelap_log} {first_generation_latency_log}"
+                        logger.opt(lazy=True).debug(
+                            "first speech received {} {}",
+                            LoggerFactory.lazy_latency_log(
+                                prefix="totelap",
+                                base_time_s=self._speech_generation_start_time,
+                                interval_coloring=LoggerFactory.ttfs_latency_coloring,
+                            ),
+                            LoggerFactory.lazy_latency_log(
+                                prefix="fgl",
+                                base_time_s=self._first_speech_packet_sent_time,
+                                interval_coloring=[
+                                    ((0, 500), "green"),
+                                    ((500, 750), "yellow"),
+                                    ((750, 30000), "red"),
+                                ],
+                            ),
                         )
                         self._first_speech_received = True
 
-                    """
-                    call on_speech callback
-                    """
-                    if self.on_speech is not None:
-                        if inspect.iscoroutinefunction(self.on_speech):
-                            await self.on_speech(base64_audio)
-                        else:
-                            self.on_speech(base64_audio)
+                    self._record_audio_received(base64_audio)
+                    # (captured as received, the delivery queue may drop chunks)
+                    if self._speech_capture is not None:
+                        self._speech_capture.append(base64_audio)
+                    if self.delivery_queue is not None:
+                        await self.delivery_queue.put(base64_audio)
+                    else:
+                        await self._deliver_speech(base64_audio)
+
+                if data is not None:
+                    self._acknowledge_text(data)
 
                 """
                 if final chunk, stop listening
                 """
-                is_final = data.get("isFinal", False)
                 if is_final:
+                    self._record_generation_throughput()
+                    self._record_playback_stall()
+                    if self.delivery_queue is not None:
+                        await self.delivery_queue.drain()  # complete = all audio delivered
+
                     self._generation_complete = True
+                    _resolve_future(self._complete_future)
                     break
             except websockets.exceptions.ConnectionClosed as e:
-                logger.error(f"connection closed while listening: {e}")
+                if await self._recover_connection(reason=e):
+                    continue
 
                 return
+            except Exception as e:
+                # (e.g. an unparseable frame, or on_speech / pcm_buffer raising)
+                logger.error(f"listener failed: {e}")
+                self._fail_pending_futures(VoiceboxError(f"listener failed: {e}"))
+
+                return
+
+    async def _deliver_speech(self, base64_audio: str):
+        """
+        call on_speech callback
+        """
+        if self.on_speech is not None:
+            if self.delivery_queue is not None:
+                await self.delivery_queue.invoke(self.on_speech, base64_audio)
+            elif inspect.iscoroutinefunction(self.on_speech):
+                await self.on_speech(base64_audio)
+            else:
+                self.on_speech(base64_audio)
 
-            await asyncio.sleep(0.005)  # 5ms
+        if self.pcm_buffer is not None:
+            self.pcm_buffer.write_base64(base64_audio)
+
+        """
+        hand decoded pcm to stream() (waits if the consumer is behind)
+        """
+        if self._stream_queue is not None:
+            await self._stream_queue.put(base64.b64decode(base64_audio))
+
+    ### recovery
+
+    async def _recover_connection(self, reason: Exception) -> bool:
+        """
+        the socket dropped mid-generation: reconnect (warm socket if pooled) &
+        replay the text that never came back as audio, within the retry budget.
+        returns False (w/ the pending futures failed) once the budget is spent.
+        """
+        if self.reconnect is None:
+            logger.error(f"connection closed while listening: {reason}")
+            self._fail_pending_futures(
+                VoiceboxConnectionError(f"connection closed while listening: {reason}")
+            )
+
+            return False
+
+        logger.warning(f"connection closed while listening, reconnecting: {reason}")
+        reconnect_start_time = time.time()
+        self._reconnecting = True
+
+        try:
+            while True:
+                if self._reconnect_attempts >= self.reconnect["max_attempts"]:
+                    logger.error(f"giving up after {self._reconnect_attempts} reconnects")
+                    self._fail_pending_futures(
+                        VoiceboxConnectionError(
+                            f"connection closed while listening, gave up after "
+                            f"{self._reconnect_attempts} reconnect attempts: {reason}"
+                        )
+                    )
+
+                    return False
+
+                if self._reconnect_attempts > 0:
+                    await asyncio.sleep(
+                        self.reconnect["backoff_s"] * 2 ** (self._reconnect_attempts - 1)
+                    )
+                self._reconnect_attempts += 1
+
+                try:
+                    await self._reopen_websocket()
+                    await self._replay_unacknowledged_text()
+
+                    break
+                except Exception as e:
+                    logger.error(f"reconnect attempt {self._reconnect_attempts} failed: {e}")
+                    reason = e
+        finally:
+            self._reconnecting = False
+
+        self._record_timing("reconnect_ms", base_time_s=reconnect_start_time)
+        logger.debug("● reconnected (total {:.0f}ms)", self._timings["reconnect_ms"])
+
+        return True
+
+    async def _reopen_websocket(self):
+        self._websocket = None  # (already closed)
+
+        if self.pool is not None:
+            await self._acquire_pooled_websocket()
+        else:
+            await self._connect_to_websocket()
+            await self._websocket.send(self._bos_payload())
+
+    async def _replay_unacknowledged_text(self):
+        """
+        text fed while this runs is only recorded, the loop picks it up. the
+        last check & clearing `_reconnecting` happen w/o an await in between,
+        so nothing falls through the gap.
+        """
+        replayed_until = self._replay_start()
+        self._acknowledged_chars = replayed_until  # the new socket aligns from here
+
+        while replayed_until < self._sent_chars:
+            text = "".join(self._sent_chunks)[replayed_until:]
+            replayed_until += len(text)
+
+            if text.strip():
+                logger.debug(f"replaying {len(text)} chars")
+                await self._websocket.send(self._speech_text_payload(text))
+
+        if self._eos_requested:
+            await self._websocket.send(self._eos_payload())
+
+    def _replay_start(self) -> int:
+        """
+        first unacknowledged char, moved back to the start of a partially spoken word
+        """
+        sent_text = "".join(self._sent_chunks)
+        position = min(self._acknowledged_chars, len(sent_text))
+
+        if 0 < position < len(sent_text) and not sent_text[position].isspace():
+            while position > 0 and not sent_text[position - 1].isspace():
+                position -= 1
+
+        return position
+
+    def _acknowledge_text(self, data: dict):
+        alignment = data.get("alignment")
+        if alignment:
+            self._acknowledged_chars += len(alignment.get("chars") or ())
+
+    async def _teardown_routine(self, websocket, tasks):
+        for task in tasks:
+            if task is not None:
+                try:
+                    await task
+                except BaseException:
+                    pass  # cancelled (or already failed), nothing left to clean up
+
+        if websocket is not None:
+            try:
+                await websocket.close()  # no EOS, closing drops the generation
+            except Exception as e:
+                logger.error(f"failed to close interrupted socket: {e}")
 
     async def _stop_listening_on_socket(self):
         if not self._is_listening():
@@ -316,6 +827,13 @@ class Voicebox:
     def _is_listening(self):
         return self._listening and self._websocket_listen_task is not None
 
+    def _listener_running(self):
+        return (
+            self._sequence_start_sent
+            and self._is_listening()
+            and not self._websocket_listen_task.task.done()
+        )
+
     # packets
 
     ## sending
@@ -325,8 +843,33 @@ class Voicebox:
 
         await self._send_ws_payload(p=payload)
 
-    async def _send_speech_chunk_payload(self, text: str):
-        payload = self._speech_chunk_payload(text=text)
+    async def _send_speech_text(self, text: str):
+        if self.reconnect is not None:
+            # exactly what the chunk payload carries, so alignment offsets line up
+            self._sent_chunks.append(text + " ")
+            self._sent_chars += len(text) + 1
+
+        self._text_chars_fed += len(text) + 1
+        self._chars_since_flush += len(text) + 1
+        flush = self.tuner is not None and self.tuner.should_flush(
+            self.voice_id, text, chars_since_flush=self._chars_since_flush
+        )
+        if flush:
+            self._chars_since_flush = 0
+
+        if not self._reconnecting:
+            await self._send_speech_chunk_payload(text=text, flush=flush)
+
+        """
+        clock first (& last) speech sent time
+        """
+        self._last_speech_packet_sent_time = time.time()
+        if not self._first_speech_sent:
+            self._first_speech_sent = True
+            self._first_speech_packet_sent_time = self._last_speech_packet_sent_time
+
+    async def _send_speech_chunk_payload(self, text: str, flush: bool = False):
+        payload = self._speech_chunk_payload(text=text, flush=flush)
 
         await self._send_ws_payload(p=payload)
 
@@ -338,11 +881,15 @@ class Voicebox:
     async def _send_ws_payload(self, p: str):
         try:
             await self._websocket.send(p)
-        except websockets.exceptions.ConnectionClosedError:
+        except websockets.exceptions.ConnectionClosedError as e:
             """
-            20s+ of inactivity will lead socket to close
+            dropped (e.g. 20s+ of inactivity will lead socket to close), w/
+            reconnect on the listener recovers & replays the unsent text
             """
-            logger.error(f"connection timed-out (closed)")
+            if self.reconnect is not None:
+                logger.debug(f"send failed, connection dropped ({e})")
+            else:
+                logger.error(f"connection closed: {e}")
 
             return
         except websockets.exceptions.ConnectionClosedOK:
@@ -363,11 +910,37 @@ class Voicebox:
             text=" ", include_voice_settings=True, include_generation_config=True
         )
 
-    def _speech_chunk_payload(self, text: str) -> str:
-        return self._ws_payload(text=text + " ", try_trigger_generation=True)
+    def _speech_chunk_payload(self, text: str, flush: bool = False) -> str:
+        if flush:
+            return (
+                self._speech_flush_payload_prefix
+                + fastjson.dumps_str(text + " ")
+                + self._speech_flush_payload_suffix
+            )
+
+        return self._speech_text_payload(text + " ")
+
+    def _speech_text_payload(self, text: str) -> str:
+        # (text as-is, w/o the trailing space chunks get)
+        return (
+            self._speech_chunk_payload_prefix
+            + fastjson.dumps_str(text)
+            + self._speech_chunk_payload_suffix
+        )
 
     def _eos_payload(self) -> str:  # EOS → "end-of-sequence"
-        return self._ws_payload(text="")
+        return self._eos_payload_str
+
+    def _speech_chunk_payload_template(self, flush: bool = None):
+        """
+        (prefix, suffix) around the encoded text of a speech chunk payload,
+        rendered once through _ws_payload so the layout can't drift
+        """
+        placeholder = "\0text\0"
+        payload = self._ws_payload(text=placeholder, try_trigger_generation=True, flush=flush)
+        prefix, suffix = payload.split(fastjson.dumps_str(placeholder))
+
+        return prefix, suffix
 
     def _ws_payload(
         self,
@@ -391,30 +964,41 @@ class Voicebox:
         if include_generation_config:
             fields["generation_config"] = {}
 
-            fields["generation_config"]["chunk_length_schedule"] = [50]
+            fields["generation_config"]["chunk_length_schedule"] = self._chunk_length_schedule()
 
-        return json.dumps(
+        return fastjson.dumps(
             {
                 **fields,
                 "xi_api_key": elevenlabs_api_key,
             }
         )
 
+    def _chunk_length_schedule(self) -> list:
+        if self.tuner is not None:
+            return self.tuner.chunk_length_schedule(self.voice_id)
+
+        return [50]
+
     # url
 
     def _get_websocket_url(self):
-        eleven_labs_websocket_url = "wss://api.elevenlabs.io/v1/text-to-speech/{voice_id}/stream-input?model_id={model_id}&optimize_streaming_latency={optimize_streaming_latency}&output_format={output_format}"
+        # (sync_alignment → every audio frame carries the `alignment` replay tracks progress by)
+        eleven_labs_websocket_url = "{base_url}/v1/text-to-speech/{voice_id}/stream-input?model_id={model_id}&optimize_streaming_latency={optimize_streaming_latency}&output_format={output_format}&sync_alignment=true"
 
         return eleven_labs_websocket_url.format(
+            base_url=self.base_url,
             model_id=tts_model_id,
             voice_id=self.voice_id,
             optimize_streaming_latency=tts_options["optimize_streaming_latency"],
-            output_format=tts_options["output_format"],
+            output_format=self.output_format,
         )
 
     # variables
 
     def _reset_connection_state_vars(self):
+        if self.text_coalescer is not None:
+            self.text_coalescer.clear()
+
         self._websocket = None
         self._sequence_start_sent = False
         self._listening = False
@@ -427,6 +1011,118 @@ class Voicebox:
 
         self._speech_generation_start_time = None
         self._first_speech_packet_sent_time = None
+        self._bos_sent_time = None
+        self._last_audio_received_time = None
+        self._audio_bytes_received = 0
+        self._playout_end_time = None
+        self._stall_ms = 0.0
+        self._text_chars_fed = 0
+        self._chars_since_flush = 0
+        self._last_speech_packet_sent_time = None
+
+        self._sent_chunks = []
+        self._sent_chars = 0
+        self._acknowledged_chars = 0
+        self._eos_requested = False
+        self._reconnecting = False
+        self._reconnect_attempts = 0
+
+    # futures
+
+    async def _wait_for(self, future: asyncio.Future, timeout: float = None):
+        if future is None:
+            raise VoiceboxError("voicebox not prepared (call prepare() first)")
+
+        # shield so a caller's timeout/cancellation doesn't cancel the shared future
+        await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+
+    def _fail_pending_futures(self, error: VoiceboxError):
+        for future in [self._ready_future, self._complete_future]:
+            if future is not None and not future.done():
+                future.set_exception(error)
+
+    # timing
+
+    def _record_timing(self, name: str, base_time_s: float):
+        if base_time_s is None:
+            return
+
+        self._timings[name] = (time.time() - base_time_s) * 1000
+        self.metrics.observe(f"voicebox_{name}", self._timings[name], voice_id=self.voice_id)
+
+    def _record_connect_breakdown(self):
+        connect_timings = getattr(self._websocket, "connect_timings", None)
+        if connect_timings is None:
+            return  # plain websockets.connect
+
+        for phase in CONNECT_PHASES:
+            self._timings[phase] = connect_timings[phase]
+            self.metrics.observe(
+                f"voicebox_{phase}", connect_timings[phase], voice_id=self.voice_id
+            )
+
+    def _record_audio_received(self, base64_audio: str):
+        now = time.time()
+        if self._last_audio_received_time is not None:
+            self.metrics.observe(
+                "voicebox_inter_chunk_gap_ms",
+                (now - self._last_audio_received_time) * 1000,
+                voice_id=self.voice_id,
+            )
+        self._last_audio_received_time = now
+
+        # decoded size w/o decoding
+        padding = len(base64_audio) - len(base64_audio.rstrip("="))
+        audio_bytes = len(base64_audio) * 3 // 4 - padding
+        self._audio_bytes_received += audio_bytes
+
+        # playback stalls, as if audio were played out as it arrives
+        if self._bytes_per_second is not None:
+            if self._playout_end_time is None or now > self._playout_end_time:
+                if self._playout_end_time is not None:
+                    self._stall_ms += (now - self._playout_end_time) * 1000
+                self._playout_end_time = now
+
+            self._playout_end_time += audio_bytes / self._bytes_per_second
+
+    def _record_playback_stall(self):
+        if self._bytes_per_second is None or not self._first_speech_received:
+            return
+
+        self._timings["stall_ms"] = self._stall_ms
+        self.metrics.observe("voicebox_stall_ms", self._stall_ms, voice_id=self.voice_id)
+
+        if self.tuner is not None and "fgl_ms" in self._timings:
+            feeding_s = self._last_speech_packet_sent_time - self._first_speech_packet_sent_time
+            self.tuner.observe(
+                self.voice_id,
+                fgl_ms=self._timings["fgl_ms"],
+                stall_ms=self._stall_ms,
+                text_chars_per_s=self._text_chars_fed / feeding_s if feeding_s > 0.05 else None,
+            )
+
+    def _record_generation_throughput(self):
+        if self._first_speech_packet_sent_time is None or self._audio_bytes_received == 0:
+            return
+
+        elapsed_s = time.time() - self._first_speech_packet_sent_time
+        if elapsed_s <= 0:
+            return
+
+        self.metrics.observe(
+            "voicebox_audio_bytes_per_second",
+            self._audio_bytes_received / elapsed_s,
+            voice_id=self.voice_id,
+        )
+
+        bytes_per_second = _bytes_per_second_for_output_format(self.output_format)
+        if bytes_per_second is None:
+            return  # compressed (mp3), duration isn't derivable from the size
+
+        audio_s = self._audio_bytes_received / bytes_per_second
+        self.metrics.observe(
+            "voicebox_real_time_factor", elapsed_s / audio_s, voice_id=self.voice_id
+        )
 
     ########################
     # other
@@ -451,3 +1147,72 @@ class Voicebox:
         )
 
         play(audio)
+
+
+########################
+# helpers
+########################
+
+
+def _bytes_per_second_for_output_format(output_format: str) -> int:
+    # e.g. pcm_44100 (16-bit mono), ulaw_8000 (8-bit mono), mp3_44100_128 (unknown)
+    encoding, sample_rate = output_format.split("_")[:2]
+    if encoding == "pcm":
+        return int(sample_rate) * 2
+    elif encoding == "ulaw":
+        return int(sample_rate)
+
+    return None
+
+
+def _describe_metrics(registry: MetricsRegistry):
+    for name, help in [
+        ("voicebox_connect_ms", "websocket connect (or pool acquire) time"),
+        ("voicebox_dns_ms", "connect: address lookup (~0 when cached)"),
+        ("voicebox_tcp_ms", "connect: tcp handshake"),
+        ("voicebox_tls_ms", "connect: tls handshake (shorter when the session was resumed)"),
+        ("voicebox_upgrade_ms", "connect: websocket http upgrade"),
+        ("voicebox_bos_to_ready_ms", "BOS sent → ready for speech"),
+        ("voicebox_fgl_ms", "first speech sent → first audio received"),
+        ("voicebox_totelap_ms", "prepare() → first audio received"),
+        ("voicebox_inter_chunk_gap_ms", "time between consecutive audio frames"),
+        ("voicebox_reset_ms", "reset() duration"),
+        ("voicebox_interrupt_to_silence_ms", "interrupt() → no more audio delivered"),
+        ("voicebox_reconnect_ms", "socket dropped → reconnected & unanswered text replayed"),
+        ("voicebox_stall_ms", "playback lost to gaps per generation (audio played on arrival)"),
+        ("voicebox_delivery_lag_ms", "audio received → handed to on_speech"),
+        ("voicebox_delivery_blocked_ms", "socket reader waiting on a full delivery queue"),
+    ]:
+        registry.describe(name, help)
+
+    registry.describe(
+        "voicebox_audio_bytes_per_second",
+        "decoded audio bytes received per second of generation",
+        buckets=exponential_buckets(start=1000, factor=1.25, count=60),
+    )
+    registry.describe(
+        "voicebox_real_time_factor",
+        "generation time / audio duration (< 1 is faster than real time)",
+        buckets=exponential_buckets(start=0.001, factor=1.1, count=120),
+    )
+
+
+def _new_future() -> asyncio.Future:
+    future = asyncio.get_running_loop().create_future()
+
+    # mark exceptions as retrieved, callers that never await shouldn't get warnings
+    future.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+    return future
+
+
+def _resolve_future(future: asyncio.Future):
+    if future is not None and not future.done():
+        future.set_result(None)
+
+
+def _settle_future(future: asyncio.Future, error: BaseException = None):
+    if error is None:
+        _resolve_future(future)
+    elif not future.done():
+        future.set_exception(error)
@@ -0,0 +1,285 @@
+import time
+import asyncio
+import itertools
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterable, AsyncIterator, Deque, Dict
+
+from src.helpers.logging import LoggerFactory
+from src.voicebox.Voicebox import Voicebox, OnSpeech, elevenlabs_base_url
+from src.voicebox.VoiceboxPool import VoiceboxPool
+
+logger = LoggerFactory.get_logger(namespace="voicebox_manager", color="purple")
+
+PRIORITY_INTERACTIVE = 0  # live conversational turns, always scheduled first
+PRIORITY_BACKGROUND = 1  # pre-rendering, cache fills, etc.
+
+STATE_QUEUED = "queued"
+STATE_CONNECTING = "connecting"
+STATE_ACTIVE = "active"
+
+
+class _Session:
+    def __init__(self, session_id: str, tenant: str, priority: int):
+        self.session_id = session_id
+        self.tenant = tenant
+        self.priority = priority
+        self.state = STATE_QUEUED
+        self.queued_at = time.monotonic()
+        self.started_at: float = None
+
+        self.granted: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class VoiceboxManager:
+    """
+    runs many Voicebox sessions on one event loop w/ bounded concurrency.
+
+    at most `max_concurrent` sessions hold a socket (connecting or active) at
+    once, & optionally at most `max_per_tenant` per tenant. waiting sessions
+    are granted slots by priority lane first (interactive before background),
+    then round-robin across tenants within a lane so a burst from one tenant
+    can't starve the others.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 64,
+        max_per_tenant: int = None,
+        pool: VoiceboxPool = None,
+        base_url: str = elevenlabs_base_url,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_per_tenant = max_per_tenant
+        self.pool = pool
+        self.base_url = base_url
+
+        # internal
+        self._sessions: Dict[str, _Session] = {}
+        self._running_per_tenant: Dict[str, int] = {}
+        self._running = 0
+
+        ## per priority lane: tenant → waiting sessions, & the tenant round-robin order
+        self._waiting: Dict[int, Dict[str, Deque[_Session]]] = {}
+        self._tenant_rotation: Dict[int, Deque[str]] = {}
+
+        self._session_ids = itertools.count()
+
+        ## stats
+        self._granted = 0
+        self._queue_wait_ms_total = 0.0
+        self._queue_wait_ms_max = 0.0
+
+    """
+    api
+    """
+
+    @asynccontextmanager
+    async def session(
+        self,
+        voice_id: str,
+        on_speech: OnSpeech = None,
+        *,
+        tenant: str = "default",
+        priority: int = PRIORITY_INTERACTIVE,
+        session_id: str = None,
+        speech_generation_start_time: float = None,
+        **voicebox_kwargs,
+    ):
+        """
+        waits for a slot, then yields a prepared (ready) Voicebox. the voicebox
+        is reset & the slot released when the block exits.
+        """
+        session = await self._acquire_slot(
+            session_id=session_id or f"session-{next(self._session_ids)}",
+            tenant=tenant,
+            priority=priority,
+        )
+
+        voicebox = Voicebox(
+            voice_id=voice_id,
+            on_speech=on_speech,
+            pool=self.pool,
+            base_url=self.base_url,
+            **voicebox_kwargs,
+        )
+
+        try:
+            voicebox.prepare(
+                speech_generation_start_time=speech_generation_start_time or time.time()
+            )
+            await voicebox.wait_ready()
+            session.state = STATE_ACTIVE
+
+            yield voicebox
+        finally:
+            await voicebox.reset()
+            self._release_slot(session)
+
+    async def stream(
+        self,
+        voice_id: str,
+        text_source: AsyncIterable[str],
+        *,
+        tenant: str = "default",
+        priority: int = PRIORITY_INTERACTIVE,
+        session_id: str = None,
+        **voicebox_kwargs,
+    ) -> AsyncIterator[bytes]:
+        """
+        Voicebox.stream() inside a managed session
+        """
+        speech_generation_start_time = time.time()  # clock from the request, not the grant
+
+        async with self.session(
+            voice_id=voice_id,
+            tenant=tenant,
+            priority=priority,
+            session_id=session_id,
+            speech_generation_start_time=speech_generation_start_time,
+            **voicebox_kwargs,
+        ) as voicebox:
+            async for pcm in voicebox.stream(text_source):
+                yield pcm
+
+    # state
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        counts = {STATE_QUEUED: 0, STATE_CONNECTING: 0, STATE_ACTIVE: 0}
+        tenants: Dict[str, Dict[str, int]] = {}
+
+        for session in self._sessions.values():
+            counts[session.state] += 1
+
+            tenant_counts = tenants.setdefault(
+                session.tenant, {STATE_QUEUED: 0, STATE_CONNECTING: 0, STATE_ACTIVE: 0}
+            )
+            tenant_counts[session.state] += 1
+
+        return {
+            **counts,
+            "max_concurrent": self.max_concurrent,
+            "tenants": tenants,
+            "sessions": [
+                {
+                    "session_id": session.session_id,
+                    "tenant": session.tenant,
+                    "priority": session.priority,
+                    "state": session.state,
+                    "age_ms": round((now - session.queued_at) * 1000, 3),
+                }
+                for session in self._sessions.values()
+            ],
+            "granted": self._granted,
+            "queue_wait_ms_avg": (
+                round(self._queue_wait_ms_total / self._granted, 3) if self._granted else 0.0
+            ),
+            "queue_wait_ms_max": round(self._queue_wait_ms_max, 3),
+        }
+
+    ########################
+    # scheduling
+    ########################
+
+    async def _acquire_slot(self, session_id: str, tenant: str, priority: int) -> _Session:
+        if session_id in self._sessions:
+            raise ValueError(f"session already exists: {session_id}")
+
+        session = _Session(session_id=session_id, tenant=tenant, priority=priority)
+        self._sessions[session_id] = session
+
+        lane = self._waiting.setdefault(priority, {})
+        rotation = self._tenant_rotation.setdefault(priority, deque())
+        if tenant not in lane:
+            lane[tenant] = deque()
+            rotation.append(tenant)
+        lane[tenant].append(session)
+
+        self._grant_slots()
+
+        try:
+            await session.granted
+        except asyncio.CancelledError:
+            if session.granted.cancelled():  # still waiting, leave the queue
+                self._remove_waiting(session)
+                del self._sessions[session_id]
+            else:
+                self._release_slot(session)
+
+            raise
+
+        return session
+
+    def _release_slot(self, session: _Session):
+        if self._sessions.pop(session.session_id, None) is None:
+            return
+
+        self._running -= 1
+        self._running_per_tenant[session.tenant] -= 1
+
+        self._grant_slots()
+
+    def _grant_slots(self):
+        while self._running < self.max_concurrent:
+            session = self._next_waiting()
+            if session is None:
+                return
+
+            self._running += 1
+            self._running_per_tenant[session.tenant] = (
+                self._running_per_tenant.get(session.tenant, 0) + 1
+            )
+            session.state = STATE_CONNECTING
+            session.started_at = time.monotonic()
+            self._record_queue_wait(session)
+
+            session.granted.set_result(None)
+
+    def _next_waiting(self) -> _Session:
+        for priority in sorted(self._waiting):
+            lane = self._waiting[priority]
+            rotation = self._tenant_rotation[priority]
+
+            # one full turn of the round-robin at most
+            for _ in range(len(rotation)):
+                tenant = rotation.popleft()
+
+                if self._tenant_at_capacity(tenant):
+                    rotation.append(tenant)
+
+                    continue
+
+                session = lane[tenant].popleft()
+                if lane[tenant]:
+                    rotation.append(tenant)  # back of the line
+                else:
+                    del lane[tenant]
+
+                return session
+
+        return None
+
+    def _remove_waiting(self, session: _Session):
+        lane = self._waiting.get(session.priority, {})
+        waiting = lane.get(session.tenant)
+        if waiting is None or session not in waiting:
+            return
+
+        waiting.remove(session)
+        if not waiting:
+            del lane[session.tenant]
+            self._tenant_rotation[session.priority].remove(session.tenant)
+
+    def _tenant_at_capacity(self, tenant: str) -> bool:
+        if self.max_per_tenant is None:
+            return False
+
+        return self._running_per_tenant.get(tenant, 0) >= self.max_per_tenant
+
+    def _record_queue_wait(self, session: _Session):
+        wait_ms = (session.started_at - session.queued_at) * 1000
+
+        self._granted += 1
+        self._queue_wait_ms_total += wait_ms
+        self._queue_wait_ms_max = max(self._queue_wait_ms_max, wait_ms)
@@ -0,0 +1,271 @@
+import time
+import weakref
+import asyncio
+import websockets
+from collections import deque
+from typing import Deque, Dict, Tuple
+
+from src.helpers.logging import LoggerFactory
+from src.voicebox.connector import WebsocketConnector, websocket_connector
+from src.voicebox.hedging import HedgedConnector
+
+logger = LoggerFactory.get_logger(namespace="voicebox_pool", color="purple")
+
+"""
+(base_url, voice_id, model_id, output_format, chunk_length_schedule)
+"""
+PoolKey = Tuple[str, str, str, str, Tuple[int, ...]]
+
+
+class _WarmSocket:
+    def __init__(self, websocket, warmed_at: float):
+        self.websocket = websocket
+        self.warmed_at = warmed_at  # monotonic time BOS was sent
+
+
+class VoiceboxPool:
+    """
+    keeps `size` websockets per voicebox.connection_key() connected w/ BOS
+    already sent, so prepare() can skip the handshake entirely. the key covers
+    everything in the url & BOS, so a socket is only ever handed to a voicebox
+    that would've opened the exact same one.
+
+    sockets are single-use (EOS closes them), so every acquire() schedules a
+    replacement in the background. ElevenLabs closes sockets after 20s of
+    inactivity, so warm sockets are retired & replaced once `max_idle_s` passes.
+
+    keys no voicebox uses anymore (e.g. the tuner moved its schedule on) aren't
+    topped up, their sockets retire & the key is dropped.
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        max_idle_s: float = 15.0,
+        hedging: HedgedConnector = None,  # optional, for inline connects on a miss
+        connector: WebsocketConnector = websocket_connector,  # None → plain websockets.connect
+    ):
+        self.size = size
+        self.max_idle_s = max_idle_s
+        self.hedging = hedging
+        self.connector = connector
+
+        # internal
+        self._warm: Dict[PoolKey, Deque[_WarmSocket]] = {}
+        self._connecting: Dict[PoolKey, int] = {}
+        self._specs: Dict[PoolKey, Tuple[str, str]] = {}  # key → (url, bos payload)
+        self._voicebox_keys = weakref.WeakKeyDictionary()  # voicebox → its latest key
+        self._background_tasks = set()
+        self._reaper_task: asyncio.Task = None
+        self._closed = False
+
+        ## stats
+        self._hits = 0
+        self._misses = 0
+        self._retired = 0
+        self._connect_failures = 0
+        self._wait_ms_total = 0.0
+        self._wait_ms_max = 0.0
+
+    """
+    api
+    """
+
+    # methods
+
+    async def warm(self, voicebox):
+        """
+        fill the pool for the voicebox's key & wait until all sockets are up
+        """
+        key = self._register(voicebox)
+
+        await asyncio.gather(*self._top_up(key))
+
+    async def acquire(self, voicebox):
+        """
+        returns a connected websocket w/ BOS already sent. served from the pool
+        when a warm socket is available, otherwise connected inline.
+        """
+        key = self._register(voicebox)
+        wait_start_time = time.monotonic()
+
+        websocket = self._pop_warm(key)
+        if websocket is not None:
+            self._hits += 1
+        else:
+            self._misses += 1
+            logger.debug("pool miss, connecting inline")
+
+            websocket = await self._open_socket(key, hedged=True)
+
+        self._record_wait(wait_start_time)
+        self._top_up(key)  # replace the socket we handed out (in background)
+
+        return websocket
+
+    async def close(self):
+        self._closed = True
+
+        if self._reaper_task:
+            self._reaper_task.cancel()
+            self._reaper_task = None
+
+        for task in list(self._background_tasks):
+            task.cancel()
+
+        for warm_sockets in self._warm.values():
+            while warm_sockets:
+                await warm_sockets.popleft().websocket.close()
+
+    # state
+
+    def stats(self) -> dict:
+        acquires = self._hits + self._misses
+
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / acquires if acquires else 0.0,
+            "retired": self._retired,
+            "connect_failures": self._connect_failures,
+            "wait_ms_total": round(self._wait_ms_total, 3),
+            "wait_ms_avg": round(self._wait_ms_total / acquires, 3) if acquires else 0.0,
+            "wait_ms_max": round(self._wait_ms_max, 3),
+            "warm": {key: len(warm_sockets) for key, warm_sockets in self._warm.items()},
+            "connecting": dict(self._connecting),
+        }
+
+    ########################
+    # pool management
+    ########################
+
+    def _register(self, voicebox) -> PoolKey:
+        key = voicebox.connection_key()
+
+        if key not in self._specs:
+            self._warm[key] = deque()
+            self._connecting[key] = 0
+
+            self._specs[key] = (voicebox._get_websocket_url(), voicebox._bos_payload())
+
+        self._voicebox_keys[voicebox] = key
+
+        self._ensure_reaper()
+
+        return key
+
+    def _pop_warm(self, key: PoolKey):
+        warm_sockets = self._warm[key]
+
+        while warm_sockets:
+            warm_socket = warm_sockets.popleft()
+
+            if warm_socket.websocket.open and not self._expired(warm_socket):
+                return warm_socket.websocket
+
+            self._retire(warm_socket)
+
+        return None
+
+    def _top_up(self, key: PoolKey):
+        if self._closed or key not in self._warm:
+            return []
+
+        missing = self.size - len(self._warm[key]) - self._connecting[key]
+
+        return [self._spawn(self._add_warm_socket(key)) for _ in range(max(missing, 0))]
+
+    async def _add_warm_socket(self, key: PoolKey):
+        self._connecting[key] += 1
+
+        try:
+            websocket = await self._open_socket(key)
+        except Exception as e:
+            self._connect_failures += 1
+            logger.error(f"failed to warm socket: {e}")
+
+            return
+        finally:
+            self._connecting[key] -= 1
+
+        if self._closed:
+            await websocket.close()
+
+            return
+
+        self._warm[key].append(_WarmSocket(websocket=websocket, warmed_at=time.monotonic()))
+
+    async def _open_socket(self, key: PoolKey, hedged: bool = False):
+        url, bos_payload = self._specs[key]
+
+        if hedged and self.hedging is not None:
+            # only a caller waiting on it is worth a 2nd handshake, warming isn't
+            websocket = await self.hedging.connect(url)
+        elif self.connector is not None:
+            websocket = await self.connector.connect(url)
+        else:
+            websocket = await websockets.connect(url)
+        await websocket.send(bos_payload)
+
+        return websocket
+
+    ## retiring
+
+    def _ensure_reaper(self):
+        if self._reaper_task is None and not self._closed:
+            self._reaper_task = asyncio.create_task(self._reaper_routine())
+
+    async def _reaper_routine(self):
+        interval_s = min(1.0, self.max_idle_s / 4)
+
+        while True:
+            await asyncio.sleep(interval_s)
+
+            keys_in_use = set(self._voicebox_keys.values())
+
+            for key, warm_sockets in list(self._warm.items()):
+                kept = deque()
+                while warm_sockets:
+                    warm_socket = warm_sockets.popleft()
+
+                    if warm_socket.websocket.open and not self._expired(warm_socket):
+                        kept.append(warm_socket)
+                    else:
+                        self._retire(warm_socket)
+
+                warm_sockets.extend(kept)
+
+                if key in keys_in_use:
+                    self._top_up(key)
+                elif not warm_sockets and not self._connecting[key]:
+                    self._forget(key)
+
+    def _expired(self, warm_socket: _WarmSocket) -> bool:
+        return time.monotonic() - warm_socket.warmed_at >= self.max_idle_s
+
+    def _retire(self, warm_socket: _WarmSocket):
+        self._retired += 1
+        self._spawn(warm_socket.websocket.close())
+
+    def _forget(self, key: PoolKey):
+        del self._warm[key]
+        del self._connecting[key]
+        del self._specs[key]
+
+    ########################
+    # helpers
+    ########################
+
+    def _spawn(self, coroutine) -> asyncio.Task:
+        # keep a strong reference so background tasks aren't garbage collected
+        task = asyncio.create_task(coroutine)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+        return task
+
+    def _record_wait(self, wait_start_time: float):
+        wait_ms = (time.monotonic() - wait_start_time) * 1000
+
+        self._wait_ms_total += wait_ms
+        self._wait_ms_max = max(self._wait_ms_max, wait_ms)
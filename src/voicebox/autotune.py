@@ -0,0 +1,269 @@
+import os
+import math
+import json
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+from src.helpers.logging import LoggerFactory
+
+logger = LoggerFactory.get_logger(namespace="chunk_schedule_tuner", color="purple")
+
+SENTENCE_END_CHARS = ".!?\n"
+
+
+class ChunkScheduleTuner:
+    """
+    learns each voice's `chunk_length_schedule` & sentence-boundary flushes
+    from the generations it runs.
+
+    a smaller first chunk (or flushing a short first sentence) gets the first
+    audio back sooner, but leaves less audio out ahead of the text still to
+    come, so playback can stall (audio runs out before the next chunk
+    arrives). where the balance lies depends on the voice & on how fast text
+    (llm tokens) comes in, so it's tuned per voice, from each generation's:
+
+    - fgl_ms: first speech sent → first audio received
+    - stall_ms: playback time lost to gaps, w/ audio played out as it arrives
+    - text_chars_per_s: how fast text was fed
+
+    the first chunk length & the flush threshold are hill-climbed on
+    `fgl_ms + stall_weight * stall_ms`, one at a time: a generation at the
+    current settings (the baseline), then one w/ a knob moved by `step`.
+    the move is kept if it beat the baseline (or tied it, going lower),
+    otherwise it's undone & that knob tries the other direction next time.
+    every other generation is a probe, so the settings keep following a
+    changing llm / voice.
+
+    steady chunks follow the (averaged) text rate instead: as long as the
+    server would wait `steady_fill_s` for text, so a fast llm gets long
+    generations (better prosody, fewer of them) & a slow one isn't left
+    waiting. they're only updated between probes, so each baseline & probe
+    pair differs in the probed knob alone (text fed all at once leaves the
+    rate as it was).
+
+    schedule sent in BOS: [first, (first + steady) / 2, steady]. a chunk
+    ending a sentence is sent w/ `flush` once `flush_min_chars` have been
+    sent since the last flush. learned settings are saved to `path` (json).
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path] = None,  # None keeps the settings in memory only
+        first_bounds: Tuple[int, int] = (50, 300),  # ElevenLabs accepts 50-500
+        steady_bounds: Tuple[int, int] = (50, 500),
+        flush_bounds: Tuple[int, int] = (1, 400),
+        initial_first: int = 50,  # starts out as the untuned [50] schedule
+        initial_steady: int = 50,
+        initial_flush_min_chars: int = 60,
+        stall_weight: float = 2.0,  # a stall mid-speech is worse than waiting up front
+        steady_fill_s: float = 1.0,
+        step: float = 0.25,
+        min_gain: float = 0.02,  # a probe has to beat the baseline by this fraction
+        smoothing: float = 0.3,  # weight of the newest observation in the averages
+    ):
+        self.path = Path(path) if path is not None else None
+        self.bounds = {"first": first_bounds, "flush_min_chars": flush_bounds}
+        self.steady_bounds = steady_bounds
+        self.initial_first = initial_first
+        self.initial_steady = initial_steady
+        self.initial_flush_min_chars = initial_flush_min_chars
+        self.stall_weight = stall_weight
+        self.steady_fill_s = steady_fill_s
+        self.step = step
+        self.min_gain = min_gain
+        self.smoothing = smoothing
+
+        # internal
+        self._voices: Dict[str, dict] = {}
+
+        if self.path is not None and self.path.exists():
+            self._load()
+
+    """
+    api
+    """
+
+    def chunk_length_schedule(self, voice_id: str) -> List[int]:
+        settings = self._settings(voice_id)
+        first, steady = round(settings["first"]), round(settings["steady"])
+
+        return [first, (first + steady) // 2, steady]
+
+    def flush_min_chars(self, voice_id: str) -> int:
+        return round(self._settings(voice_id)["flush_min_chars"])
+
+    def should_flush(self, voice_id: str, text: str, chars_since_flush: int) -> bool:
+        """
+        (text: the chunk about to be sent, already counted in chars_since_flush)
+        """
+        return (
+            bool(text)
+            and text.rstrip(" ")[-1:] in SENTENCE_END_CHARS
+            and chars_since_flush >= self.flush_min_chars(voice_id)
+        )
+
+    def observe(
+        self, voice_id: str, fgl_ms: float, stall_ms: float, text_chars_per_s: float = None
+    ):
+        """
+        one finished generation (text_chars_per_s: None when all text came at once)
+        """
+        if not (math.isfinite(fgl_ms) and math.isfinite(stall_ms)):
+            logger.error(f"ignoring generation w/ fgl {fgl_ms}ms, stall {stall_ms}ms")
+
+            return
+
+        settings = self._settings(voice_id)
+        settings["generations"] += 1
+        settings["stalled_generations"] += stall_ms > 0
+        settings["fgl_ms_avg"] = self._average(settings["fgl_ms_avg"], fgl_ms)
+        settings["stall_ms_avg"] = self._average(settings["stall_ms_avg"], stall_ms)
+        # (a burst says nothing about the text rate, the average is left as it was)
+        settings["text_chars_per_s_avg"] = self._average(
+            settings["text_chars_per_s_avg"], text_chars_per_s
+        )
+
+        cost = fgl_ms + self.stall_weight * stall_ms
+        probe = settings["probe"]
+
+        if probe is None:
+            settings["cost"] = cost
+            self._start_probe(settings)
+        else:
+            knob = probe["knob"]
+            improved = cost < settings["cost"] * (1 - self.min_gain)
+            # on a plateau, lower (more responsive) settings win the tie
+            lowered_for_free = (
+                settings[knob] < probe["from"] and cost <= settings["cost"] * (1 + self.min_gain)
+            )
+
+            if improved or lowered_for_free:
+                settings["cost"] = cost  # the new baseline
+            else:
+                settings[knob] = probe["from"]
+                settings["directions"][knob] *= -1
+
+            settings["probe"] = None
+            if settings["text_chars_per_s_avg"] is not None:
+                settings["steady"] = self._clamp(
+                    settings["text_chars_per_s_avg"] * self.steady_fill_s, self.steady_bounds
+                )
+
+        logger.opt(lazy=True).debug(
+            "{}: fgl {:.0f}ms, stall {:.0f}ms → schedule {}, flush ≥ {} chars",
+            lambda: voice_id,
+            lambda: fgl_ms,
+            lambda: stall_ms,
+            lambda: self.chunk_length_schedule(voice_id),
+            lambda: self.flush_min_chars(voice_id),
+        )
+
+        self.save()
+
+    def save(self):
+        """
+        written to a temp file & swapped in, so a crash never leaves partial json
+        """
+        if self.path is None:
+            return
+
+        temp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        temp_path.write_text(json.dumps(self._voices, indent=2, sort_keys=True))
+        os.replace(temp_path, self.path)
+
+    def reset(self, voice_id: str = None):
+        """
+        forget what was learned (for one voice, or all)
+        """
+        if voice_id is None:
+            self._voices.clear()
+        else:
+            self._voices.pop(voice_id, None)
+
+        self.save()
+
+    # state
+
+    def stats(self) -> dict:
+        return {
+            voice_id: {
+                **settings,
+                "chunk_length_schedule": self.chunk_length_schedule(voice_id),
+            }
+            for voice_id, settings in self._voices.items()
+        }
+
+    ########################
+    # helpers
+    ########################
+
+    def _settings(self, voice_id: str) -> dict:
+        if voice_id not in self._voices:
+            self._voices[voice_id] = {
+                "first": float(self.initial_first),
+                "steady": float(self.initial_steady),
+                "flush_min_chars": float(self.initial_flush_min_chars),
+                "directions": {knob: -1 for knob in self.bounds},  # start out probing lower
+                "next_knob": 0,
+                "probe": None,  # {knob, from} while a moved knob is being tried
+                "cost": None,  # the last baseline's cost
+                "generations": 0,
+                "stalled_generations": 0,
+                "fgl_ms_avg": None,
+                "stall_ms_avg": None,
+                "text_chars_per_s_avg": None,
+            }
+
+        return self._voices[voice_id]
+
+    def _start_probe(self, settings: dict):
+        knobs = list(self.bounds)
+
+        for _ in range(len(knobs)):
+            knob = knobs[settings["next_knob"] % len(knobs)]
+            settings["next_knob"] = (settings["next_knob"] + 1) % len(knobs)
+
+            for _ in range(2):  # at a bound, try the other direction
+                direction = settings["directions"][knob]
+                value = self._clamp(
+                    settings[knob] * (1 + direction * self.step), self.bounds[knob]
+                )
+                if round(value) != round(settings[knob]):
+                    settings["probe"] = {"knob": knob, "from": settings[knob]}
+                    settings[knob] = value
+
+                    return
+
+                settings["directions"][knob] *= -1
+
+    def _load(self):
+        try:
+            self._voices = json.loads(self.path.read_text())
+        except (OSError, ValueError) as e:
+            logger.error(f"failed to load tuned chunk schedules from {self.path}: {e}")
+            self._voices = {}
+
+        # (files written before non-finite values were rejected may hold NaN / Infinity)
+        for voice_id, settings in list(self._voices.items()):
+            knobs = [settings.get(knob) for knob in ["first", "steady", "flush_min_chars"]]
+            if not all(isinstance(knob, (int, float)) and math.isfinite(knob) for knob in knobs):
+                logger.error(f"dropping invalid tuned chunk schedule for {voice_id}")
+                del self._voices[voice_id]
+
+    def _average(self, average: float, value: float) -> float:
+        """
+        (None or non-finite values are ignored)
+        """
+        if value is None or not math.isfinite(value):
+            return average
+        if average is None:
+            return value
+
+        return average + self.smoothing * (value - average)
+
+    @staticmethod
+    def _clamp(value: float, bounds: Tuple[int, int]) -> float:
+        if math.isnan(value):
+            return float(bounds[0])
+
+        return min(max(value, bounds[0]), bounds[1])
@@ -0,0 +1,129 @@
+import asyncio
+from typing import Awaitable, Callable, List
+
+"""
+text: coalesced speech text to send as one websocket frame
+"""
+SendText = Callable[[str], Awaitable[None]]
+
+FLUSH_REASONS = ["boundary", "size", "deadline", "finish"]
+
+
+class TextCoalescer:
+    """
+    buffers fed speech chunks & sends them as fewer, larger frames.
+
+    chunks are joined w/ a space, so the text the server receives is identical
+    to sending each chunk in its own frame (every chunk payload ends in a space).
+    because of that, whitespace alone isn't a boundary, only punctuation is.
+
+    a frame is sent when:
+    - boundary: a chunk ends in one of `boundary_chars`
+    - size: `min_chars` or more are buffered
+    - deadline: the oldest buffered chunk has waited `max_delay_ms`
+    - finish: flush() is called (e.g. before EOS)
+    """
+
+    def __init__(
+        self,
+        send_text: SendText,
+        min_chars: int = 24,
+        max_delay_ms: float = 40,
+        boundary_chars: str = ".,!?;:\n",
+    ):
+        self.send_text = send_text
+        self.min_chars = min_chars
+        self.max_delay_ms = max_delay_ms
+        self.boundary_chars = boundary_chars
+
+        # internal
+        self._pending: List[str] = []
+        self._pending_chars = 0
+        self._deadline_handle: asyncio.TimerHandle = None
+        self._deadline_task: asyncio.Task = None
+        self._send_lock = asyncio.Lock()  # keeps frames in order across flush paths
+
+        ## stats
+        self.chunks_in = 0
+        self.frames_out = 0
+        self.flushes = {reason: 0 for reason in FLUSH_REASONS}
+
+    """
+    api
+    """
+
+    async def push(self, text: str):
+        self.chunks_in += 1
+        self._pending.append(text)
+        self._pending_chars += len(text) + 1
+
+        if text and text[-1] in self.boundary_chars:
+            await self._flush(reason="boundary")
+        elif self._pending_chars >= self.min_chars:
+            await self._flush(reason="size")
+        elif self._deadline_handle is None:
+            self._deadline_handle = asyncio.get_running_loop().call_later(
+                self.max_delay_ms / 1000, self._on_deadline
+            )
+
+    async def flush(self):
+        """
+        returns once everything fed so far has been sent, including text a
+        deadline or size flush already took & is still sending
+        """
+        await self._flush(reason="finish")
+
+        deadline_task = self._deadline_task
+        if deadline_task is not None and not deadline_task.done():
+            await asyncio.wait([deadline_task])  # (w/o raising if it was cancelled)
+
+        async with self._send_lock:  # FIFO, so every earlier send has finished
+            pass
+
+    def clear(self):
+        """
+        drop buffered text (e.g. when the voicebox is reset)
+        """
+        self._cancel_deadline()
+        self._pending = []
+        self._pending_chars = 0
+
+        if self._deadline_task is not None and not self._deadline_task.done():
+            self._deadline_task.cancel()  # don't let stale text reach the next socket
+
+    def stats(self) -> dict:
+        return {
+            "chunks_in": self.chunks_in,
+            "frames_out": self.frames_out,
+            "frames_saved": self.chunks_in - self.frames_out - len(self._pending),
+            "flushes": dict(self.flushes),
+        }
+
+    ########################
+    # flushing
+    ########################
+
+    async def _flush(self, reason: str):
+        self._cancel_deadline()
+        if not self._pending:
+            return
+
+        # take the text synchronously, the lock (FIFO) then preserves frame order
+        text = " ".join(self._pending)
+        self._pending = []
+        self._pending_chars = 0
+
+        self.frames_out += 1
+        self.flushes[reason] += 1
+
+        async with self._send_lock:
+            await self.send_text(text)
+
+    def _on_deadline(self):
+        self._deadline_handle = None
+        self._deadline_task = asyncio.create_task(self._flush(reason="deadline"))
+
+    def _cancel_deadline(self):
+        if self._deadline_handle is not None:
+            self._deadline_handle.cancel()
+            self._deadline_handle = None
@@ -0,0 +1,244 @@
+import ssl
+import time
+import socket
+import asyncio
+import websockets
+from typing import Dict, List, Tuple
+from websockets.uri import parse_uri
+from websockets.legacy.client import WebSocketClientProtocol
+
+from src.helpers.logging import LoggerFactory
+
+logger = LoggerFactory.get_logger(namespace="websocket_connector", color="purple")
+
+"""
+(family, type, proto, canonname, sockaddr), as returned by getaddrinfo
+"""
+AddressInfo = Tuple[int, int, int, str, tuple]
+
+CONNECT_PHASES = ["dns_ms", "tcp_ms", "tls_ms", "upgrade_ms"]
+
+
+class WebsocketConnector:
+    """
+    websockets.connect, split into its steps so each can be cut short:
+
+    - dns: resolved addresses are cached per (host, port) for `dns_ttl_s`
+    - tcp: connected here, falling through the resolved addresses in order
+    - tls: one shared SSLContext that resumes the last TLS session per host,
+      so repeat connects skip the full handshake (certificate exchange &
+      key agreement)
+    - upgrade: the websocket http upgrade, done by websockets as usual
+
+    every returned websocket carries `connect_timings` (ms per phase, see
+    CONNECT_PHASES) & `tls_resumed`. share one connector (e.g. the module's
+    `websocket_connector`) so the caches are shared too.
+    """
+
+    def __init__(
+        self,
+        dns_ttl_s: float = 60.0,
+        ssl_context: ssl.SSLContext = None,  # must come from resuming_ssl_context() to resume
+        open_timeout_s: float = 10.0,
+    ):
+        self.dns_ttl_s = dns_ttl_s
+        self.ssl_context = ssl_context or resuming_ssl_context()
+        self.open_timeout_s = open_timeout_s
+
+        # internal
+        self._dns_cache: Dict[Tuple[str, int], Tuple[List[AddressInfo], float]] = {}
+
+        ## stats
+        self.connects = 0
+        self.dns_lookups = 0
+        self.dns_cache_hits = 0
+        self.tls_handshakes = 0
+        self.tls_resumed = 0
+
+    """
+    api
+    """
+
+    async def connect(self, url: str, **connect_kwargs):
+        wsuri = parse_uri(url)
+        start_time = time.monotonic()
+
+        addresses = await asyncio.wait_for(
+            self._resolve(wsuri.host, wsuri.port), timeout=self.open_timeout_s
+        )
+        resolved_time = time.monotonic()
+
+        sock = await asyncio.wait_for(
+            self._open_tcp(wsuri.host, wsuri.port, addresses), timeout=self.open_timeout_s
+        )
+        tcp_connected_time = time.monotonic()
+
+        if wsuri.secure:
+            connect_kwargs.setdefault("ssl", self.ssl_context)
+
+        try:
+            websocket = await websockets.connect(
+                url,
+                sock=sock,
+                create_protocol=_TimedClientProtocol,
+                open_timeout=self.open_timeout_s,
+                **connect_kwargs,
+            )
+        except BaseException:
+            sock.close()
+
+            raise
+
+        connected_time = time.monotonic()
+        transport_ready_time = websocket.transport_ready_time or tcp_connected_time
+
+        websocket.connect_timings = {
+            "dns_ms": (resolved_time - start_time) * 1000,
+            "tcp_ms": (tcp_connected_time - resolved_time) * 1000,
+            "tls_ms": (transport_ready_time - tcp_connected_time) * 1000,
+            "upgrade_ms": (connected_time - transport_ready_time) * 1000,
+        }
+        websocket.tls_resumed = self._remember_tls_session(websocket)
+        self.connects += 1
+
+        return websocket
+
+    def clear(self):
+        """
+        forget cached addresses & tls sessions (e.g. after a network change)
+        """
+        self._dns_cache.clear()
+
+        if isinstance(self.ssl_context, _ResumingSSLContext):
+            self.ssl_context.sessions.clear()
+
+    # state
+
+    def stats(self) -> dict:
+        return {
+            "connects": self.connects,
+            "dns_lookups": self.dns_lookups,
+            "dns_cache_hits": self.dns_cache_hits,
+            "tls_handshakes": self.tls_handshakes,
+            "tls_resumed": self.tls_resumed,
+        }
+
+    ########################
+    # steps
+    ########################
+
+    async def _resolve(self, host: str, port: int) -> List[AddressInfo]:
+        cached = self._dns_cache.get((host, port))
+        if cached is not None and cached[1] > time.monotonic():
+            self.dns_cache_hits += 1
+
+            return cached[0]
+
+        self.dns_lookups += 1
+        addresses = await asyncio.get_running_loop().getaddrinfo(
+            host, port, type=socket.SOCK_STREAM
+        )
+        self._dns_cache[(host, port)] = (addresses, time.monotonic() + self.dns_ttl_s)
+
+        return addresses
+
+    async def _open_tcp(self, host: str, port: int, addresses: List[AddressInfo]):
+        loop = asyncio.get_running_loop()
+        error = None
+
+        for family, type_, proto, _, address in addresses:
+            sock = socket.socket(family, type_, proto)
+            sock.setblocking(False)
+
+            try:
+                await loop.sock_connect(sock, address)
+
+                return sock
+            except OSError as e:
+                sock.close()
+                error = e
+                logger.debug(f"connect to {address} failed: {e}")
+            except BaseException:
+                sock.close()
+
+                raise
+
+        self._dns_cache.pop((host, port), None)  # maybe stale, resolve again next time
+
+        raise error or OSError(f"no addresses for {host}:{port}")
+
+    def _remember_tls_session(self, websocket) -> bool:
+        ssl_object = websocket.transport.get_extra_info("ssl_object")
+        if ssl_object is None:
+            return False
+
+        self.tls_handshakes += 1
+        resumed = ssl_object.session_reused
+        if resumed:
+            self.tls_resumed += 1
+
+        # tls 1.3 tickets arrive after the handshake, by now the upgrade response has been read
+        if isinstance(self.ssl_context, _ResumingSSLContext) and ssl_object.session is not None:
+            self.ssl_context.sessions[ssl_object.server_hostname] = ssl_object.session
+
+        return resumed
+
+
+########################
+# tls
+########################
+
+
+class _ResumingSSLContext(ssl.SSLContext):
+    """
+    asyncio's ssl transport has no way to pass a session, but it creates
+    every client connection through wrap_bio(), so the session goes in here
+    """
+
+    sessions: Dict[str, ssl.SSLSession]
+
+    def wrap_bio(
+        self, incoming, outgoing, server_side=False, server_hostname=None, session=None
+    ):
+        if session is None and not server_side:
+            session = self.sessions.get(server_hostname)
+
+        return super().wrap_bio(
+            incoming,
+            outgoing,
+            server_side=server_side,
+            server_hostname=server_hostname,
+            session=session,
+        )
+
+
+def resuming_ssl_context(cafile: str = None) -> ssl.SSLContext:
+    """
+    a default client context (system CAs, or `cafile`, e.g. a local test cert)
+    that resumes tls sessions
+    """
+    context = _ResumingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.sessions = {}
+
+    if cafile is not None:
+        context.load_verify_locations(cafile=cafile)
+    else:
+        context.load_default_certs()
+
+    return context
+
+
+class _TimedClientProtocol(WebSocketClientProtocol):
+    """
+    notes when the transport is up (tls done), before the websocket upgrade
+    """
+
+    transport_ready_time: float = None
+
+    def connection_made(self, transport):
+        self.transport_ready_time = time.monotonic()
+
+        super().connection_made(transport)
+
+
+websocket_connector = WebsocketConnector()
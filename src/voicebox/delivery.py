@@ -0,0 +1,281 @@
+import time
+import asyncio
+import inspect
+import tempfile
+from collections import deque
+from typing import IO, Any, Awaitable, Callable, Deque, Optional, Tuple
+
+from src.helpers.logging import LoggerFactory
+from src.helpers.metrics import MetricsRegistry, metrics
+
+logger = LoggerFactory.get_logger(namespace="delivery_queue", color="green")
+
+OVERFLOW_BLOCK = "block"
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_SPILL = "spill"
+
+OVERFLOW_POLICIES = [OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_SPILL]
+
+"""
+speech_base64: base64 string of audio, handed to the consumer in arrival order
+"""
+Deliver = Callable[[str], Awaitable[None]]
+
+
+class DeliveryQueue:
+    """
+    bounded queue between a socket reader & a (possibly slow) consumer.
+
+    the reader put()s chunks, a consumer task of its own hands them to
+    `deliver` one at a time, so downstream work (e.g. blocking playback)
+    never stalls websocket.recv() & the tcp window keeps draining.
+
+    overflow policies, once `max_chunks` are waiting in memory:
+    - "block": put() waits for space (backpressure onto the socket, timed)
+    - "drop_oldest": the oldest waiting chunk is dropped (live playout)
+    - "spill": further chunks go to a temp file & are read back in order
+      (nothing is lost & the reader never waits, but writes & seeks the file
+      on the event loop, opt-in)
+
+    a callback that blocks (e.g. pydub playback) would still block the whole
+    event loop, reader included: w/ `threaded_callbacks`, sync callbacks run
+    through invoke() are moved to a worker thread (one at a time, in order).
+    """
+
+    def __init__(
+        self,
+        deliver: Deliver,
+        max_chunks: int = 64,
+        overflow: str = OVERFLOW_BLOCK,
+        spill_dir: str = None,  # None → the system temp dir
+        threaded_callbacks: bool = False,
+        metrics: MetricsRegistry = metrics,
+        **metric_labels: str,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f"unknown overflow policy: {overflow} (expected one of {OVERFLOW_POLICIES})"
+            )
+
+        self.deliver = deliver
+        self.max_chunks = max_chunks
+        self.overflow = overflow
+        self.spill_dir = spill_dir
+        self.threaded_callbacks = threaded_callbacks
+        self.metrics = metrics
+        self.metric_labels = metric_labels
+
+        # internal
+        self._chunks: Deque[Tuple[float, str]] = deque()  # (enqueued at, base64 audio)
+        self._consumer_task: asyncio.Task = None
+        self._available = asyncio.Event()  # set while chunks are waiting
+        self._space = asyncio.Event()  # set while below max_chunks (block policy)
+        self._idle = asyncio.Event()  # set once everything put has been delivered
+        self._idle.set()
+
+        ## spill file (appended at the end, read from `_spill_read_offset`)
+        self._spill_file: IO[bytes] = None
+        self._spill_read_offset = 0
+        self._spilled_waiting = 0
+
+        ## stats
+        self.chunks_in = 0
+        self.chunks_delivered = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.spilled_bytes = 0
+        self.high_water = 0
+        self.blocked_count = 0
+        self.blocked_ms_total = 0.0
+        self.delivery_errors = 0
+
+    """
+    api
+    """
+
+    async def put(self, base64_audio: str):
+        """
+        only ever waits w/ the "block" policy
+        """
+        if self.overflow == OVERFLOW_BLOCK and len(self._chunks) >= self.max_chunks:
+            await self._wait_for_space()
+
+        self.put_nowait(base64_audio)
+
+    def put_nowait(self, base64_audio: str):
+        self._ensure_consumer()
+        self.chunks_in += 1
+        chunk = (time.monotonic(), base64_audio)
+
+        if self._spilled_waiting:
+            self._spill(chunk)  # keep order, the file drains first
+        elif len(self._chunks) < self.max_chunks or self.overflow == OVERFLOW_BLOCK:
+            self._chunks.append(chunk)
+        elif self.overflow == OVERFLOW_DROP_OLDEST:
+            self._chunks.popleft()
+            self._chunks.append(chunk)
+            self.dropped += 1
+        else:
+            self._spill(chunk)
+
+        self.high_water = max(self.high_water, self.depth())
+        self._idle.clear()
+        self._available.set()
+
+    async def invoke(self, callback: Callable[[str], Any], base64_audio: str):
+        """
+        calls a consumer callback from `deliver`, sync or async
+        """
+        if inspect.iscoroutinefunction(callback):
+            await callback(base64_audio)
+        elif self.threaded_callbacks:
+            await asyncio.to_thread(callback, base64_audio)
+        else:
+            callback(base64_audio)
+
+    async def drain(self):
+        """
+        waits until every chunk put so far has been delivered
+        """
+        await self._idle.wait()
+
+    def clear(self) -> Optional[asyncio.Task]:
+        """
+        drops everything not yet delivered & stops the consumer (e.g. barge-in).
+        returns the cancelled consumer task (if any), to wait for it to stop.
+        """
+        consumer_task, self._consumer_task = self._consumer_task, None
+        if consumer_task is not None:
+            consumer_task.cancel()
+
+        self._chunks.clear()
+        self._reset_spill()
+        self._available.clear()
+        self._space.set()
+        self._idle.set()
+
+        return consumer_task
+
+    def close(self) -> Optional[asyncio.Task]:
+        """
+        clear() & closes the spill file (the queue can still be reused, a later
+        spill opens a new one)
+        """
+        consumer_task = self.clear()
+
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+
+        return consumer_task
+
+    # state
+
+    def depth(self) -> int:
+        return len(self._chunks) + self._spilled_waiting
+
+    def stats(self) -> dict:
+        return {
+            "overflow": self.overflow,
+            "depth": self.depth(),
+            "high_water": self.high_water,
+            "chunks_in": self.chunks_in,
+            "chunks_delivered": self.chunks_delivered,
+            "dropped": self.dropped,
+            "spilled": self.spilled,
+            "spilled_bytes": self.spilled_bytes,
+            "blocked_count": self.blocked_count,
+            "blocked_ms_total": round(self.blocked_ms_total, 3),
+            "delivery_errors": self.delivery_errors,
+        }
+
+    ########################
+    # consumer
+    ########################
+
+    def _ensure_consumer(self):
+        if self._consumer_task is None or self._consumer_task.done():
+            self._consumer_task = asyncio.create_task(self._consume_routine())
+
+    async def _consume_routine(self):
+        while True:
+            if not self._chunks and self._spilled_waiting:
+                self._unspill()
+
+            if not self._chunks:
+                self._available.clear()
+                self._idle.set()
+                await self._available.wait()
+
+                continue
+
+            enqueued_at, base64_audio = self._chunks.popleft()
+            if len(self._chunks) < self.max_chunks:
+                self._space.set()
+
+            self.metrics.observe(
+                "voicebox_delivery_lag_ms",
+                (time.monotonic() - enqueued_at) * 1000,
+                **self.metric_labels,
+            )
+
+            try:
+                await self.deliver(base64_audio)
+            except Exception as e:
+                self.delivery_errors += 1
+                logger.error(f"failed to deliver speech: {e}")
+
+            self.chunks_delivered += 1
+
+    async def _wait_for_space(self):
+        blocked_start_time = time.monotonic()
+        self.blocked_count += 1
+
+        while len(self._chunks) >= self.max_chunks:
+            self._space.clear()
+            await self._space.wait()
+
+        blocked_ms = (time.monotonic() - blocked_start_time) * 1000
+        self.blocked_ms_total += blocked_ms
+        self.metrics.observe("voicebox_delivery_blocked_ms", blocked_ms, **self.metric_labels)
+
+    ########################
+    # spill file
+    ########################
+
+    def _spill(self, chunk: Tuple[float, str]):
+        if self._spill_file is None:
+            self._spill_file = tempfile.TemporaryFile(dir=self.spill_dir)
+
+        enqueued_at, base64_audio = chunk
+        line = f"{enqueued_at!r} {base64_audio}\n".encode("ascii")  # base64 has no spaces
+
+        self._spill_file.seek(0, 2)
+        self._spill_file.write(line)
+        self._spilled_waiting += 1
+        self.spilled += 1
+        self.spilled_bytes += len(line)
+
+    def _unspill(self):
+        """
+        reads up to `max_chunks` spilled chunks back into memory
+        """
+        self._spill_file.seek(self._spill_read_offset)
+
+        while self._spilled_waiting and len(self._chunks) < self.max_chunks:
+            enqueued_at, base64_audio = self._spill_file.readline().decode("ascii").split(" ", 1)
+            self._chunks.append((float(enqueued_at), base64_audio[:-1]))
+            self._spilled_waiting -= 1
+
+        self._spill_read_offset = self._spill_file.tell()
+
+        if not self._spilled_waiting:
+            self._reset_spill()
+
+    def _reset_spill(self):
+        self._spilled_waiting = 0
+        self._spill_read_offset = 0
+
+        if self._spill_file is not None:
+            self._spill_file.seek(0)
+            self._spill_file.truncate()
@@ -0,0 +1,18 @@
+class VoiceboxError(Exception):
+    pass
+
+
+class VoiceboxInterruptedError(VoiceboxError):
+    """
+    the generation was cancelled w/ interrupt() (e.g. the user barged in)
+    """
+
+    pass
+
+
+class VoiceboxConnectionError(VoiceboxError):
+    """
+    the socket failed to connect, or closed before the generation completed
+    """
+
+    pass
@@ -0,0 +1,151 @@
+import time
+import asyncio
+import websockets
+from collections import deque
+from typing import Deque
+
+from src.helpers.logging import LoggerFactory
+from src.helpers.percentiles import percentile
+from src.voicebox.connector import WebsocketConnector, websocket_connector
+
+logger = LoggerFactory.get_logger(namespace="hedged_connector", color="purple")
+
+
+class HedgedConnector:
+    """
+    websockets.connect w/ a hedge against slow handshakes.
+
+    if a connect isn't done after the `percentile`-th percentile of recent
+    connect times, a second attempt is started & the first to finish wins.
+    the other is cancelled, or closed if it got connected anyway. share one
+    connector between voiceboxes so the connect time history is shared too.
+
+    until `min_samples` connects have been seen, `initial_delay_s` is used.
+    the delay is always clamped to [min_delay_s, max_delay_s].
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95,
+        initial_delay_s: float = 0.3,
+        min_delay_s: float = 0.02,
+        max_delay_s: float = 1.0,
+        min_samples: int = 20,
+        history_size: int = 200,
+        connector: WebsocketConnector = websocket_connector,  # None → plain websockets.connect
+    ):
+        self.percentile = percentile
+        self.initial_delay_s = initial_delay_s
+        self.min_delay_s = min_delay_s
+        self.max_delay_s = max_delay_s
+        self.min_samples = min_samples
+        self.connector = connector
+
+        # internal
+        self._connect_times_s: Deque[float] = deque(maxlen=history_size)
+        self._cleanup_tasks = set()
+
+        ## stats
+        self.connects = 0
+        self.hedges_fired = 0
+        self.hedges_won = 0
+
+    """
+    api
+    """
+
+    async def connect(self, url: str, **connect_kwargs):
+        hedge_delay_s = self.hedge_delay_s()
+        attempts = [self._spawn_attempt(url, connect_kwargs)]
+        winner = None
+
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=hedge_delay_s)
+            if not done:
+                logger.debug(f"connect slower than {hedge_delay_s * 1000:.0f}ms, hedging")
+                self.hedges_fired += 1
+                attempts.append(self._spawn_attempt(url, connect_kwargs))
+
+            winner = await self._first_success(attempts)
+        finally:
+            self._discard_losers([attempt for attempt in attempts if attempt is not winner])
+
+        websocket, connect_time_s = winner.result()
+        self._connect_times_s.append(connect_time_s)
+        self.connects += 1
+        if winner is not attempts[0]:
+            self.hedges_won += 1
+
+        return websocket
+
+    # state
+
+    def hedge_delay_s(self) -> float:
+        if len(self._connect_times_s) < self.min_samples:
+            delay_s = self.initial_delay_s
+        else:
+            delay_s = percentile(self._connect_times_s, self.percentile)
+
+        return min(max(delay_s, self.min_delay_s), self.max_delay_s)
+
+    def stats(self) -> dict:
+        return {
+            "connects": self.connects,
+            "hedges_fired": self.hedges_fired,
+            "hedges_won": self.hedges_won,
+            "hedge_delay_ms": round(self.hedge_delay_s() * 1000, 3),
+        }
+
+    ########################
+    # attempts
+    ########################
+
+    def _spawn_attempt(self, url: str, connect_kwargs: dict) -> asyncio.Task:
+        async def _attempt():
+            start_time = time.monotonic()
+            if self.connector is not None:
+                websocket = await self.connector.connect(url, **connect_kwargs)
+            else:
+                websocket = await websockets.connect(url, **connect_kwargs)
+
+            return websocket, time.monotonic() - start_time
+
+        return asyncio.create_task(_attempt())
+
+    async def _first_success(self, attempts) -> asyncio.Task:
+        pending = set(attempts)
+        error = None
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+            for attempt in sorted(done, key=attempts.index):
+                if attempt.exception() is None:
+                    return attempt
+
+                error = attempt.exception()
+
+            if pending:
+                logger.debug(f"connect attempt failed, waiting on the other: {error}")
+
+        raise error
+
+    def _discard_losers(self, losers):
+        """
+        cancels attempts still connecting, closes ones that connected but lost
+        """
+        if not losers:
+            return
+
+        for attempt in losers:
+            attempt.cancel()  # (no-op once done)
+
+        cleanup_task = asyncio.create_task(self._close_losers(losers))
+        self._cleanup_tasks.add(cleanup_task)
+        cleanup_task.add_done_callback(self._cleanup_tasks.discard)
+
+    async def _close_losers(self, losers):
+        for result in await asyncio.gather(*losers, return_exceptions=True):
+            if isinstance(result, tuple):  # connected before the cancel landed
+                websocket, _ = result
+                await websocket.close()
@@ -0,0 +1,296 @@
+import re
+import gzip
+import json
+import time
+import struct
+import websockets
+from pathlib import Path
+from typing import IO, Dict, List, NamedTuple, Union
+
+from src.helpers.logging import LoggerFactory
+
+logger = LoggerFactory.get_logger(namespace="session_trace", color="cyan")
+
+"""
+trace file layout (gzip-compressed):
+
+[magic: 8 bytes]
+then one record per event: [kind: u8][connection: u16][time_ns: u64][length: u32][payload]
+
+time_ns: monotonic, since the recorder was created
+kind: one of the TRACE_* values below, | TRACE_BINARY when the frame was bytes
+open/close payloads are json, send/recv payloads the frame as it went over the wire
+"""
+TRACE_MAGIC = b"VBTRACE1"
+_RECORD_HEADER = struct.Struct("<BHQI")
+
+TRACE_OPEN = 1  # {url, headers, connect_ms}
+TRACE_SEND = 2  # client → server
+TRACE_RECV = 3  # server → client
+TRACE_CLOSE = 4  # {code, reason, by: "client" | "server"}
+TRACE_BINARY = 0x80
+
+REDACTED = "[redacted]"
+
+_API_KEY_FIELD = re.compile(r'("xi_api_key"\s*:\s*")(?:[^"\\]|\\.)*(")')
+_API_KEY_QUERY = re.compile(r"((?:xi_api_key|xi-api-key)=)[^&]*", re.IGNORECASE)
+_API_KEY_HEADERS = {"xi-api-key", "authorization"}
+
+
+class TraceEvent(NamedTuple):
+    kind: int
+    connection: int
+    time_s: float
+    payload: Union[str, bytes]
+
+    def json(self) -> dict:
+        """
+        (open & close events)
+        """
+        return json.loads(self.payload)
+
+
+class SessionTraceRecorder:
+    """
+    captures every payload a voicebox sends & every frame it receives, per
+    connection, into a compact binary trace w/ monotonic timestamps.
+
+    the api key is redacted before anything is written (the `xi_api_key`
+    payload field, an `xi-api-key` header or query param), so traces can be
+    shared & replayed w/ TraceReplayServer (src/testing/standin). one
+    recorder can be shared by many voiceboxes, each socket is its own
+    connection in the trace.
+    """
+
+    def __init__(self, path: Union[str, Path], compresslevel: int = 1):
+        self.path = Path(path)
+
+        # internal
+        self._file: IO[bytes] = gzip.open(self.path, "wb", compresslevel=compresslevel)
+        self._file.write(TRACE_MAGIC)
+        self._start_ns = time.monotonic_ns()
+        self._next_connection = 0
+
+        ## stats
+        self.connections = 0
+        self.events = 0
+        self.payload_bytes = 0
+
+    """
+    api
+    """
+
+    def wrap(self, websocket, url: str) -> "TracedWebsocket":
+        """
+        records the connection's open event, use the returned websocket in its place
+        """
+        connection = self._next_connection
+        self._next_connection = (self._next_connection + 1) % 0x10000
+        self.connections += 1
+
+        connect_timings = getattr(websocket, "connect_timings", None)
+        self._record(
+            TRACE_OPEN,
+            connection,
+            json.dumps(
+                {
+                    "url": redact(url),
+                    "headers": _redacted_headers(getattr(websocket, "request_headers", {})),
+                    "connect_ms": sum(connect_timings.values()) if connect_timings else None,
+                }
+            ),
+        )
+
+        return TracedWebsocket(websocket=websocket, recorder=self, connection=connection)
+
+    def close(self):
+        if self._file is None:
+            return
+
+        self._file.close()
+        self._file = None
+
+        logger.debug(f"trace written to {self.path} ({self.events} events)")
+
+    # state
+
+    def stats(self) -> dict:
+        return {
+            "path": str(self.path),
+            "connections": self.connections,
+            "events": self.events,
+            "payload_bytes": self.payload_bytes,
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    ########################
+    # recording
+    ########################
+
+    def _record(self, kind: int, connection: int, payload: Union[str, bytes]):
+        if self._file is None:
+            return
+
+        if isinstance(payload, str):
+            data = redact(payload).encode("utf-8")
+        else:
+            data = bytes(payload)
+            kind |= TRACE_BINARY
+
+        self._file.write(
+            _RECORD_HEADER.pack(kind, connection, time.monotonic_ns() - self._start_ns, len(data))
+        )
+        self._file.write(data)
+        self.events += 1
+        self.payload_bytes += len(data)
+
+
+class TracedWebsocket:
+    """
+    passes everything through to the websocket, recording send(), recv() & close()
+    """
+
+    def __init__(self, websocket, recorder: SessionTraceRecorder, connection: int):
+        self.websocket = websocket
+        self.recorder = recorder
+        self.connection = connection
+
+        # internal
+        self._close_recorded = False
+
+    async def send(self, message):
+        self.recorder._record(TRACE_SEND, self.connection, message)
+
+        await self.websocket.send(message)
+
+    def record_sent(self, message):
+        """
+        for a payload sent before the socket was wrapped (e.g. a pooled socket's BOS)
+        """
+        self.recorder._record(TRACE_SEND, self.connection, message)
+
+    async def recv(self):
+        try:
+            message = await self.websocket.recv()
+        except websockets.exceptions.ConnectionClosed as e:
+            self._record_close(by="server", code=e.code, reason=e.reason)
+
+            raise
+
+        self.recorder._record(TRACE_RECV, self.connection, message)
+
+        return message
+
+    async def close(self, *args, **kwargs):
+        self._record_close(by="client", code=1000, reason="")
+
+        await self.websocket.close(*args, **kwargs)
+
+    @property
+    def open(self) -> bool:
+        """
+        (a close the server sent while nobody was reading is recorded once noticed here)
+        """
+        is_open = self.websocket.open
+        if not is_open and not self._close_recorded:
+            close = getattr(self.websocket, "close_rcvd", None)  # the server's close frame
+            self._record_close(
+                by="server" if close is not None else "client",
+                code=close.code if close is not None else self.websocket.close_code,
+                reason=close.reason if close is not None else "",
+            )
+
+        return is_open
+
+    def __getattr__(self, name: str):
+        return getattr(self.websocket, name)
+
+    def _record_close(self, by: str, code: int, reason: str):
+        if self._close_recorded:
+            return
+
+        self._close_recorded = True
+        self.recorder._record(
+            TRACE_CLOSE, self.connection, json.dumps({"code": code, "reason": reason, "by": by})
+        )
+
+
+########################
+# reading
+########################
+
+
+def read_trace(path: Union[str, Path]) -> List[TraceEvent]:
+    with gzip.open(path, "rb") as file:
+        if file.read(len(TRACE_MAGIC)) != TRACE_MAGIC:
+            raise ValueError(f"not a session trace: {path}")
+
+        events = []
+        while True:
+            try:
+                header = file.read(_RECORD_HEADER.size)
+                kind, connection, time_ns, length = _RECORD_HEADER.unpack(header)
+                data = file.read(length)
+            except (EOFError, struct.error):
+                break  # the end (a recorder that was never closed leaves a cut-off record)
+
+            if len(data) < length:
+                break
+
+            events.append(
+                TraceEvent(
+                    kind=kind & ~TRACE_BINARY,
+                    connection=connection,
+                    time_s=time_ns / 1e9,
+                    payload=data if kind & TRACE_BINARY else data.decode("utf-8"),
+                )
+            )
+
+    return events
+
+
+def trace_connections(events: List[TraceEvent]) -> List[List[TraceEvent]]:
+    """
+    events grouped per connection, in the order the connections were opened
+    """
+    connections: List[List[TraceEvent]] = []
+    open_connections: Dict[int, List[TraceEvent]] = {}  # (ids wrap around)
+
+    for event in events:
+        if event.kind == TRACE_OPEN:
+            open_connections[event.connection] = []
+            connections.append(open_connections[event.connection])
+
+        if event.connection in open_connections:
+            open_connections[event.connection].append(event)
+
+    return connections
+
+
+########################
+# redaction
+########################
+
+
+def redact(text: str) -> str:
+    """
+    blanks the api key out of a payload or url
+    """
+    if "xi_api_key" not in text and "xi-api-key" not in text.lower():
+        return text
+
+    text = _API_KEY_FIELD.sub(rf"\1{REDACTED}\2", text)
+
+    return _API_KEY_QUERY.sub(rf"\1{REDACTED}", text)
+
+
+def _redacted_headers(headers) -> Dict[str, str]:
+    return {
+        name: REDACTED if name.lower() in _API_KEY_HEADERS else value
+        for name, value in headers.items()
+    }
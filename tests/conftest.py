@@ -0,0 +1,11 @@
+from pathlib import Path
+import os
+import sys
+
+# add root directory to sys.path to use modules in src
+root_dir = Path(__file__).resolve().parents[1]
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+os.environ.setdefault("ELEVENLABS_API_KEY", "stand-in")  # no real key needed offline
+os.environ.setdefault("LOG_LEVEL", "WARNING")
@@ -0,0 +1,60 @@
+import json
+import time
+import asyncio
+
+from src.voicebox.Voicebox import Voicebox
+from src.voicebox.autotune import ChunkScheduleTuner
+from src.testing.standin.StandInServer import StandInServer
+
+
+def _strict_json(text: str):
+    def _reject(constant):
+        raise ValueError(f"non-finite value in json: {constant}")
+
+    return json.loads(text, parse_constant=_reject)
+
+
+def test_burst_fed_generations_keep_the_schedule_valid(tmp_path):
+    """
+    text fed all at once has no text rate, two of those in a row used to turn
+    the steady chunk length into NaN (& kill the socket listener)
+    """
+    path = tmp_path / "chunk_schedules.json"
+    tuner = ChunkScheduleTuner(path=path)
+
+    async def run():
+        async with StandInServer(first_audio_delay_s=0.01) as server:
+            voicebox = Voicebox(voice_id="voice", base_url=server.url, tuner=tuner)
+
+            for _ in range(3):
+                voicebox.prepare(speech_generation_start_time=time.time())
+                await voicebox.wait_ready(timeout=5)
+                await voicebox.feed_speech("Hello there. This is all of the text at once.")
+                await voicebox.feeding_finished()
+                await voicebox.wait_complete(timeout=5)
+                await voicebox.reset()
+
+    asyncio.run(run())
+
+    settings = tuner.stats()["voice"]
+    assert settings["generations"] == 3
+    assert settings["text_chars_per_s_avg"] is None
+    assert all(isinstance(length, int) for length in tuner.chunk_length_schedule("voice"))
+    assert _strict_json(path.read_text())["voice"]["steady"] == settings["steady"]
+
+
+def test_non_finite_observations_are_ignored():
+    tuner = ChunkScheduleTuner(initial_steady=200)
+
+    tuner.observe("voice", fgl_ms=300.0, stall_ms=0.0, text_chars_per_s=None)
+    tuner.observe("voice", fgl_ms=300.0, stall_ms=0.0, text_chars_per_s=float("inf"))
+    tuner.observe("voice", fgl_ms=float("nan"), stall_ms=0.0, text_chars_per_s=100.0)
+
+    assert tuner.stats()["voice"]["generations"] == 2
+    assert tuner.chunk_length_schedule("voice")[2] == 200  # still the initial steady length
+
+
+def test_starts_out_as_the_untuned_schedule():
+    tuner = ChunkScheduleTuner()
+
+    assert tuner.chunk_length_schedule("voice") == [50, 50, 50]
@@ -0,0 +1,62 @@
+import asyncio
+
+from src.voicebox.coalescing import TextCoalescer
+
+
+def _coalescer(frames: list, **kwargs) -> TextCoalescer:
+    async def send_text(text: str):
+        frames.append(text)
+
+    return TextCoalescer(send_text, **kwargs)
+
+
+def test_chunks_are_joined_until_a_boundary():
+    frames = []
+
+    async def run():
+        coalescer = _coalescer(frames, min_chars=100)
+        for chunk in ["Your", "order", "shipped.", "It", "arrives", "Thursday"]:
+            await coalescer.push(chunk)
+        await coalescer.flush()
+
+        return coalescer.stats()
+
+    stats = asyncio.run(run())
+
+    # the same text as one frame per chunk would've sent (each chunk + " ")
+    assert frames == ["Your order shipped.", "It arrives Thursday"]
+    assert stats["flushes"]["boundary"] == 1 and stats["flushes"]["finish"] == 1
+    assert stats["frames_saved"] == 4
+
+
+def test_size_and_deadline_flushes():
+    frames = []
+
+    async def run():
+        coalescer = _coalescer(frames, min_chars=12, max_delay_ms=20)
+        for chunk in ["one", "two", "three"]:  # 4 + 4 + 6 chars → size
+            await coalescer.push(chunk)
+        await coalescer.push("four")
+        await asyncio.sleep(0.1)  # → deadline
+
+        return coalescer.stats()
+
+    stats = asyncio.run(run())
+
+    assert frames == ["one two three", "four"]
+    assert stats["flushes"]["size"] == 1 and stats["flushes"]["deadline"] == 1
+
+
+def test_clear_drops_buffered_text():
+    frames = []
+
+    async def run():
+        coalescer = _coalescer(frames, max_delay_ms=20)
+        await coalescer.push("stale")
+        coalescer.clear()
+        await asyncio.sleep(0.1)  # (the deadline was cancelled too)
+        await coalescer.flush()
+
+    asyncio.run(run())
+
+    assert frames == []
@@ -0,0 +1,136 @@
+import time
+import asyncio
+
+from src.helpers.metrics import MetricsRegistry
+from src.voicebox.delivery import DeliveryQueue
+from src.voicebox.Voicebox import Voicebox
+from src.testing.standin.StandInServer import StandInServer
+
+
+def _queue(delivered: list, gate: asyncio.Event = None, **kwargs) -> DeliveryQueue:
+    async def deliver(base64_audio: str):
+        if gate is not None:
+            await gate.wait()
+        delivered.append(base64_audio)
+
+    return DeliveryQueue(deliver=deliver, max_chunks=4, metrics=MetricsRegistry(), **kwargs)
+
+
+def test_block_waits_for_space_and_loses_nothing():
+    async def run():
+        delivered, gate = [], asyncio.Event()
+        queue = _queue(delivered, gate=gate, overflow="block")
+
+        for chunk in "abcde":  # (the consumer holds "a" at the gate)
+            await queue.put(chunk)
+            await asyncio.sleep(0)
+        put_task = asyncio.create_task(queue.put("f"))
+        await asyncio.sleep(0.01)
+        assert not put_task.done()  # the reader waits
+
+        gate.set()
+        await put_task
+        await queue.drain()
+
+        return delivered, queue.stats()
+
+    delivered, stats = asyncio.run(asyncio.wait_for(run(), timeout=5))
+
+    assert delivered == list("abcdef")
+    assert stats["blocked_count"] == 1
+
+
+def test_drop_oldest_keeps_the_newest_chunks():
+    async def run():
+        delivered, gate = [], asyncio.Event()
+        queue = _queue(delivered, gate=gate, overflow="drop_oldest")
+
+        for chunk in "abcdefgh":
+            await queue.put(chunk)
+        await asyncio.sleep(0)  # the consumer takes "a" & waits on the gate
+        for chunk in "ij":
+            await queue.put(chunk)
+
+        gate.set()
+        await queue.drain()
+
+        return delivered, queue.stats()
+
+    delivered, stats = asyncio.run(asyncio.wait_for(run(), timeout=5))
+
+    assert delivered[-4:] == list("ghij")
+    assert stats["dropped"] == len("abcdefghij") - len(delivered)
+
+
+def test_spill_keeps_order_and_closes_its_file():
+    async def run():
+        delivered, gate = [], asyncio.Event()
+        queue = _queue(delivered, gate=gate, overflow="spill")
+
+        chunks = [f"chunk{i}" for i in range(20)]
+        for chunk in chunks:
+            await queue.put(chunk)
+        spill_file = queue._spill_file
+
+        gate.set()
+        await queue.drain()
+        queue.close()
+
+        return chunks, delivered, queue.stats(), spill_file
+
+    chunks, delivered, stats, spill_file = asyncio.run(asyncio.wait_for(run(), timeout=5))
+
+    assert delivered == chunks
+    assert stats["spilled"] == 16
+    assert spill_file.closed
+
+
+def test_delivery_errors_dont_stop_the_consumer():
+    async def run():
+        delivered = []
+
+        async def deliver(base64_audio: str):
+            if base64_audio == "b":
+                raise RuntimeError("consumer broke")
+            delivered.append(base64_audio)
+
+        queue = DeliveryQueue(deliver=deliver, metrics=MetricsRegistry())
+        for chunk in "abc":
+            await queue.put(chunk)
+        await queue.drain()
+
+        return delivered, queue.stats()
+
+    delivered, stats = asyncio.run(asyncio.wait_for(run(), timeout=5))
+
+    assert delivered == ["a", "c"]
+    assert stats["delivery_errors"] == 1
+
+
+def test_voicebox_reset_closes_the_spill_file():
+    async def run():
+        async with StandInServer() as server:
+            gate = asyncio.Event()
+
+            async def on_speech(base64_audio: str):
+                await gate.wait()
+
+            voicebox = Voicebox(
+                voice_id="voice",
+                base_url=server.url,
+                on_speech=on_speech,
+                delivery={"max_chunks": 2, "overflow": "spill"},
+            )
+            voicebox.prepare(speech_generation_start_time=time.time())
+            await voicebox.wait_ready(timeout=5)
+            await voicebox.feed_speech("Hello there, this sentence comes back as many chunks.")
+            await voicebox.feeding_finished()
+            while voicebox.delivery_queue.stats()["spilled"] == 0:
+                await asyncio.sleep(0.01)
+            spill_file = voicebox.delivery_queue._spill_file
+
+            await voicebox.reset()
+
+            return spill_file
+
+    assert asyncio.run(asyncio.wait_for(run(), timeout=10)).closed
@@ -0,0 +1,45 @@
+import time
+import asyncio
+
+import pytest
+
+from src.voicebox.hedging import HedgedConnector
+from src.testing.standin.StandInServer import StandInServer
+
+
+def test_slow_handshakes_are_hedged():
+    async def run():
+        # every 2nd handshake takes 1s
+        async with StandInServer(slow_connect_every=2, slow_connect_delay_s=1.0) as server:
+            connector = HedgedConnector(initial_delay_s=0.05)
+
+            connect_times_s = []
+            for _ in range(2):
+                start_time = time.monotonic()
+                websocket = await connector.connect(server.url)
+                connect_times_s.append(time.monotonic() - start_time)
+                await websocket.close()
+
+            return connect_times_s, connector.stats()
+
+    connect_times_s, stats = asyncio.run(asyncio.wait_for(run(), timeout=10))
+
+    # the 2nd connect hit the slow handshake, the hedge (handshake 3) won
+    assert (stats["connects"], stats["hedges_fired"], stats["hedges_won"]) == (2, 1, 1)
+    assert connect_times_s[1] < 0.5
+
+
+def test_raises_once_every_attempt_failed():
+    async def run():
+        async with StandInServer() as server:
+            url = server.url
+
+        connector = HedgedConnector(initial_delay_s=0.01)
+        with pytest.raises(OSError):
+            await connector.connect(url)  # (nothing listens anymore)
+
+        return connector.stats()
+
+    stats = asyncio.run(asyncio.wait_for(run(), timeout=10))
+
+    assert stats["connects"] == 0
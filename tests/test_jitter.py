@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from src.audio.jitter import JitterBuffer
+from src.audio.sinks import NullSink
+
+CHUNK = b"\0" * 320  # 10ms of 16kHz 16-bit mono
+
+
+class FailingSink(NullSink):
+    def __init__(self, failures: int = None, **kwargs):
+        super().__init__(**kwargs)
+        self.failures = failures  # None: every write fails
+
+    def write(self, pcm):
+        if self.failures is None or self.failures > 0:
+            self.failures = self.failures - 1 if self.failures is not None else None
+            raise OSError("device gone")
+
+        super().write(pcm)
+
+
+def test_plays_out_every_chunk():
+    async def run():
+        sink = NullSink(sample_rate=16000)
+        jitter = JitterBuffer(sink, initial_prebuffer_ms=20)
+
+        for _ in range(5):
+            jitter.write(CHUNK)
+            await asyncio.sleep(0.005)
+        jitter.finish()
+
+        await jitter.wait_played()
+        await jitter.close()
+
+        return sink, jitter
+
+    sink, jitter = asyncio.run(asyncio.wait_for(run(), timeout=5))
+
+    assert sink.samples_played == 5 * 160
+    assert jitter.stats()["utterances"] == 1
+
+
+def test_playout_restarts_after_a_sink_failure():
+    async def run():
+        sink = FailingSink(failures=1, sample_rate=16000)
+        jitter = JitterBuffer(sink, initial_prebuffer_ms=0)
+
+        for _ in range(5):
+            jitter.write(CHUNK)
+        jitter.finish()
+
+        with pytest.raises(OSError, match="device gone"):
+            await jitter.wait_played()
+        await jitter.wait_played()  # restarts playout w/ what's still buffered
+        await jitter.close()
+
+        return sink
+
+    sink = asyncio.run(asyncio.wait_for(run(), timeout=5))
+
+    assert sink.samples_played == 4 * 160  # the chunk the sink failed on is lost
+
+
+def test_wait_played_raises_when_the_sink_keeps_failing():
+    async def run():
+        jitter = JitterBuffer(FailingSink(sample_rate=16000), initial_prebuffer_ms=0)
+
+        for _ in range(5):
+            jitter.write(CHUNK)
+        jitter.finish()
+
+        with pytest.raises(OSError, match="device gone"):
+            await jitter.wait_played()
+        await jitter.close()
+
+    asyncio.run(asyncio.wait_for(run(), timeout=5))
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from src.voicebox.errors import VoiceboxError
+from src.voicebox.autotune import ChunkScheduleTuner
+from src.voicebox.MultiContextVoicebox import MultiContextVoicebox
+from src.testing.standin.StandInServer import StandInServer
+
+
+async def _speak(context, text: str):
+    for word in text.split():
+        await context.feed_speech(word)
+    await context.feeding_finished()
+    await context.wait_complete(timeout=5)
+
+
+def test_reader_failure_fails_contexts_and_reconnects():
+    def on_speech(base64_audio: str):
+        raise RuntimeError("consumer broke")
+
+    async def run():
+        async with StandInServer() as server:
+            async with MultiContextVoicebox(
+                voice_id="voice", base_url=server.url, delivery=None
+            ) as voicebox:
+                context = await voicebox.open_context(on_speech=on_speech)
+                with pytest.raises(VoiceboxError, match="consumer broke"):
+                    await _speak(context, "Hello there.")
+
+                # the broken socket was closed, the next context gets a new one
+                received = []
+                context = await voicebox.open_context(on_speech=received.append)
+                await _speak(context, "Hello again.")
+
+                assert received
+                assert voicebox.stats()["connects"] == 2
+
+    asyncio.run(asyncio.wait_for(run(), timeout=10))
+
+
+def test_contexts_are_timed_and_tuned():
+    tuner = ChunkScheduleTuner()
+
+    async def run():
+        async with StandInServer(first_audio_delay_s=0.05) as server:
+            async with MultiContextVoicebox(
+                voice_id="voice", base_url=server.url, output_format="pcm_16000", tuner=tuner
+            ) as voicebox:
+                context = await voicebox.open_context(on_speech=lambda base64_audio: None)
+                await _speak(context, "Hello there. This is a context.")
+
+                return context.timings()
+
+    timings = asyncio.run(asyncio.wait_for(run(), timeout=10))
+
+    assert timings["fgl_ms"] >= 50
+    assert "stall_ms" in timings
+    assert tuner.stats()["voice"]["generations"] == 1
@@ -0,0 +1,62 @@
+import asyncio
+
+from src.voicebox.Voicebox import Voicebox
+from src.voicebox.VoiceboxPool import VoiceboxPool
+from src.voicebox.autotune import ChunkScheduleTuner
+from src.testing.standin.StandInServer import StandInServer
+
+
+def test_voiceboxes_on_different_endpoints_get_their_own_sockets():
+    async def run():
+        async with StandInServer() as first_server, StandInServer() as second_server:
+            pool = VoiceboxPool(size=1)
+            first = Voicebox(voice_id="voice", base_url=first_server.url, pool=pool)
+            second = Voicebox(voice_id="voice", base_url=second_server.url, pool=pool)
+
+            await pool.warm(first)
+            await pool.warm(second)
+            assert (first_server.handshakes, second_server.handshakes) == (1, 1)
+
+            for voicebox, server in ((first, first_server), (second, second_server)):
+                websocket = await pool.acquire(voicebox)
+                assert websocket.remote_address[1] == server.port
+                await websocket.close()
+
+            stats = pool.stats()
+            await pool.close()
+
+            return stats
+
+    stats = asyncio.run(asyncio.wait_for(run(), timeout=10))
+
+    assert (stats["hits"], stats["misses"]) == (2, 0)
+    assert len(stats["warm"]) == 2
+
+
+def test_schedule_changes_get_a_new_key_and_stale_keys_are_dropped():
+    async def run():
+        async with StandInServer() as server:
+            pool = VoiceboxPool(size=1, max_idle_s=0.2)
+            voicebox = Voicebox(voice_id="voice", base_url=server.url, pool=pool)
+
+            await pool.warm(voicebox)
+            stale_key = voicebox.connection_key()
+
+            voicebox.tuner = ChunkScheduleTuner(initial_first=120)
+            assert voicebox.connection_key() != stale_key
+
+            # a socket warmed w/ the [50] schedule must not be handed out
+            websocket = await pool.acquire(voicebox)
+            await websocket.close()
+            assert pool.stats()["misses"] == 1
+
+            await asyncio.sleep(0.6)  # stale socket expires & the key is forgotten
+            stats = pool.stats()
+            await pool.close()
+
+            return stale_key, voicebox.connection_key(), stats
+
+    stale_key, key, stats = asyncio.run(asyncio.wait_for(run(), timeout=10))
+
+    assert stale_key not in stats["warm"]
+    assert stats["warm"][key] == 1
@@ -0,0 +1,54 @@
+import time
+import base64
+import asyncio
+
+from src.voicebox.Voicebox import Voicebox
+from src.testing.standin.StandInServer import StandInServer
+
+text = (
+    "Sure. Let me check that for you. Your order shipped yesterday from our warehouse "
+    "and should arrive by Thursday afternoon. Anything else I can help you with today?"
+)
+
+
+async def _speak(server: StandInServer):
+    audio = bytearray()
+    voicebox = Voicebox(
+        voice_id="voice",
+        base_url=server.url,
+        output_format="pcm_16000",
+        on_speech=lambda base64_audio: audio.extend(base64.b64decode(base64_audio)),
+    )
+
+    voicebox.prepare(speech_generation_start_time=time.time())
+    await voicebox.wait_ready()
+    for word in text.split():
+        await voicebox.feed_speech(word)
+    await voicebox.feeding_finished()
+    await voicebox.wait_complete()
+    timings = voicebox.timings()
+    await voicebox.reset()
+
+    return len(audio), timings
+
+
+def test_reconnect_replays_only_the_unspoken_text():
+    async def run():
+        async with StandInServer() as server:
+            expected_bytes, _ = await _speak(server)
+
+        async with StandInServer(disconnect_after_frames=30, max_disconnects=1) as server:
+            received_bytes, timings = await _speak(server)
+
+            return expected_bytes, received_bytes, timings, server.disconnects_injected
+
+    expected_bytes, received_bytes, timings, disconnects = asyncio.run(
+        asyncio.wait_for(run(), timeout=20)
+    )
+
+    assert disconnects == 1
+    assert "reconnect_ms" in timings
+
+    # nothing lost & at most the partially spoken word (60ms of 16-bit 16kHz audio per char) again
+    bytes_per_char = 2 * 16000 * 60 // 1000
+    assert expected_bytes <= received_bytes <= expected_bytes + 10 * bytes_per_char
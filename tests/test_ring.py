@@ -0,0 +1,66 @@
+import base64
+
+from src.audio.ring import OVERFLOW_REJECT, PcmRingBuffer
+
+
+def test_partial_frames_carry_over_to_the_next_write():
+    ring = PcmRingBuffer(capacity=64, frame_bytes=4)
+
+    assert ring.write(b"abcde") == 4
+    assert ring.write(b"fgh") == 4
+    assert ring.write(b"ijklmn") == 4
+    assert bytes(ring.read()) == b"abcdefghijkl"
+
+    ring.write(b"x")
+    ring.clear()  # drops the partial frame too
+    ring.write(b"wxyz")
+    assert bytes(ring.read()) == b"wxyz"
+
+
+def test_write_base64():
+    ring = PcmRingBuffer(capacity=64)
+
+    ring.write_base64(base64.b64encode(b"\1\2\3\4").decode())
+
+    assert bytes(ring.read()) == b"\1\2\3\4"
+
+
+def test_reads_wrap_around():
+    ring = PcmRingBuffer(capacity=8)
+
+    ring.write(b"abcdef")
+    ring.consume(4)
+    ring.write(b"ghij")  # wraps
+
+    assert bytes(ring.read()) == b"efgh"  # up to the wrap point
+    assert bytes(ring.read()) == b"ij"
+
+
+def test_consume_keeps_reads_frame_aligned():
+    ring = PcmRingBuffer(capacity=64, frame_bytes=4)
+    ring.write(b"abcdefghijkl")
+
+    ring.consume(5)  # rounded down to one frame
+
+    assert bytes(ring.read()) == b"efghijkl"
+
+
+def test_drop_oldest_overwrites_unread_audio():
+    ring = PcmRingBuffer(capacity=8)
+
+    ring.write(b"abcdef")
+    assert ring.write(b"ghij") == 4
+
+    assert ring.readable() == 8
+    assert ring.stats()["overflowed_bytes"] == 2
+    assert bytes(ring.read()) + bytes(ring.read()) == b"cdefghij"
+
+
+def test_reject_keeps_unread_audio():
+    ring = PcmRingBuffer(capacity=8, overflow=OVERFLOW_REJECT)
+
+    ring.write(b"abcdef")
+    assert ring.write(b"ghij") == 2
+
+    assert ring.stats()["overflowed_bytes"] == 2
+    assert bytes(ring.read()) + bytes(ring.read()) == b"abcdefgh"
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from src.voicebox.errors import VoiceboxError
+from src.voicebox.ShardedVoiceboxRuntime import ShardedVoiceboxRuntime
+from src.testing.standin.StandInServer import StandInServer
+
+
+async def _words(text: str, fail_after: int = None):
+    for index, word in enumerate(text.split()):
+        if fail_after is not None and index == fail_after:
+            raise RuntimeError("llm went away")
+
+        yield word + " "
+        await asyncio.sleep(0.01)
+
+
+def test_text_source_error_ends_the_stream():
+    async def run():
+        async with StandInServer(first_audio_delay_s=0.01) as server:
+            async with ShardedVoiceboxRuntime(num_workers=1, base_url=server.url) as runtime:
+                with pytest.raises(RuntimeError, match="llm went away"):
+                    async for _ in runtime.stream(
+                        "session", "voice", _words("one two three four", fail_after=2)
+                    ):
+                        pass
+
+                # the worker is still usable afterwards
+                chunks = [pcm async for pcm in runtime.stream("next", "voice", _words("hello"))]
+                assert chunks
+
+    asyncio.run(asyncio.wait_for(run(), timeout=60))
+
+
+def test_dead_worker_fails_its_sessions():
+    async def run():
+        async with StandInServer(first_audio_delay_s=0.01) as server:
+            runtime = await ShardedVoiceboxRuntime(num_workers=1, base_url=server.url).start()
+
+            with pytest.raises(VoiceboxError, match="exited"):
+                async for _ in runtime.stream("session", "voice", _words("one " * 200)):
+                    runtime._workers[0].process.kill()
+
+            with pytest.raises(VoiceboxError, match="exited"):
+                async for _ in runtime.stream("later", "voice", _words("hello")):
+                    pass
+
+            await runtime.stop()
+
+    asyncio.run(asyncio.wait_for(run(), timeout=60))
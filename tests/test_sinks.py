@@ -0,0 +1,81 @@
+import wave
+import asyncio
+
+from src.audio.sinks import NullSink, WavFileSink
+
+
+def test_wav_file_sink_writes_everything(tmp_path):
+    path = tmp_path / "out.wav"
+
+    async def run():
+        sink = WavFileSink(path, sample_rate=16000)
+        for _ in range(10):
+            sink.write(b"\1\0" * 160)
+
+        await sink.wait_played()
+        await sink.close()
+
+        return sink
+
+    sink = asyncio.run(asyncio.wait_for(run(), timeout=5))
+
+    assert sink.samples_played == sink.samples_written == 1600
+    with wave.open(str(path)) as wav_file:
+        assert wav_file.getnframes() == 1600
+
+
+def test_failed_output_is_counted_as_played(tmp_path):
+    class FailingWavFileSink(WavFileSink):
+        def _output(self, chunk: bytes):
+            if len(chunk) == 4:
+                raise OSError("disk full")
+
+            super()._output(chunk)
+
+    async def run():
+        sink = FailingWavFileSink(tmp_path / "out.wav", sample_rate=16000)
+        sink.write(b"\0" * 8)
+        sink.write(b"\0" * 4)
+        sink.write(b"\0" * 6)
+
+        await sink.wait_played()
+        await sink.close()
+
+        return sink
+
+    sink = asyncio.run(asyncio.wait_for(run(), timeout=5))
+
+    assert sink.samples_played == sink.samples_written == 9
+
+
+def test_counts_stay_consistent_when_cleared_during_output(tmp_path):
+    async def run():
+        sink = WavFileSink(tmp_path / "out.wav", sample_rate=16000)
+        for _ in range(200):
+            for _ in range(50):
+                sink.write(b"\0" * 32)
+            sink.clear()
+            await asyncio.sleep(0)
+
+        await sink.wait_played()
+        await sink.close()
+
+        return sink
+
+    sink = asyncio.run(asyncio.wait_for(run(), timeout=10))
+
+    assert sink.samples_played == sink.samples_written == 200 * 50 * 16
+
+
+def test_realtime_null_sink_waits_for_playback():
+    async def run():
+        loop = asyncio.get_running_loop()
+        sink = NullSink(realtime=True, sample_rate=16000)
+        sink.write(b"\0" * 3200)  # 100ms
+
+        start_time = loop.time()
+        await sink.wait_played()
+
+        return loop.time() - start_time
+
+    assert asyncio.run(run()) >= 0.09
@@ -0,0 +1,44 @@
+import time
+import base64
+import asyncio
+
+import numpy as np
+
+from src.audio.telephony import ulaw_decode
+from src.voicebox.Voicebox import Voicebox
+from src.testing.standin.StandInServer import StandInServer
+
+
+async def _speak(server: StandInServer, output_format: str) -> bytes:
+    audio = bytearray()
+    voicebox = Voicebox(
+        voice_id="voice",
+        base_url=server.url,
+        output_format=output_format,
+        on_speech=lambda base64_audio: audio.extend(base64.b64decode(base64_audio)),
+    )
+
+    voicebox.prepare(speech_generation_start_time=time.time())
+    await voicebox.wait_ready()
+    for word in "Hello there, this is a stand-in voice.".split():
+        await voicebox.feed_speech(word)
+    await voicebox.feeding_finished()
+    await voicebox.wait_complete()
+    await voicebox.reset()
+
+    return bytes(audio)
+
+
+def test_ulaw_output_is_8_bit_mu_law():
+    async def run():
+        async with StandInServer() as server:
+            return await _speak(server, "pcm_8000"), await _speak(server, "ulaw_8000")
+
+    pcm, ulaw = asyncio.run(asyncio.wait_for(run(), timeout=10))
+
+    # same duration at 1 byte per sample instead of 2
+    assert len(pcm) == 2 * len(ulaw)
+
+    # & it decodes back to the same tone (up to μ-law quantization)
+    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.int32)
+    assert np.abs(ulaw_decode(ulaw).astype(np.int32) - samples).max() < 300
@@ -0,0 +1,48 @@
+import time
+import asyncio
+
+from src.voicebox.Voicebox import Voicebox, elevenlabs_api_key
+from src.voicebox.trace import (
+    REDACTED,
+    TRACE_OPEN,
+    TRACE_SEND,
+    SessionTraceRecorder,
+    read_trace,
+    redact,
+)
+from src.testing.standin.StandInServer import StandInServer
+
+
+def test_redact_blanks_the_api_key():
+    assert redact('{"text": " ", "xi_api_key": "secret"}') == (
+        f'{{"text": " ", "xi_api_key": "{REDACTED}"}}'
+    )
+    assert redact("wss://host/path?xi-api-key=secret&model_id=m") == (
+        f"wss://host/path?xi-api-key={REDACTED}&model_id=m"
+    )
+    assert redact('{"text": "no key here"}') == '{"text": "no key here"}'
+
+
+def test_recorded_traces_never_contain_the_api_key(tmp_path):
+    path = tmp_path / "session.trace"
+
+    async def run():
+        with SessionTraceRecorder(path) as recorder:
+            async with StandInServer() as server:
+                voicebox = Voicebox(voice_id="voice", base_url=server.url, recorder=recorder)
+
+                voicebox.prepare(speech_generation_start_time=time.time())
+                await voicebox.wait_ready()
+                await voicebox.feed_speech("Hello there.")
+                await voicebox.feeding_finished()
+                await voicebox.wait_complete()
+                await voicebox.reset()
+
+    asyncio.run(asyncio.wait_for(run(), timeout=10))
+
+    events = read_trace(path)
+    sends = [event for event in events if event.kind == TRACE_SEND]
+
+    assert [event.kind for event in events][0] == TRACE_OPEN
+    assert REDACTED in sends[0].payload  # the BOS carried the key
+    assert not any(elevenlabs_api_key in str(event.payload) for event in events)